@@ -0,0 +1,7 @@
+"""Offline throughput benchmarks for the PDF OCR workflow.
+
+Everything runs locally: a synthetic PDF corpus, a mock OpenAI-compatible
+server standing in for VLLM and Alibaba Cloud, and a tiny randomly
+initialized Qwen3-VL model for the local provider. Run from the workflow
+folder with ``python -m benchmarks.run``.
+"""
@@ -0,0 +1,94 @@
+"""Synthetic PDF corpus: cube test report pages with a filled-in table."""
+
+from pathlib import Path
+import random
+
+import fitz  # PyMuPDF
+
+# Row headers of the table the default prompt asks about
+ROW_HEADERS = [
+    "RFID Tag No. / Security Label No.",
+    "Identification no. of cube",
+    "Lab Ref. No.",
+    "Mould no.",
+    "Condition on received*",
+    "Edges/corners damaged**",
+    "W1 - width 1 (mm)",
+    "W2 - height",
+    "W3 - width 2",
+    "Mass as received (kg)",
+    "saturated in air",
+    "in water",
+    "Density by calculation (kg/m3)",
+    "by water-displacement",
+    "Maximum load at failure kN",
+    "Compressive strength**** MPa",
+    "Type of fracture*****",
+]
+
+A4_PORTRAIT = (595, 842)
+A4_LANDSCAPE = (842, 595)
+
+
+def _draw_table(page: fitz.Page, rng: random.Random, columns: int) -> None:
+    """Draw a ruled table with the row headers and random data columns."""
+    width, height = page.rect.width, page.rect.height
+    left, top = 40, 120
+    header_width = 190
+    column_width = (width - 2 * left - header_width) / columns
+    row_height = min(22.0, (height - top - 60) / len(ROW_HEADERS))
+
+    for row, header in enumerate(ROW_HEADERS):
+        y = top + row * row_height
+        page.draw_line((left, y), (width - left, y))
+        page.insert_text((left + 4, y + row_height - 7), header, fontsize=8)
+        for column in range(columns):
+            value = f"{rng.uniform(10, 2500):.1f}"
+            x = left + header_width + column * column_width
+            page.insert_text((x + 4, y + row_height - 7), value, fontsize=8)
+    bottom = top + len(ROW_HEADERS) * row_height
+    page.draw_line((left, bottom), (width - left, bottom))
+    for column in range(columns + 1):
+        x = left + header_width + column * column_width
+        page.draw_line((x, top), (x, bottom))
+    page.draw_line((left, top), (left, bottom))
+
+
+def generate_corpus(
+    folder: Path,
+    documents: int = 4,
+    pages: int = 5,
+    landscape_every: int = 3,
+    seed: int = 0,
+) -> list[Path]:
+    """Write a reproducible set of table PDFs.
+
+    Args:
+        folder: Folder the PDFs are written to (created if missing)
+        documents: Number of PDF files
+        pages: Pages per PDF
+        landscape_every: Every n-th page is landscape (0 for portrait only)
+        seed: Seed for the table contents
+
+    Returns:
+        Paths of the generated PDFs
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for document in range(documents):
+        pdf = fitz.open()
+        for page_number in range(pages):
+            landscape = landscape_every and (page_number + 1) % landscape_every == 0
+            width, height = A4_LANDSCAPE if landscape else A4_PORTRAIT
+            page = pdf.new_page(width=width, height=height)
+            page.insert_text(
+                (40, 60), f"Cube test report {document + 1}-{page_number + 1}", fontsize=16
+            )
+            page.insert_text((40, 85), "Compressive strength of hardened concrete", fontsize=10)
+            _draw_table(page, rng, columns=rng.randint(3, 6))
+        path = folder / f"report_{document + 1:03d}.pdf"
+        pdf.save(path)
+        pdf.close()
+        paths.append(path)
+    return paths
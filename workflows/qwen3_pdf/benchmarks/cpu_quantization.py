@@ -0,0 +1,182 @@
+"""
+CPU inference benchmark: full precision vs. dynamic int8 quantization.
+
+Runs the same synthetic pages through ``LocalProvider(device="cpu")`` twice,
+once in float32 and once with the linear layers quantized to int8, and
+reports the pages/sec of both and how closely the quantized output agrees
+with the float32 output (the same similarity measures as
+``calibrate_payload.py``). Use it to check that int8 keeps the OCR output of a
+checkpoint before setting ``LOCAL_QUANTIZATION = "int8"`` on CPU nodes.
+
+Run from the workflow folder:
+
+    python -m benchmarks.cpu_quantization --model Qwen/Qwen3-VL-2B-Instruct --threads 16
+    python -m benchmarks.cpu_quantization --tiny  # smoke test, output is noise
+"""
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional
+import argparse
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+
+from calibrate_payload import compare
+from config import LOCAL_MAX_NEW_TOKENS, MAX_PIXELS, MIN_PIXELS, PROMPT_LAYOUT
+from pdf_workflow import build_prompt
+from providers import LocalProvider
+
+from .corpus import generate_corpus
+from .run import render_corpus
+from .tiny_model import build_tiny_model
+
+# Checkpoint benchmarked by default: the smallest Qwen3-VL, as in experiments/qwen3
+DEFAULT_CPU_MODEL = "Qwen/Qwen3-VL-2B-Instruct"
+
+
+def run_variant(
+    model_name: str,
+    images: list,
+    quantization: Optional[str],
+    args: argparse.Namespace,
+) -> tuple[list[str | Exception], dict]:
+    """Load the model with one quantization setting and time the corpus.
+
+    Returns:
+        Tuple of (per-page results, timings)
+    """
+    load_started = time.perf_counter()
+    provider = LocalProvider(
+        model_name=model_name,
+        use_moe=False,
+        batch_size=args.batch_size,
+        min_pixels=MIN_PIXELS,
+        max_pixels=MAX_PIXELS,
+        prompt_layout=PROMPT_LAYOUT,
+        max_new_tokens=args.max_new_tokens,
+        device="cpu",
+        quantization=quantization,
+        num_threads=args.threads,
+    )
+    load_s = time.perf_counter() - load_started
+
+    started = time.perf_counter()
+    results = provider.process_many(images, [build_prompt()] * len(images))
+    elapsed = time.perf_counter() - started
+    failed = sum(isinstance(result, Exception) for result in results)
+
+    # Free the weights before the next variant is loaded
+    del provider
+    gc.collect()
+    return results, {
+        "load_s": load_s,
+        "pages": len(results) - failed,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "pages_per_s": (len(results) - failed) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: Path) -> dict:
+    pdf_folder = work_dir / "pdfs"
+    generate_corpus(pdf_folder, documents=args.documents, pages=args.pages, seed=args.seed)
+    images = render_corpus(pdf_folder)
+
+    if args.tiny:
+        model_name = str(build_tiny_model(work_dir / "tiny-qwen3-vl"))
+        # Random weights never emit an end token; cap the decode length
+        args.max_new_tokens = min(args.max_new_tokens, 32)
+    else:
+        model_name = args.model
+
+    baseline, float32 = run_variant(model_name, images, None, args)
+    quantized, int8 = run_variant(model_name, images, "int8", args)
+    return {
+        "model": model_name,
+        "float32": float32,
+        "int8": int8,
+        "speedup": int8["pages_per_s"] / float32["pages_per_s"] if float32["pages_per_s"] else 0.0,
+        "agreement": compare(baseline, quantized),
+    }
+
+
+def print_report(results: dict) -> None:
+    print()
+    print(f"CPU benchmark: {results['model']}")
+    print(f"{'variant':<8} {'load s':>8} {'pages':>6} {'failed':>7} {'pages/s':>8}")
+    for variant in ("float32", "int8"):
+        timing = results[variant]
+        print(
+            f"{variant:<8} {timing['load_s']:>8.1f} {timing['pages']:>6} "
+            f"{timing['failed']:>7} {timing['pages_per_s']:>8.3f}"
+        )
+    agreement = results["agreement"]
+    print(f"  int8 speedup: {results['speedup']:.2f}x")
+    print(
+        f"  Agreement with float32: mean similarity {agreement['mean_similarity']:.4f}, "
+        f"min {agreement['min_similarity']:.3f}, "
+        f"exact {agreement['exact_match_rate']:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare float32 and int8 CPU inference of the local provider"
+    )
+    parser.add_argument(
+        "--model",
+        default=DEFAULT_CPU_MODEL,
+        help=f"Checkpoint to benchmark (default: {DEFAULT_CPU_MODEL})",
+    )
+    parser.add_argument(
+        "--tiny",
+        action="store_true",
+        help="Use the tiny random benchmark model instead of --model (timings only)",
+    )
+    parser.add_argument("--documents", type=int, default=2, help="PDFs in the corpus")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per PDF")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=os.cpu_count(),
+        help="CPU threads used by torch (default: all cores)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Pages per generate call")
+    parser.add_argument(
+        "--max-new-tokens",
+        type=int,
+        default=LOCAL_MAX_NEW_TOKENS,
+        help=f"Maximum tokens generated per page (default: {LOCAL_MAX_NEW_TOKENS})",
+    )
+    parser.add_argument(
+        "--work-dir", type=Path, help="Keep corpus and checkpoints here instead of a temp folder"
+    )
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        if args.work_dir is not None:
+            work_dir = args.work_dir.resolve()
+            work_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            work_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        results = run_benchmark(args, work_dir)
+
+    print_report(results)
+    if args.output is not None:
+        report = {
+            "settings": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+                if key not in ("output", "work_dir")
+            },
+            "environment": {"python": platform.python_version(), "machine": platform.machine()},
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
@@ -0,0 +1,388 @@
+"""Mock OpenAI-compatible chat completions server with simulated latency.
+
+Stands in for a VLLM server or the DashScope API so the API providers can be
+benchmarked without a GPU or network access. Answers are a CSV code block
+followed by some trailing commentary, like the real model's, so early
+stopping has something to cut. The header, column and row requests of
+``table_pipeline.py`` get answers in the format they ask for.
+"""
+
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Optional
+import base64
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from PIL import Image
+
+from providers.resolution import QWEN3_VL_PATCH_FACTOR
+
+# Rows of the table in the default prompt
+ANSWER_ROWS = 17
+ANSWER_COLUMNS = 4
+COMMENTARY = (
+    "These are the data columns of the table. The row headers were not "
+    "repeated. Let me know if you need anything else."
+)
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Time to first token plus a fixed delay per generated token.
+
+    Args:
+        distribution: "constant", "uniform" or "lognormal"
+        mean: Mean time to first token in seconds
+        spread: Half-width of the uniform range, or the sigma of the lognormal
+        per_token: Seconds per generated token after the first
+    """
+
+    distribution: str = "constant"
+    mean: float = 0.2
+    spread: float = 0.0
+    per_token: float = 0.0
+
+    def __post_init__(self):
+        if self.distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse ``"distribution:mean[,spread[,per_token]]"``, e.g. ``"lognormal:0.5,0.3"``."""
+        distribution, _, values = spec.partition(":")
+        numbers = [float(v) for v in values.split(",") if v] if values else []
+        return cls(distribution, *numbers)
+
+    def first_token(self, rng: random.Random) -> float:
+        """Draw a time to first token in seconds."""
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.distribution == "lognormal" and self.mean > 0:
+            # Shift mu so the distribution's mean is ``mean``
+            mu = math.log(self.mean) - self.spread**2 / 2
+            return rng.lognormvariate(mu, self.spread)
+        return self.mean
+
+    def describe(self) -> str:
+        return f"{self.distribution}:{self.mean},{self.spread},{self.per_token}"
+
+
+class ServerStats:
+    """Request and token counters of the mock server."""
+
+    def __init__(self):
+        self.requests = 0
+        self.streamed = 0
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: list[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens: int, completion_tokens: int, latency: float, stream: bool):
+        with self._lock:
+            self.requests += 1
+            self.streamed += stream
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latencies.append(latency)
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.throttled += 1
+
+
+def _image_tokens(url: str) -> int:
+    """Vision tokens of a data URL image (one per 32x32 pixel patch)."""
+    _, _, data = url.partition("base64,")
+    try:
+        with Image.open(BytesIO(base64.b64decode(data))) as image:
+            width, height = image.size
+    except Exception:
+        return 0
+    return max(1, (width // QWEN3_VL_PATCH_FACTOR) * (height // QWEN3_VL_PATCH_FACTOR))
+
+
+def _prompt_tokens(messages: list[dict]) -> int:
+    """Rough prompt length: ~4 characters per text token plus the image patches."""
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            if part.get("type") == "image_url":
+                tokens += _image_tokens(part["image_url"]["url"])
+            else:
+                tokens += len(part.get("text", "")) // 4 + 1
+    return tokens
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    """Text parts of the request's messages."""
+    texts = []
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        texts.extend(part.get("text", "") for part in parts if part.get("type") != "image_url")
+    return "\n".join(texts)
+
+
+def _table_pipeline_answer(rng: random.Random, prompt: str) -> Optional[str]:
+    """Answer to a header, column or row request of the table pipeline, if it is one."""
+    if "Extract only the row headers" in prompt:
+        rows = [{"row_id": f"R{i + 1}", "header": f"Row {i + 1}"} for i in range(ANSWER_ROWS)]
+        return json.dumps({"rows": rows})
+    if "extract the column headers" in prompt:
+        return json.dumps({"columns": [f"Column {i + 1}" for i in range(ANSWER_COLUMNS)]})
+    fields = re.search(r"EXACTLY (\d+) fields", prompt)
+    if "Extract ONE row" in prompt and fields:
+        return ",".join(f"{rng.uniform(10, 2500):.1f}" for _ in range(int(fields.group(1))))
+    return None
+
+
+def _answer(rng: random.Random, request: dict) -> list[str]:
+    """Answer split into token-sized pieces.
+
+    Requests with guided decoding (VLLM's ``guided_json``/``guided_regex`` or
+    a JSON ``response_format``) get a bare JSON object or bare CSV rows, like
+    a constrained model would produce; others get a fenced CSV block followed
+    by commentary.
+    """
+    def values() -> list[str]:
+        return [f"{rng.uniform(10, 2500):.1f}" for _ in range(ANSWER_COLUMNS)]
+
+    table_answer = _table_pipeline_answer(rng, _prompt_text(request.get("messages", [])))
+    schema = request.get("guided_json") or (
+        (request.get("response_format") or {}).get("json_schema", {}).get("schema")
+    )
+    if schema is None and (request.get("response_format") or {}).get("type") == "json_object":
+        schema = {"properties": {f"row {i + 1}": {} for i in range(ANSWER_ROWS)}}
+    if table_answer is not None:
+        text = table_answer
+    elif schema is not None:
+        text = json.dumps({key: values() for key in schema.get("properties", {})})
+    else:
+        rows = [",".join(values()) for _ in range(ANSWER_ROWS)]
+        if request.get("guided_regex"):
+            text = "\n".join(rows)
+        else:
+            text = "```csv\n" + "\n".join(rows) + "\n```\n\n" + COMMENTARY
+    # Split after every comma, newline and space, roughly one piece per token
+    pieces, start = [], 0
+    for index, char in enumerate(text):
+        if char in ", \n":
+            pieces.append(text[start : index + 1])
+            start = index + 1
+    pieces.append(text[start:])
+    return [piece for piece in pieces if piece]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence access logs
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/models"):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        server = self.server
+        if server.throttle_rate and server.rng_random() < server.throttle_rate:
+            server.stats.record_throttle()
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "code": "Throttling"}},
+                {"Retry-After": "1"},
+            )
+            return
+
+        started = time.perf_counter()
+        prompt_tokens = _prompt_tokens(request.get("messages", []))
+        pieces, ttft = server.draw_answer(request)
+        max_tokens = request.get("max_tokens") or len(pieces)
+        pieces = pieces[:max_tokens]
+        model = request.get("model", "mock")
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+            sent = self._stream(
+                model,
+                pieces,
+                ttft,
+                server.latency.per_token,
+                prompt_tokens if include_usage else None,
+            )
+        else:
+            time.sleep(ttft + server.latency.per_token * max(0, len(pieces) - 1))
+            self._send_json(
+                200,
+                {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": "".join(pieces)},
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(pieces),
+                        "total_tokens": prompt_tokens + len(pieces),
+                    },
+                },
+            )
+            sent = len(pieces)
+        server.stats.record(
+            prompt_tokens, sent, time.perf_counter() - started, bool(request.get("stream"))
+        )
+
+    def _stream(
+        self,
+        model: str,
+        pieces: list[str],
+        ttft: float,
+        per_token: float,
+        prompt_tokens: Optional[int],
+    ) -> int:
+        """Send the answer as server-sent events; returns the pieces delivered.
+
+        A final usage chunk is sent if ``prompt_tokens`` is given.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        time.sleep(ttft)
+        sent = 0
+        try:
+            for index, piece in enumerate(pieces):
+                if index:
+                    time.sleep(per_token)
+                chunk = {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                sent += 1
+            if prompt_tokens is not None:
+                usage = {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": sent,
+                        "total_tokens": prompt_tokens + sent,
+                    },
+                }
+                self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped the stream early
+        return sent
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """Threaded mock server; use as a context manager to run it in the background.
+
+    Example:
+        with MockOpenAIServer(LatencyModel.parse("lognormal:0.5,0.3")) as server:
+            provider = VLLMProvider("mock", port=server.port)
+    """
+
+    daemon_threads = True
+    # Accept bursts of concurrent connections from the async clients
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        latency: LatencyModel = LatencyModel(),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            latency: Simulated latency of every completion
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            throttle_rate: Fraction of requests answered with HTTP 429
+            seed: Seed for latencies and answers
+        """
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.stats = ServerStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.port}/v1"
+
+    def rng_random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def draw_answer(self, request: dict) -> tuple[list[str], float]:
+        """Draw an answer to ``request`` and its time to first token."""
+        with self._rng_lock:
+            return _answer(self._rng, request), self.latency.first_token(self._rng)
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,388 @@
+"""
+Offline throughput benchmark for the PDF OCR workflow.
+
+Generates a synthetic PDF corpus and runs it either through the whole
+workflow (``pdf_workflow.main``: planning, rendering, inference, writing) or
+straight through a provider. API providers talk to a local mock server with a
+configurable latency distribution; the local provider runs a tiny randomly
+initialized Qwen3-VL model on CPU. Results (pages/sec, latency percentiles,
+tokens/sec and per-stage timings) are printed and optionally written as JSON,
+and can be compared against a previous run to catch regressions.
+
+Run from the workflow folder:
+
+    python -m benchmarks.run --provider vllm --latency lognormal:0.5,0.3 --output base.json
+    python -m benchmarks.run --provider vllm --latency lognormal:0.5,0.3 --compare base.json
+"""
+
+from contextlib import ExitStack
+from pathlib import Path
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+
+from config import (
+    ALIBABA_MAX_RETRIES,
+    ALIBABA_RPM,
+    ALIBABA_TPM,
+    LOCAL_MAX_NEW_TOKENS,
+    MAX_PIXELS,
+    MIN_PIXELS,
+    PROMPT_LAYOUT,
+    LOCAL_PREFIX_CACHE,
+    STREAM_RESPONSES,
+    TARGET_LONGEST_SIDE,
+)
+from converter import PageRenderer, plan_pages
+from pdf_workflow import (
+    build_completion_detector,
+    build_payload_encoder,
+    build_prompt,
+    build_resolution_planner,
+    build_structured_output,
+    main as run_workflow,
+)
+from providers import BaseProvider
+from providers.tracing import Tracer, set_tracer
+
+from .corpus import generate_corpus
+from .mock_server import LatencyModel, MockOpenAIServer
+from .tiny_model import PROCESSOR_SOURCE, build_tiny_model
+
+# Metrics compared against a baseline: name -> True if higher is better
+COMPARED_METRICS = {
+    "pages_per_s": True,
+    "tokens_per_s": True,
+    "latency_p50_s": False,
+    "latency_p95_s": False,
+}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values`` (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def latency_stats(latencies: list[float]) -> dict[str, float]:
+    return {
+        "latency_p50_s": percentile(latencies, 0.50),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_p99_s": percentile(latencies, 0.99),
+    }
+
+
+def build_benchmark_provider(
+    args: argparse.Namespace, servers: list[MockOpenAIServer], work_dir: Path
+) -> BaseProvider:
+    """Build the provider under test, pointed at the local stand-ins."""
+    stream = args.stream or STREAM_RESPONSES
+    if args.provider == "vllm":
+        from providers import VLLMProvider
+
+        return VLLMProvider(
+            model_name="mock",
+            endpoints=[f"127.0.0.1:{server.port}" for server in servers],
+            max_in_flight=args.concurrency,
+            payload_encoder=build_payload_encoder(),
+            # Replicas never go away during a benchmark
+            health_check_interval=0,
+            stream=stream,
+            completion_detector=build_completion_detector(),
+            structured_output=build_structured_output(),
+        )
+    if args.provider == "alibaba_cloud":
+        from providers import AlibabaCloudProvider
+
+        return AlibabaCloudProvider(
+            model_name="mock",
+            api_key="mock",
+            base_url=servers[0].base_url,
+            max_in_flight=args.concurrency,
+            payload_encoder=build_payload_encoder(),
+            requests_per_minute=ALIBABA_RPM,
+            tokens_per_minute=ALIBABA_TPM,
+            max_retries=ALIBABA_MAX_RETRIES,
+            stream=stream,
+            completion_detector=build_completion_detector(),
+            structured_output=build_structured_output(),
+        )
+    from providers import LocalProvider
+
+    checkpoint = build_tiny_model(
+        args.model_dir or work_dir / "tiny-qwen3-vl", processor_source=args.processor_source
+    )
+    return LocalProvider(
+        model_name=str(checkpoint),
+        use_moe=False,
+        batch_size=args.concurrency,
+        min_pixels=MIN_PIXELS,
+        max_pixels=MAX_PIXELS,
+        prompt_layout=PROMPT_LAYOUT,
+        prefix_cache=LOCAL_PREFIX_CACHE,
+        # Random weights never emit an end token; cap the decode length
+        max_new_tokens=min(LOCAL_MAX_NEW_TOKENS, args.max_new_tokens),
+        completion_detector=build_completion_detector(),
+        structured_output=build_structured_output(),
+    )
+
+
+def render_corpus(pdf_folder: Path) -> list:
+    """Render every page of the corpus into memory."""
+    planner = build_resolution_planner()
+    images = []
+    with ExitStack() as stack:
+        renderer = PageRenderer()
+        stack.callback(renderer.close)
+        for pdf_path in sorted(pdf_folder.glob("*.pdf")):
+            if planner is not None:
+                plans = plan_pages(pdf_path, planner=planner)
+            else:
+                plans = plan_pages(pdf_path, target_longest_side=TARGET_LONGEST_SIDE)
+            images.extend(page.image for page in renderer.render(pdf_path, plans))
+    return images
+
+
+def run_provider_scenario(provider: BaseProvider, pdf_folder: Path) -> dict:
+    """Time ``process_many`` over the pre-rendered corpus."""
+    render_started = time.perf_counter()
+    images = render_corpus(pdf_folder)
+    render_s = time.perf_counter() - render_started
+
+    # Collect the provider's internal stages (encoding, requests, generation)
+    tracer = Tracer()
+    previous_tracer = set_tracer(tracer)
+    try:
+        tracer.record("render", render_s, items=len(images))
+        started = time.perf_counter()
+        with tracer.span("infer", items=len(images)):
+            results = provider.process_many(images, [build_prompt()] * len(images))
+        elapsed = time.perf_counter() - started
+    finally:
+        set_tracer(previous_tracer)
+    failed = sum(isinstance(result, Exception) for result in results)
+    return {
+        "pages": len(results) - failed,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "pages_per_s": (len(results) - failed) / elapsed if elapsed > 0 else 0.0,
+        "stages": tracer.stage_summary(),
+        "texts": [result for result in results if isinstance(result, str)],
+    }
+
+
+def count_tokens(provider: BaseProvider, texts: list[str]) -> int:
+    """Generated tokens of the local provider, counted with its tokenizer."""
+    tokenizer = provider.processor.tokenizer  # type: ignore[attr-defined]
+    return sum(len(tokenizer(text, add_special_tokens=False).input_ids) for text in texts)
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: Path) -> dict:
+    pdf_folder = work_dir / "pdfs"
+    generate_corpus(pdf_folder, documents=args.documents, pages=args.pages, seed=args.seed)
+    latency = LatencyModel.parse(args.latency)
+
+    with ExitStack() as stack:
+        servers = []
+        if args.provider != "local":
+            for replica in range(args.replicas if args.provider == "vllm" else 1):
+                server = MockOpenAIServer(
+                    latency, throttle_rate=args.throttle_rate, seed=args.seed + replica
+                )
+                servers.append(stack.enter_context(server))
+
+        provider = build_benchmark_provider(args, servers, work_dir)
+        stack.callback(provider.close)
+
+        if args.scenario == "workflow":
+            summary = run_workflow(
+                pdf_folder,
+                work_dir / "output",
+                provider=provider,
+                use_cache=False,
+                resume=False,
+                save_images=not args.no_save_images,
+            )
+            texts = [
+                path.read_text(encoding="utf-8")
+                for path in sorted((work_dir / "output").rglob("*.txt"))
+            ]
+        else:
+            summary = run_provider_scenario(provider, pdf_folder)
+            texts = summary.pop("texts")
+
+        if servers:
+            # Server-side latency: request received to answer sent
+            latencies = [lat for server in servers for lat in server.stats.latencies]
+            completion_tokens = sum(server.stats.completion_tokens for server in servers)
+            summary["server"] = {
+                "requests": sum(server.stats.requests for server in servers),
+                "throttled": sum(server.stats.throttled for server in servers),
+                "prompt_tokens": sum(server.stats.prompt_tokens for server in servers),
+                "completion_tokens": completion_tokens,
+            }
+        else:
+            # One page at a time, so latency is per page rather than per batch
+            images = render_corpus(pdf_folder)[: args.latency_samples]
+            latencies = []
+            for image in images:
+                started = time.perf_counter()
+                provider.process_image(image, build_prompt())
+                latencies.append(time.perf_counter() - started)
+            completion_tokens = count_tokens(provider, texts)
+
+    summary.update(latency_stats(latencies))
+    summary["tokens_per_s"] = (
+        completion_tokens / summary["elapsed_s"] if summary["elapsed_s"] > 0 else 0.0
+    )
+    return summary
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """List the metrics that got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        before = baseline["results"].get(metric)
+        after = current["results"].get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        print(f"  {metric}: {before:.3f} -> {after:.3f} ({change:+.1%})")
+        if worse > tolerance:
+            regressions.append(f"{metric} {change:+.1%}")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    results = report["results"]
+    print()
+    print(f"Benchmark: {report['settings']['scenario']} / {report['settings']['provider']}")
+    print(
+        f"  {results['pages']} page(s), {results['failed']} failed in "
+        f"{results['elapsed_s']:.2f}s: {results['pages_per_s']:.2f} pages/s, "
+        f"{results['tokens_per_s']:.1f} tokens/s"
+    )
+    print(
+        f"  Latency p50 {results['latency_p50_s']:.3f}s, "
+        f"p95 {results['latency_p95_s']:.3f}s, p99 {results['latency_p99_s']:.3f}s"
+    )
+    for stage, timing in sorted(results["stages"].items()):
+        print(f"  Stage {stage}: {timing['seconds']:.2f}s over {timing['items']} item(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline throughput benchmark for the PDF OCR workflow"
+    )
+    parser.add_argument(
+        "--scenario",
+        choices=["workflow", "provider"],
+        default="workflow",
+        help="Run the whole workflow, or only the provider on pre-rendered pages "
+        "(default: workflow)",
+    )
+    parser.add_argument(
+        "--provider",
+        choices=["vllm", "alibaba_cloud", "local"],
+        default="vllm",
+        help="Provider to benchmark (default: vllm)",
+    )
+    parser.add_argument("--documents", type=int, default=4, help="PDFs in the corpus")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per PDF")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for corpus and latencies")
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.5,0.3,0.002",
+        help="Mock server latency as distribution:mean[,spread[,per_token]] "
+        "(default: lognormal:0.5,0.3,0.002)",
+    )
+    parser.add_argument(
+        "--replicas", type=int, default=1, help="Mock VLLM replicas to load balance over"
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of mock requests answered with HTTP 429",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Requests in flight (API providers) or batch size (local)",
+    )
+    parser.add_argument("--stream", action="store_true", help="Stream completions")
+    parser.add_argument(
+        "--no-save-images", action="store_true", help="Don't write rendered PNGs"
+    )
+    parser.add_argument(
+        "--max-new-tokens",
+        type=int,
+        default=32,
+        help="Decode length of the tiny local model (default: 32)",
+    )
+    parser.add_argument(
+        "--latency-samples",
+        type=int,
+        default=5,
+        help="Pages timed one by one for the local provider's latency percentiles",
+    )
+    parser.add_argument(
+        "--model-dir", type=Path, help="Where to keep the tiny local model checkpoint"
+    )
+    parser.add_argument(
+        "--processor-source",
+        default=PROCESSOR_SOURCE,
+        help=f"Model providing the tiny model's tokenizer and processor "
+        f"(default: {PROCESSOR_SOURCE})",
+    )
+    parser.add_argument(
+        "--work-dir", type=Path, help="Keep corpus and outputs here instead of a temp folder"
+    )
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed relative regression before --compare fails (default: 0.10)",
+    )
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        if args.work_dir is not None:
+            work_dir = args.work_dir.resolve()
+            work_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            work_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        results = run_benchmark(args, work_dir)
+
+    report = {
+        "settings": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare", "work_dir")
+        },
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "results": results,
+    }
+    print_report(report)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(f"Compared with {args.compare}:")
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
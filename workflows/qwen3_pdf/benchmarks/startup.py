@@ -0,0 +1,153 @@
+"""
+Startup time benchmark for the workflow's entry points.
+
+Runs each scenario in a fresh interpreter several times and reports the
+median wall time and which heavy libraries ended up imported. API-only runs
+and the viewer should never load torch or transformers; the report makes a
+regression (e.g. an eager provider import) visible, and ``--compare`` fails
+if a scenario got slower than a saved baseline.
+
+Run from the workflow folder:
+
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --compare startup.json
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Libraries whose import alone takes noticeable time
+HEAVY_MODULES = ("torch", "transformers", "openai", "httpx", "fitz")
+
+# Scenario -> code run in a fresh interpreter from the workflow folder
+SCENARIOS = {
+    "import providers": "import providers",
+    "import viewer": "import viewer",
+    "workflow --help": (
+        "import runpy, sys\n"
+        "sys.argv = ['pdf_workflow.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('pdf_workflow.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass"
+    ),
+    "build vllm provider": "import pdf_workflow\npdf_workflow.build_provider('vllm')",
+    "build alibaba_cloud provider": (
+        "import pdf_workflow\npdf_workflow.build_provider('alibaba_cloud')"
+    ),
+}
+
+# Appended to every scenario: report the heavy modules that were imported
+_REPORT_MODULES = (
+    "\nimport json as _json, sys as _sys\n"
+    "print('MODULES=' + _json.dumps([m for m in {modules!r} if m in _sys.modules]))"
+)
+
+
+def run_scenario(code: str, repeats: int, workflow_dir: Path) -> dict:
+    """Time ``code`` in ``repeats`` fresh interpreters.
+
+    Returns:
+        Median/min wall time and the heavy modules the code imported
+    """
+    env = {**os.environ, "DASHSCOPE_API_KEY": os.environ.get("DASHSCOPE_API_KEY", "benchmark")}
+    script = code + _REPORT_MODULES.format(modules=HEAVY_MODULES)
+    timings, modules = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=workflow_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        timings.append(time.perf_counter() - started)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Scenario failed:\n{completed.stderr}")
+        for line in completed.stdout.splitlines():
+            if line.startswith("MODULES="):
+                modules = json.loads(line.removeprefix("MODULES="))
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "heavy_modules": modules,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """List the scenarios that got slower than the baseline by more than ``tolerance``."""
+    regressions = []
+    for scenario, result in current["results"].items():
+        before = baseline["results"].get(scenario, {}).get("median_s")
+        if not before:
+            continue
+        change = (result["median_s"] - before) / before
+        print(f"  {scenario}: {before:.3f}s -> {result['median_s']:.3f}s ({change:+.1%})")
+        if change > tolerance:
+            regressions.append(f"{scenario} {change:+.1%}")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    print()
+    print(f"{'scenario':<30} {'median s':>9} {'min s':>7}  heavy modules")
+    for scenario, result in results.items():
+        print(
+            f"{scenario:<30} {result['median_s']:>9.3f} {result['min_s']:>7.3f}  "
+            f"{', '.join(result['heavy_modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time of the workflow's entry points")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="Fresh interpreters per scenario (default: 5)"
+    )
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown before --compare fails (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    workflow_dir = Path(__file__).resolve().parent.parent
+    results = {
+        scenario: run_scenario(SCENARIOS[scenario], args.repeats, workflow_dir)
+        for scenario in args.scenario or SCENARIOS
+    }
+    print_report(results)
+
+    report = {
+        "settings": {"repeats": args.repeats},
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(f"Compared with {args.compare}:")
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
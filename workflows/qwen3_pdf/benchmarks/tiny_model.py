@@ -0,0 +1,66 @@
+"""Tiny randomly initialized Qwen3-VL checkpoint for CPU benchmarks.
+
+The model keeps the real architecture, tokenizer and image processor (so
+prompt compilation, batching, prefix caching and early stopping all run the
+same code paths) but shrinks every layer until a page takes well under a
+second on a laptop CPU. Its output is noise; only the timings matter.
+
+The processor files are taken from ``processor_source`` and must be available
+locally (e.g. in the Hugging Face cache) if the benchmark runs offline.
+"""
+
+from pathlib import Path
+
+# Dense model whose tokenizer and image processor are reused
+PROCESSOR_SOURCE = "Qwen/Qwen3-VL-2B-Instruct"
+
+
+def build_tiny_model(
+    output_dir: Path,
+    processor_source: str = PROCESSOR_SOURCE,
+    seed: int = 0,
+) -> Path:
+    """Save a tiny Qwen3-VL model and its processor to ``output_dir``.
+
+    The checkpoint is only built once; later calls return the existing folder.
+
+    Args:
+        output_dir: Folder to save the checkpoint to
+        processor_source: Model whose config, tokenizer and processor are shrunk
+        seed: Seed for the random weights
+
+    Returns:
+        The checkpoint folder, loadable with ``LocalProvider(str(output_dir))``
+    """
+    if (output_dir / "config.json").exists():
+        return output_dir
+
+    import torch
+    from transformers import AutoConfig, AutoProcessor, Qwen3VLForConditionalGeneration
+
+    config = AutoConfig.from_pretrained(processor_source)
+
+    text = config.text_config
+    text.hidden_size = 64
+    text.intermediate_size = 128
+    text.num_hidden_layers = 2
+    text.num_attention_heads = 4
+    text.num_key_value_heads = 2
+    text.head_dim = 16
+    # The multimodal rotary sections must add up to head_dim / 2
+    text.rope_scaling = {**(text.rope_scaling or {}), "mrope_section": [2, 3, 3]}
+    text.tie_word_embeddings = True
+
+    vision = config.vision_config
+    vision.depth = 2
+    vision.hidden_size = 64
+    vision.intermediate_size = 128
+    vision.num_heads = 2
+    vision.out_hidden_size = text.hidden_size
+    vision.deepstack_visual_indexes = [0]
+
+    torch.manual_seed(seed)
+    model = Qwen3VLForConditionalGeneration(config)
+    model.save_pretrained(output_dir)
+    AutoProcessor.from_pretrained(processor_source).save_pretrained(output_dir)
+    return output_dir
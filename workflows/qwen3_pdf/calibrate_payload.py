@@ -0,0 +1,180 @@
+"""
+Payload calibration for API providers.
+
+Runs the same pages through an API provider with several image payload
+encodings (lossless PNG, JPEG/WebP at different qualities, grayscale,
+patch-grid resizing) and compares the OCR output of each against the lossless
+baseline. Use it to pick the smallest payload that doesn't change results,
+then set the PAYLOAD_* options in config.py accordingly.
+"""
+
+from pathlib import Path
+import argparse
+import difflib
+import json
+import sys
+
+from config import DEFAULT_OUTPUT_FOLDER, PAYLOAD_MAX_PIXELS
+from pdf_workflow import build_prompt, build_provider
+from providers import OpenAICompatibleProvider, PayloadEncoder
+from providers.payload import PayloadStats
+
+# Candidate encodings, roughly from largest to smallest payload
+CANDIDATES = {
+    "png": PayloadEncoder(format="png"),
+    "jpeg-q90": PayloadEncoder(format="jpeg", quality=90),
+    "jpeg-q75": PayloadEncoder(format="jpeg", quality=75),
+    "webp-q80": PayloadEncoder(format="webp", quality=80),
+    "gray-jpeg-q85": PayloadEncoder(format="jpeg", quality=85, grayscale=True),
+    "grid-jpeg-q85": PayloadEncoder(
+        format="jpeg", quality=85, resize_to_patch_grid=True, max_pixels=PAYLOAD_MAX_PIXELS
+    ),
+    "grid-gray-webp-q75": PayloadEncoder(
+        format="webp",
+        quality=75,
+        grayscale=True,
+        resize_to_patch_grid=True,
+        max_pixels=PAYLOAD_MAX_PIXELS,
+    ),
+}
+
+
+def run_encoding(
+    provider: OpenAICompatibleProvider,
+    encoder: PayloadEncoder,
+    images: list[Path],
+) -> tuple[list[str | Exception], PayloadStats]:
+    """Process all images with one payload encoding.
+
+    Returns:
+        Tuple of (per-image results, payload statistics)
+    """
+    provider.payload_encoder = encoder
+    provider.payload_stats = PayloadStats()
+    results = provider.process_many(list(images), [build_prompt()] * len(images))
+    return results, provider.payload_stats
+
+
+def compare(baseline: list[str | Exception], results: list[str | Exception]) -> dict:
+    """Compare OCR results against the baseline, page by page.
+
+    Returns:
+        Dict with the mean/min text similarity, the share of identical outputs
+        and the number of failed requests
+    """
+    similarities = []
+    exact = 0
+    failures = 0
+    for expected, actual in zip(baseline, results):
+        if isinstance(expected, Exception):
+            continue
+        if isinstance(actual, Exception):
+            failures += 1
+            similarities.append(0.0)
+            continue
+        similarities.append(difflib.SequenceMatcher(None, expected, actual).ratio())
+        exact += expected == actual
+    count = len(similarities)
+    return {
+        "mean_similarity": sum(similarities) / count if count else 0.0,
+        "min_similarity": min(similarities) if similarities else 0.0,
+        "exact_match_rate": exact / count if count else 0.0,
+        "failures": failures,
+    }
+
+
+def main() -> None:
+    """Main entry point for payload calibration."""
+    parser = argparse.ArgumentParser(
+        description="Compare OCR output across image payload encodings"
+    )
+    parser.add_argument(
+        "--provider",
+        type=str,
+        default="vllm",
+        choices=["alibaba_cloud", "vllm"],
+        help="API provider to calibrate (default: vllm)",
+    )
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=DEFAULT_OUTPUT_FOLDER,
+        help="Folder searched recursively for imageN.png pages "
+        f"(default: {DEFAULT_OUTPUT_FOLDER})",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Number of pages to sample (default: 10)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.99,
+        help="Minimum mean similarity to the baseline for a recommendation (default: 0.99)",
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        default=None,
+        help="Optional path to write the full report as JSON",
+    )
+    args = parser.parse_args()
+
+    images = sorted(args.images.resolve().rglob("image*.png"))[: args.limit]
+    if not images:
+        print(f"Error: No imageN.png pages found in {args.images}")
+        print("Run pdf_workflow.py first to render some pages.")
+        sys.exit(1)
+
+    provider = build_provider(args.provider)
+    assert isinstance(provider, OpenAICompatibleProvider)
+    print(f"\nCalibrating on {len(images)} page(s)\n")
+
+    baseline, _ = run_encoding(provider, CANDIDATES["png"], images)
+    # Sampling noise floor: how much does the baseline differ from itself?
+    repeat, _ = run_encoding(provider, CANDIDATES["png"], images)
+    noise = compare(baseline, repeat)
+
+    report = {"pages": len(images), "noise_floor": noise, "encodings": {}}
+    print(f"{'encoding':<20} {'KiB/page':>9} {'similarity':>11} {'min':>6} {'exact':>6}")
+    print(
+        f"{'(png repeat)':<20} {'':>9} {noise['mean_similarity']:>11.4f} "
+        f"{noise['min_similarity']:>6.3f} {noise['exact_match_rate']:>6.0%}"
+    )
+    for name, encoder in CANDIDATES.items():
+        results, stats = run_encoding(provider, encoder, images)
+        comparison = compare(baseline, results)
+        report["encodings"][name] = {
+            "settings": encoder.describe(),
+            "mean_bytes": stats.mean_bytes,
+            **comparison,
+        }
+        print(
+            f"{name:<20} {stats.mean_bytes / 1024:>9.0f} "
+            f"{comparison['mean_similarity']:>11.4f} {comparison['min_similarity']:>6.3f} "
+            f"{comparison['exact_match_rate']:>6.0%}"
+        )
+
+    acceptable = [
+        (entry["mean_bytes"], name)
+        for name, entry in report["encodings"].items()
+        if entry["failures"] == 0
+        and entry["mean_similarity"] >= min(args.threshold, noise["mean_similarity"])
+    ]
+    if acceptable:
+        _, best = min(acceptable)
+        report["recommended"] = best
+        print(f"\nSmallest payload within threshold: {best}")
+        print(f"  Settings: {CANDIDATES[best].describe()}")
+    else:
+        print("\nNo encoding stayed within the similarity threshold; keep PAYLOAD_FORMAT = 'original'")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
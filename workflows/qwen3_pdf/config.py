@@ -8,12 +8,24 @@ DEFAULT_PROVIDER = "local"  # Options: "local", "alibaba_cloud", "vllm"
 # Local model configuration
 DEFAULT_MODEL = "Qwen/Qwen3-VL-30B-A3B-Instruct"
 USE_MOE = True  # Set to True if using the MoE model variant
+LOCAL_BATCH_SIZE = None  # Pages per generate call; None picks it from free GPU memory
+LOCAL_MAX_BATCH_SIZE = 16  # Upper bound for the automatic batch size
+PROMPT_LAYOUT = "image_first"  # "image_first" or "text_first" (instruction before the page)
+LOCAL_PREFIX_CACHE = False  # Reuse the attention state of the shared prompt prefix across pages
+LOCAL_MAX_NEW_TOKENS = 1024  # Maximum tokens generated per page
+LOCAL_DEVICE = "auto"  # "auto" (GPUs) or "cpu" (float32 + SDPA; for small models like Qwen3-VL-2B)
+LOCAL_QUANTIZATION = None  # "int8": dynamic int8 quantization of the linear layers (cpu only)
+LOCAL_NUM_THREADS = None  # CPU threads used by torch; None keeps torch's default
 
 # Alibaba Cloud configuration
 ALIBABA_MODEL = "qwen3-vl-30b-a3b"  # Options: "qwen3-vl-30b-a3b", "qwen3-vl-235b"
 ALIBABA_REGION = "singapore"  # Options: "singapore", "beijing"
 ALIBABA_MAX_TOKENS = 1024
 ALIBABA_TEMPERATURE = 0.1
+ALIBABA_MAX_IN_FLIGHT = 16  # Upper bound for concurrent API requests (adapted to throttling)
+ALIBABA_RPM = 600  # Requests per minute quota for the model (None for no limit)
+ALIBABA_TPM = 1_000_000  # Tokens per minute quota for the model (None for no limit)
+ALIBABA_MAX_RETRIES = 5  # Retries per page after throttling or transient API errors
 
 # VLLM configuration
 VLLM_MODEL = "Qwen/Qwen3-VL-30B-A3B-Instruct"  # Model name as configured in VLLM server
@@ -21,19 +33,83 @@ VLLM_HOST = "localhost"  # Hostname or IP address
 VLLM_PORT = 8000  # Port number
 VLLM_MAX_TOKENS = 1024
 VLLM_TEMPERATURE = 0.1
+VLLM_MAX_IN_FLIGHT = 32  # Concurrent requests per server; lets VLLM's continuous batching fill up
+VLLM_ENDPOINTS = None  # Replicas as ["host:port", ...]; overrides VLLM_HOST/VLLM_PORT
+VLLM_HEALTH_CHECK_INTERVAL = 10.0  # Seconds between replica health checks
+
+# Warm-model OCR server (ocr_server.py) and the "ocr_server" provider connecting to it
+OCR_SERVER_HOST = "127.0.0.1"  # Interface the server binds / host the workflow connects to
+OCR_SERVER_PORT = 8100
+OCR_SERVER_MAX_BATCH_SIZE = None  # Most requests per batch; None uses the model's batch size
+OCR_SERVER_MAX_WAIT_MS = 20  # How long a batch waits for more requests before it runs
+OCR_SERVER_MAX_IN_FLIGHT = 32  # Concurrent requests the workflow sends to the server
+
+# Image payload settings for API providers (Alibaba Cloud, VLLM)
+# Run calibrate_payload.py to check a lossy setting doesn't change OCR output
+PAYLOAD_FORMAT = "original"  # Options: "original", "png", "jpeg", "webp"
+PAYLOAD_QUALITY = 90  # JPEG/WebP quality (1-100)
+PAYLOAD_GRAYSCALE = False  # Send single-channel images
+PAYLOAD_RESIZE_TO_PATCH_GRID = False  # Snap image sides to the vision patch grid
+PAYLOAD_MAX_PIXELS = 1800 * 1800  # Pixel budget when resizing to the patch grid
 
 # Default paths
 DEFAULT_PDF_FOLDER = Path(__file__).parent / "../../data/pdfs"
 DEFAULT_OUTPUT_FOLDER = Path(__file__).parent / "../../data/output"
 
+# Result cache settings
+CACHE_ENABLED = True  # Reuse OCR results for identical page/prompt/model combinations
+CACHE_PATH = Path(__file__).parent / "../../data/cache/ocr_cache.sqlite"
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # Least recently used results are evicted beyond this
+
 # Image conversion settings
 TARGET_LONGEST_SIDE = 1800  # Target resolution for PDF conversion
+RENDER_WORKERS = None  # Processes used to rasterize pages; None uses all CPU cores
+SNAP_TO_PATCH_GRID = True  # Render page sides as multiples of the vision patch size
+PATCH_FACTOR = 32  # Qwen3-VL: 16px patches merged 2x2 per vision token
+MIN_PIXELS = 64 * 32 * 32  # Smallest pixel budget per page (also passed to the processor)
+MAX_PIXELS = 1800 * 1800  # Largest pixel budget per page (also passed to the processor)
 
-# Default prompt for OCR extraction
-DEFAULT_PROMPT = """There is a table in this image. I've extracted the row headers as a csv:
+# Table cropping: detect ruled tables on the page and send only them (table_detection.py)
+CROP_TABLES = False  # Render just the table regions at TARGET_LONGEST_SIDE; pages without one stay whole
+CROP_DETECTION_LONGEST_SIDE = 1000  # Resolution tables are detected at
+CROP_MARGIN = 12.0  # Points kept around the detected tables
 
-```
-RFID Tag No. / Security Label No.,,
+# Text layer fast path: read born-digital pages with PyMuPDF instead of the model (text_layer.py)
+USE_TEXT_LAYER = False  # Pages with a usable text layer are neither rendered nor inferred
+TEXT_LAYER_MIN_CHARS = 200  # Fewest characters of a usable text layer
+TEXT_LAYER_MAX_IMAGE_COVERAGE = 0.5  # Pages mostly covered by images are scans
+TEXT_LAYER_TABLES = True  # Output the page's tables as CSV blocks (plain text if it has none)
+TEXT_LAYER_ROW_HEADER_COLUMNS = None  # Leading table columns dropped (the model answers data columns only); None: those of TABLE_ROW_HEADERS
+
+# Page filter: skip inference for blank and near-duplicate pages (page_filter.py)
+SKIP_BLANK_PAGES = False  # Leave the text of pages with (almost) no ink empty
+SKIP_DUPLICATE_PAGES = False  # Reuse results of look-alike pages; only if they really share content
+BLANK_MAX_INK_RATIO = 0.002  # Pages with at most this share of dark pixels are blank
+DUPLICATE_HASH_SIZE = 16  # Perceptual hash (dHash) of hash_size**2 bits
+DUPLICATE_MAX_DISTANCE = 4  # Largest Hamming distance between near-duplicate pages
+DUPLICATE_MAX_UNMATCHED_INK = 0  # Ink pixels per 16x16 tile a near-duplicate may add or lack
+PAGE_FILTER_REPORT = "page_filter_report.json"  # Skip report, written to the output folder
+
+# Full-text search index (search_index.py), kept in the output folder
+SEARCH_INDEX = True  # Index every page's text as it is written
+
+# Streaming and early stopping
+STREAM_RESPONSES = False  # API providers: stream completions and record time-to-first-token
+STOP_AT_CLOSING_FENCE = False  # Opt-in: stop once the first ``` code block is closed (drops later blocks)
+STOP_AFTER_CSV_ROWS = None  # Stop once this many CSV rows were emitted (None: disabled)
+
+# Tracing and metrics
+TRACE_PATH = None  # JSONL file every stage span is appended to (None: disabled)
+METRICS_PATH = None  # Prometheus text file written at the end of a run (None: disabled)
+METRICS_PORT = None  # Serve Prometheus metrics at http://host:port/metrics during a run
+PROFILE_PATH = None  # cProfile stats of the inference loop (None: disabled)
+
+# Pipeline settings
+PIPELINE_QUEUE_SIZE = 8  # Max pages buffered between render, save and inference
+SAVE_IMAGES = True  # Also write rendered pages as imageN.png (needed by viewer.py)
+
+# Row headers of the table to extract (CSV: header, sub-header, unit)
+TABLE_ROW_HEADERS = """RFID Tag No. / Security Label No.,,
 Identification no. of cube,Cube Mark,
 ,Lab Ref. No.,
 Mould no.,,
@@ -50,6 +126,28 @@ Density***,by calculation,kg/m3
 Maximum load at failure kN,,
 Compressive strength**** MPa,,
 Type of fracture*****,,
+"""
+
+# Structured output: constrain decoding to the known rows
+STRUCTURED_OUTPUT = None  # None (free-form), "json" (row header -> values) or "csv" (one line per row)
+STRUCTURED_MAX_COLUMNS = 12  # Most data columns per row
+STRUCTURED_MAX_CELL_LENGTH = 40  # Most characters per value
+
+# Two-stage table pipeline (table_pipeline.py)
+TABLE_PREDEFINED_ROWS = False  # Use TABLE_ROW_HEADERS instead of asking for the row headers
+TABLE_COLUMNS = None  # Predefined data column names, e.g. ["Cube 1", "Cube 2"]; None asks the model
+TABLE_COLUMN_VALIDATORS = None  # Column name -> regex every non-empty value must match
+TABLE_HEADER_DELIMITER = " | "  # Joins the levels of multi-level row headers
+TABLE_ROW_CONCURRENCY = 8  # Row requests handed to the provider at once
+TABLE_RETRY_STRATEGIES = ("higher_dpi", "fallback_model")  # Retries of failing rows, in order
+TABLE_RETRY_LONGEST_SIDE = 3200  # Page resolution for "higher_dpi" retries
+TABLE_FALLBACK_PROVIDER = None  # Provider for "fallback_model" retries, e.g. "alibaba_cloud"
+TABLE_FALLBACK_MODEL = None  # Model of the fallback provider, e.g. "qwen3-vl-235b"
+
+# Default prompt for OCR extraction
+DEFAULT_PROMPT = f"""There is a table in this image. I've extracted the row headers as a csv:
+
 ```
+{TABLE_ROW_HEADERS}```
 
 Can you help me extract the data columns? You don't have to repeat the row headers again, just extract the data columns. You can ignore the rest of the document as well. Thanks!"""
@@ -1,50 +1,266 @@
 import fitz  # PyMuPDF
-from typing import List
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
 from PIL import Image
 from pathlib import Path
 
+from providers.resolution import ResolutionPlanner
 
-def pdf_to_images(
-    pdf_path: str | Path, dpi: int = 300, first_page: int = 1, last_page: int = 1
-) -> List[Image.Image]:
+
+@dataclass(frozen=True)
+class PagePlan:
+    """Render parameters for a single PDF page."""
+
+    page_index: int  # 0-based
+    width: float  # points (1/72 inch)
+    height: float  # points (1/72 inch)
+    dpi: int  # nominal resolution (along the longest side)
+    pixel_size: Optional[tuple[int, int]] = None  # exact output size, if planned
+    clip: Optional[tuple[float, float, float, float]] = None  # rendered area (x0, y0, x1, y1) in points
+
+    @property
+    def area(self) -> tuple[float, float]:
+        """Width and height in points of the rendered area (the clip, or the whole page)."""
+        if self.clip is None:
+            return self.width, self.height
+        x0, y0, x1, y1 = self.clip
+        return x1 - x0, y1 - y0
+
+
+# Adjusts a page's plan in the render process before it is rendered (e.g. to
+# clip it to a detected region); must be picklable to reach the render pool
+PlanRefiner = Callable[[fitz.Page, PagePlan], PagePlan]
+
+
+@dataclass
+class RenderedPage:
+    """A rasterized PDF page."""
+
+    page_index: int  # 0-based
+    dpi: int
+    image: Image.Image
+    clip: Optional[tuple[float, float, float, float]] = None  # area rendered, in points
+
+
+def _page_range(page_count: int, first_page: int, last_page: Optional[int]) -> range:
+    """Convert a 1-based inclusive page range to 0-based page indices."""
+    end_page = page_count if last_page is None else min(last_page, page_count)
+    return range(first_page - 1, end_page)
+
+
+def plan_pages(
+    pdf_path: str | Path,
+    dpi: Optional[int] = None,
+    target_longest_side: Optional[int] = None,
+    planner: Optional[ResolutionPlanner] = None,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+) -> List[PagePlan]:
     """
-    Convert PDF pages to PIL Images.
+    Compute render parameters for a range of pages, reading the PDF once.
+
+    Exactly one of ``dpi``, ``target_longest_side`` (in pixels) or ``planner``
+    must be given. With ``target_longest_side`` the DPI is computed per page,
+    so documents that mix page sizes or orientations are all rendered at the
+    same pixel scale. A ``planner`` additionally fixes the exact pixel size of
+    each page (e.g. snapped to the model's vision patch grid).
 
     Args:
         pdf_path: Path to the PDF file
-        dpi: Resolution for conversion (default: 300)
-        first_page: First page to convert (1-based)
-        last_page: Last page to convert (1-based)
+        dpi: Fixed resolution for every page
+        target_longest_side: Desired length of each page's longest side in pixels
+        planner: Resolution planner choosing each page's pixel size
+        first_page: First page to plan (1-based)
+        last_page: Last page to plan (1-based, inclusive). None means the last page
 
     Returns:
-        List of PIL Images
+        One PagePlan per page in the range
     """
+    if sum(option is not None for option in (dpi, target_longest_side, planner)) != 1:
+        raise ValueError("Specify exactly one of dpi, target_longest_side or planner")
 
-    if isinstance(pdf_path, Path):
-        pdf_path = str(pdf_path)
+    with fitz.open(str(pdf_path)) as doc:
+        plans = []
+        for page_num in _page_range(len(doc), first_page, last_page):
+            rect = doc[page_num].rect
+            longest_side = max(rect.width, rect.height)
+            pixel_size = None
+            if planner is not None:
+                pixel_size = planner.plan(rect.width, rect.height)
+                page_dpi = round(max(pixel_size) / longest_side * 72)
+            elif target_longest_side is not None:
+                # Define DPI such that longest side matches target resolution
+                page_dpi = int(target_longest_side / longest_side * 72)
+            else:
+                page_dpi = dpi
+            plans.append(PagePlan(page_num, rect.width, rect.height, page_dpi, pixel_size))
+    return plans
 
-    # Open the PDF
-    doc = fitz.open(pdf_path)
-    images = []
 
+# Documents opened by the current process, so a render worker opens each PDF
+# only once no matter how many of its pages it renders
+_open_doc: Optional[tuple[str, fitz.Document]] = None
+
+
+def _render_page(
+    pdf_path: str, plan: PagePlan, refine: Optional[PlanRefiner] = None
+) -> tuple[PagePlan, int, int, bytes]:
+    """Rasterize one page, reusing this process's open document if possible.
+
+    Returns:
+        (final plan, width, height, RGB samples) - raw bytes are cheap to pass
+        between processes
+    """
+    global _open_doc
+    if _open_doc is None or _open_doc[0] != pdf_path:
+        if _open_doc is not None:
+            _open_doc[1].close()
+        _open_doc = (pdf_path, fitz.open(pdf_path))
+    doc = _open_doc[1]
+
+    page = doc[plan.page_index]
+    if refine is not None:
+        plan = refine(page, plan)
+    clip = fitz.Rect(plan.clip) if plan.clip is not None else None
+    pix = page.get_pixmap(matrix=fitz.Matrix(*_zoom(plan)), clip=clip)
+    return plan, pix.width, pix.height, pix.samples
+
+
+def _zoom(plan: PagePlan) -> tuple[float, float]:
+    """Horizontal and vertical zoom factors for a page plan."""
+    if plan.pixel_size is not None:
+        width, height = plan.area
+        return plan.pixel_size[0] / width, plan.pixel_size[1] / height
     # Convert DPI to zoom factor (PyMuPDF uses 72 DPI as base)
-    zoom = dpi / 72
-    mat = fitz.Matrix(zoom, zoom)
+    zoom = plan.dpi / 72
+    return zoom, zoom
 
-    # Adjust page numbers (PyMuPDF uses 0-based indexing)
-    start_page = first_page - 1
-    end_page = last_page  # last_page is inclusive in our API, so we don't subtract 1
 
-    for page_num in range(start_page, min(end_page, len(doc))):
-        page = doc[page_num]
-        pix = page.get_pixmap(matrix=mat)
+class PageRenderer:
+    """Rasterizes PDF pages, spreading the work across a process pool.
 
-        # Convert pixmap to PIL Image
-        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-        images.append(img)
+    Rendering at high resolution is CPU-bound, so pages are rendered by
+    ``workers`` processes and yielded back in page order. At most
+    ``2 * workers`` pages are in flight, which keeps memory bounded when the
+    consumer is slower than the renderers.
 
-    doc.close()
-    return images
+    Example:
+        with PageRenderer() as renderer:
+            plans = plan_pages(pdf_path, target_longest_side=1800)
+            for page in renderer.render(pdf_path, plans):
+                page.image.save(f"image{page.page_index}.png")
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Number of render processes. None uses all CPU cores;
+                1 renders in the calling process without a pool
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1:
+            # "spawn" avoids forking a process that is running pipeline threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def render(
+        self,
+        pdf_path: str | Path,
+        plans: Iterable[PagePlan],
+        refine: Optional[PlanRefiner] = None,
+    ) -> Iterator[RenderedPage]:
+        """
+        Rasterize the planned pages of a PDF.
+
+        Args:
+            pdf_path: Path to the PDF file
+            plans: Pages to render (see ``plan_pages``)
+            refine: Adjusts each plan in the render process right before the
+                page is rendered (e.g. ``TableCropper``)
+
+        Yields:
+            RenderedPage objects in the order of ``plans``
+        """
+        pdf_path = str(pdf_path)
+
+        def to_page(result: tuple[PagePlan, int, int, bytes]) -> RenderedPage:
+            plan, width, height, samples = result
+            # Convert pixmap to PIL Image
+            image = Image.frombytes("RGB", (width, height), samples)
+            if plan.pixel_size is not None and image.size != plan.pixel_size:
+                # PyMuPDF can round the pixmap size by a pixel
+                image = image.resize(plan.pixel_size, Image.Resampling.BILINEAR)
+            return RenderedPage(plan.page_index, plan.dpi, image, plan.clip)
+
+        if self._pool is None:
+            for plan in plans:
+                yield to_page(_render_page(pdf_path, plan, refine))
+            return
+
+        pending: deque[Future] = deque()
+        try:
+            for plan in plans:
+                pending.append(self._pool.submit(_render_page, pdf_path, plan, refine))
+                if len(pending) >= 2 * self.workers:
+                    yield to_page(pending.popleft().result())
+            while pending:
+                yield to_page(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "PageRenderer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def pdf_to_images(
+    pdf_path: str | Path,
+    dpi: int = 300,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+) -> List[Image.Image]:
+    """
+    Convert PDF pages to PIL Images.
+
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Resolution for conversion (default: 300)
+        first_page: First page to convert (1-based)
+        last_page: Last page to convert (1-based, inclusive). None converts to the end
+
+    Returns:
+        List of PIL Images
+    """
+    plans = plan_pages(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    renderer = PageRenderer(workers=1)
+    return [page.image for page in renderer.render(pdf_path, plans)]
+
+
+def save_image(output_folder: str | Path, image: Image.Image, index: int) -> Path:
+    """
+    Save a single page image to a target folder as image{index}.png.
+    """
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    output_path = output_folder / f"image{index}.png"
+    image.save(output_path)
+    return output_path
 
 
 def save_images(
@@ -54,13 +270,7 @@ def save_images(
     """
     Given a set of images, saves them to a target folder. Images will be named image0.png, image1.png, etc.
     """
-    output_folder = Path(output_folder)
-    output_folder.mkdir(parents=True, exist_ok=True)
-    output_paths = []
-    for i, img in enumerate(images):
-        img.save(output_folder / f"image{i}.png")
-        output_paths.append(output_folder / f"image{i}.png")
-    return output_paths
+    return [save_image(output_folder, img, i) for i, img in enumerate(images)]
 
 
 def get_pdf_page_size(pdf_path: str | Path, page_num: int = 0) -> tuple[float, float]:
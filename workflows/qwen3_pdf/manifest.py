@@ -0,0 +1,316 @@
+"""Job manifest for resumable, incremental workflow runs.
+
+The manifest is a small SQLite database stored in the output folder. It records
+a fingerprint of every PDF, the render parameters of every page and the status
+of every inference, so that a restarted run only redoes the work that is
+missing or out of date.
+
+Every finished page also records its route: inferred by the model, read from
+the PDF's text layer, left empty as blank, or copied from the page it
+duplicates. A page only counts as done if its route is enabled in the new run
+with the same settings, so e.g. turning off the text layer re-infers the
+pages that were read from it.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+MANIFEST_FILENAME = "manifest.sqlite"
+
+STATUS_RENDERED = "rendered"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# How a finished page got its text
+ROUTE_MODEL = "model"
+ROUTE_TEXT_LAYER = "text_layer"
+ROUTE_BLANK = "blank"
+ROUTE_DUPLICATE = "duplicate"
+
+
+def _hash_json(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_key(**params: Any) -> str:
+    """Fingerprint the parameters a page was rendered with (e.g. DPI)."""
+    return _hash_json(params)
+
+
+def inference_key(prompt: str, provider_identity: dict) -> str:
+    """Fingerprint the prompt and provider settings a page was inferred with."""
+    return _hash_json({"prompt": prompt, "provider": provider_identity})
+
+
+def route_key(route: str, **settings: Any) -> str:
+    """Fingerprint the settings a page was filled in with on a route other than the model."""
+    return _hash_json({"route": route, **settings})
+
+
+def file_sha256(path: Path) -> str:
+    """Compute the SHA-256 digest of a file in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobManifest:
+    """Tracks per-PDF fingerprints and per-page render/inference status."""
+
+    def __init__(self, output_folder: Path):
+        """Open (or create) the manifest in the output folder.
+
+        Args:
+            output_folder: Workflow output folder the manifest belongs to
+        """
+        self.path = Path(output_folder) / MANIFEST_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written from both the render/save threads and the inference loop
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pdfs (
+                pdf TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                pdf TEXT NOT NULL,
+                page_index INTEGER NOT NULL,
+                render_key TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                infer_key TEXT,
+                error TEXT,
+                updated REAL NOT NULL,
+                route TEXT,
+                duplicate_of TEXT,
+                PRIMARY KEY (pdf, page_index)
+            );
+            """
+        )
+        # Manifests written before routes were recorded; their pages have no
+        # route and are redone once
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for column in ("route", "duplicate_of"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def reset(self) -> None:
+        """Forget all recorded work."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM pdfs")
+            self._conn.commit()
+
+    def sync_pdf(self, pdf: str, pdf_path: Path) -> bool:
+        """Compare a PDF against its recorded fingerprint and update it.
+
+        The file is only hashed when its size or mtime changed. If the content
+        changed, all page records for the PDF are discarded.
+
+        Args:
+            pdf: Key for the PDF (its path relative to the input folder)
+            pdf_path: Path to the PDF file
+
+        Returns:
+            True if the PDF is new or its content changed
+        """
+        stat = pdf_path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, mtime, size FROM pdfs WHERE pdf = ?", (pdf,)
+            ).fetchone()
+        if row is not None and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return False
+
+        sha256 = file_sha256(pdf_path)
+        changed = row is None or row[0] != sha256
+        with self._lock:
+            if changed:
+                self._conn.execute("DELETE FROM pages WHERE pdf = ?", (pdf,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs (pdf, sha256, mtime, size) VALUES (?, ?, ?, ?)",
+                (pdf, sha256, stat.st_mtime, stat.st_size),
+            )
+            self._conn.commit()
+        return changed
+
+    def rendered_pages(self, pdf: str, render_keys: dict[int, str]) -> set[int]:
+        """Pages whose image is on disk and was rendered with the same parameters.
+
+        Args:
+            pdf: Key for the PDF
+            render_keys: Expected render fingerprint for each page index
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_index, render_key, image_path FROM pages WHERE pdf = ?",
+                (pdf,),
+            ).fetchall()
+        return {
+            page_index
+            for page_index, page_render_key, image_path in rows
+            if render_keys.get(page_index) == page_render_key and Path(image_path).exists()
+        }
+
+    def completed_pages(
+        self, pdf: str, render_keys: dict[int, str], route_keys: dict[str, str]
+    ) -> set[int]:
+        """Pages whose text output is on disk and up to date.
+
+        Args:
+            pdf: Key for the PDF
+            render_keys: Expected render fingerprint for each page index
+            route_keys: Expected fingerprint of every route enabled in this
+                run (``ROUTE_MODEL`` -> inference key, ...); pages finished
+                on any other route are not complete
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_index, render_key, image_path, route, infer_key FROM pages"
+                " WHERE pdf = ? AND status = ?",
+                (pdf, STATUS_DONE),
+            ).fetchall()
+        return {
+            page_index
+            for page_index, page_render_key, image_path, route, page_infer_key in rows
+            if route in route_keys
+            and route_keys[route] == page_infer_key
+            and render_keys.get(page_index) == page_render_key
+            and Path(image_path).with_suffix(".txt").exists()
+        }
+
+    def mark_rendered(
+        self, pdf: str, page_index: int, page_render_key: str, image_path: Path
+    ) -> None:
+        """Record that a page image has been rendered and saved.
+
+        Images are saved in the background, so this may arrive after the page
+        was already marked done; an existing status for the same render
+        parameters is kept.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages"
+                " (pdf, page_index, render_key, image_path, status, infer_key, error, updated)"
+                " VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)"
+                " ON CONFLICT (pdf, page_index) DO UPDATE SET"
+                "  status = CASE WHEN render_key = excluded.render_key"
+                "   THEN status ELSE excluded.status END,"
+                "  infer_key = CASE WHEN render_key = excluded.render_key"
+                "   THEN infer_key ELSE NULL END,"
+                "  render_key = excluded.render_key,"
+                "  image_path = excluded.image_path,"
+                "  updated = excluded.updated",
+                (pdf, page_index, page_render_key, str(image_path), STATUS_RENDERED, time.time()),
+            )
+            self._conn.commit()
+
+    def mark_done(
+        self,
+        pdf: str,
+        page_index: int,
+        page_render_key: str,
+        image_path: Path,
+        page_infer_key: str,
+        route: str = ROUTE_MODEL,
+        duplicate_of: str | None = None,
+    ) -> None:
+        """Record that a page's text output has been written.
+
+        Args:
+            pdf: Key for the PDF
+            page_index: Page within the PDF
+            page_render_key: Render fingerprint of the page
+            image_path: Where the page image is (or would be) saved
+            page_infer_key: Fingerprint of the route's settings (the
+                inference key for ``ROUTE_MODEL``, see ``route_key``)
+            route: How the text was produced (``ROUTE_*``)
+            duplicate_of: For ``ROUTE_DUPLICATE``, the page the text was
+                copied from (``"pdf#page"``)
+        """
+        self._set_status(
+            pdf,
+            page_index,
+            page_render_key,
+            image_path,
+            STATUS_DONE,
+            page_infer_key,
+            None,
+            route,
+            duplicate_of,
+        )
+
+    def mark_failed(
+        self,
+        pdf: str,
+        page_index: int,
+        page_render_key: str,
+        image_path: Path,
+        error: str,
+    ) -> None:
+        """Record that inference failed for a page."""
+        self._set_status(
+            pdf, page_index, page_render_key, image_path, STATUS_FAILED, None, error
+        )
+
+    def _set_status(
+        self,
+        pdf: str,
+        page_index: int,
+        page_render_key: str,
+        image_path: Path,
+        status: str,
+        page_infer_key: str | None,
+        error: str | None,
+        route: str | None = None,
+        duplicate_of: str | None = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (pdf, page_index, render_key, image_path, status, infer_key, error, updated,"
+                "  route, duplicate_of)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pdf,
+                    page_index,
+                    page_render_key,
+                    str(image_path),
+                    status,
+                    page_infer_key,
+                    error,
+                    time.time(),
+                    route,
+                    duplicate_of,
+                ),
+            )
+            self._conn.commit()
+
+    def summary(self) -> dict[str, int]:
+        """Count pages by status (finished pages by route, e.g. ``done:text_layer``)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN status = ? AND route IS NOT NULL"
+                "  THEN status || ':' || route ELSE status END AS key, COUNT(*)"
+                " FROM pages GROUP BY key",
+                (STATUS_DONE,),
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
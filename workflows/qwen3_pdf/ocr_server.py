@@ -0,0 +1,433 @@
+"""
+Persistent OCR server keeping a local model warm.
+
+Loading a Qwen3-VL checkpoint takes minutes, so running ``pdf_workflow.py``
+with the local provider pays that cost on every invocation. This server loads
+the ``LocalProvider`` once and serves it over an OpenAI-compatible chat
+completions API, so the workflow, the experiments and ad-hoc scripts connect
+with an ``OpenAICompatibleProvider`` and get their first page back without a
+model load.
+
+Concurrent requests are queued and handed to the model in batches
+(``RequestBatcher``): the batcher takes the first waiting request, collects
+whatever else arrives within ``max_wait`` seconds up to the provider's batch
+size, and runs them through one ``process_many`` call. Generation settings
+(max tokens, early stopping, structured output) are the server's, taken from
+config.py. A request whose ``max_tokens`` differs from the server's is
+rejected rather than silently answered with another length limit; ``stop``
+sequences are applied to the finished answer, and sampling is the model's
+(``temperature`` is ignored). Streamed requests get the finished answer as a
+single chunk.
+
+Start it from the workflow folder:
+
+    python ocr_server.py --port 8100
+
+and point the workflow at it with ``--provider ocr_server``.
+"""
+
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import argparse
+import base64
+import json
+import queue
+import threading
+import time
+import uuid
+
+from config import (
+    DEFAULT_MODEL,
+    OCR_SERVER_HOST,
+    OCR_SERVER_MAX_BATCH_SIZE,
+    OCR_SERVER_MAX_WAIT_MS,
+    OCR_SERVER_PORT,
+)
+from providers import BaseProvider
+from providers.tracing import get_tracer
+
+
+@dataclass
+class _Request:
+    """A queued page and the future its answer is delivered to."""
+
+    image: bytes
+    prompt: str
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class RequestBatcher:
+    """Collects concurrent requests into batches for a single provider.
+
+    The provider is only ever called from the batcher's worker thread, so it
+    doesn't need to be thread-safe.
+
+    Example:
+        batcher = RequestBatcher(provider, max_wait=0.02)
+        text = batcher.submit(png_bytes, prompt).result()
+    """
+
+    def __init__(
+        self,
+        provider: BaseProvider,
+        max_batch_size: Optional[int] = None,
+        max_wait: float = 0.02,
+    ):
+        """
+        Args:
+            provider: Provider that runs the batches
+            max_batch_size: Most requests per batch (default: the provider's
+                ``batch_size``)
+            max_wait: Seconds to wait for more requests after the first one
+                of a batch arrived
+        """
+        self.provider = provider
+        self.max_batch_size = max_batch_size or provider.batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self._queue: queue.Queue[Optional[_Request]] = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, image: bytes, prompt: str) -> Future:
+        """Queue a page; the future resolves to its text or raises its error."""
+        request = _Request(image, prompt)
+        self._queue.put(request)
+        return request.future
+
+    def stats(self) -> dict:
+        """Requests and batches run so far."""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """Finish the queued requests and stop the worker."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _next_batch(self) -> Optional[list[_Request]]:
+        """Block for a request, then gather more until the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                break
+            if request is None:
+                # Run what we have, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        tracer = get_tracer()
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            for request in batch:
+                tracer.record("queue_wait", started - request.queued_at)
+            try:
+                with tracer.span("server_batch", items=len(batch)):
+                    results = self.provider.process_many(
+                        [request.image for request in batch],
+                        [request.prompt for request in batch],
+                    )
+            except Exception as e:
+                results = [e] * len(batch)
+            self.requests += len(batch)
+            self.batches += 1
+            for request, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+
+
+def check_generation_settings(request: dict, max_tokens: Optional[int]) -> None:
+    """Reject requests asking for a length limit the server doesn't apply.
+
+    Args:
+        request: The chat completions request
+        max_tokens: The server's length limit (None: unknown, not checked)
+
+    Raises:
+        ValueError: If the request's ``max_tokens`` (or ``max_completion_tokens``)
+            differs from the server's
+    """
+    requested = request.get("max_completion_tokens", request.get("max_tokens"))
+    if requested is not None and max_tokens is not None and requested != max_tokens:
+        raise ValueError(
+            f"max_tokens must be {max_tokens} (the server's limit) or omitted, got {requested}"
+        )
+
+
+def apply_stop(text: str, stop: None | str | list[str]) -> str:
+    """Cut the answer before the first of the request's stop sequences."""
+    sequences = [stop] if isinstance(stop, str) else stop or []
+    ends = [text.find(sequence) for sequence in sequences if sequence]
+    ends = [end for end in ends if end != -1]
+    return text[: min(ends)] if ends else text
+
+
+def parse_chat_request(request: dict) -> tuple[bytes, str]:
+    """Extract the page image and prompt from a chat completions request.
+
+    Returns:
+        Tuple of (encoded image bytes, prompt text)
+
+    Raises:
+        ValueError: If the request doesn't hold exactly one base64 data URL image
+    """
+    images, texts = [], []
+    for message in request.get("messages", []):
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            if part.get("type") == "image_url":
+                url = part["image_url"]["url"]
+                if not url.startswith("data:") or "base64," not in url:
+                    raise ValueError("Only base64 data URL images are supported")
+                images.append(base64.b64decode(url.partition("base64,")[2]))
+            elif part.get("text"):
+                texts.append(part["text"])
+    if len(images) != 1:
+        raise ValueError(f"Expected exactly one image per request, got {len(images)}")
+    return images[0], "\n".join(texts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "OCRServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence access logs
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": {"message": message}})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    **self.server.batcher.stats(),
+                    "generation": self.server.generation,
+                },
+            )
+        elif path == "/v1/models":
+            model = {"id": self.server.model_name, "object": "model", "owned_by": "local"}
+            self._send_json(200, {"object": "list", "data": [model]})
+        else:
+            self._send_error(404, "not found")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_error(404, "not found")
+            return
+        try:
+            request = json.loads(body)
+            check_generation_settings(request, self.server.max_tokens)
+            image, prompt = parse_chat_request(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_error(400, str(e))
+            return
+
+        try:
+            text = self.server.batcher.submit(image, prompt).result()
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}")
+            return
+        text = apply_stop(text, request.get("stop"))
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if request.get("stream"):
+            self._stream(completion_id, text)
+            return
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": self.server.model_name,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": text},
+                    }
+                ],
+            },
+        )
+
+    def _stream(self, completion_id: str, text: str) -> None:
+        """Send the finished answer as a single server-sent event chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": self.server.model_name,
+            "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": "stop"}],
+        }
+        try:
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped the stream early
+
+
+class OCRServer(ThreadingHTTPServer):
+    """OpenAI-compatible HTTP server in front of a loaded provider.
+
+    Example:
+        with OCRServer(LocalProvider("Qwen/Qwen3-VL-2B-Instruct"), port=8100) as server:
+            client = OpenAICompatibleProvider(server.base_url, "dummy", server.model_name)
+    """
+
+    daemon_threads = True
+    # Accept bursts of concurrent connections from the async clients
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        provider: BaseProvider,
+        model_name: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_batch_size: Optional[int] = None,
+        max_wait: float = 0.02,
+    ):
+        """
+        Args:
+            provider: Loaded provider that answers the requests
+            model_name: Model name reported to clients (default: the
+                provider's ``model_name``)
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            max_batch_size: Most requests per batch (default: the provider's
+                ``batch_size``)
+            max_wait: Seconds to wait for more requests before running a batch
+        """
+        super().__init__((host, port), _Handler)
+        self.model_name = model_name or getattr(provider, "model_name", "local")
+        # Settings the answers are generated with, whatever the requests ask for
+        self.generation = provider.cache_identity()
+        self.max_tokens: Optional[int] = self.generation.get("max_tokens")
+        self.batcher = RequestBatcher(provider, max_batch_size=max_batch_size, max_wait=max_wait)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.port}/v1"
+
+    def start(self) -> "OCRServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        self.batcher.close()
+
+    def __enter__(self) -> "OCRServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a warm local Qwen3-VL model over an OpenAI-compatible API"
+    )
+    parser.add_argument(
+        "--model",
+        default=DEFAULT_MODEL,
+        help=f"Model to load (default: {DEFAULT_MODEL})",
+    )
+    parser.add_argument(
+        "--host",
+        default=OCR_SERVER_HOST,
+        help=f"Interface to bind (default: {OCR_SERVER_HOST})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=OCR_SERVER_PORT,
+        help=f"Port to bind (default: {OCR_SERVER_PORT})",
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=OCR_SERVER_MAX_BATCH_SIZE,
+        help="Most requests per batch (default: the provider's batch size)",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=OCR_SERVER_MAX_WAIT_MS,
+        help=f"Milliseconds to wait for more requests before running a batch "
+        f"(default: {OCR_SERVER_MAX_WAIT_MS})",
+    )
+    args = parser.parse_args()
+
+    # Imported here so the module can be used with other providers without
+    # pulling in the workflow
+    from pdf_workflow import build_provider
+
+    provider = build_provider("local", model_name=args.model)
+    server = OCRServer(
+        provider,
+        model_name=args.model,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+    )
+    print(f"OCR server listening on {server.base_url} (model: {server.model_name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
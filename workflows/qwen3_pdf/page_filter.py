@@ -0,0 +1,244 @@
+"""Blank and near-duplicate page filter run before inference.
+
+Scanned batches contain blank separator pages and near-identical pages (cover
+sheets, re-scans) that each cost a full inference. ``PageFilter`` inspects
+every rendered page:
+
+- Blank: almost no pixels darker than the ink threshold. The page's text
+  output is left empty without calling the model.
+- Near-duplicate: the page's difference hash (dHash) is within
+  ``max_distance`` bits of a page seen earlier in the run, and the two pages'
+  full-resolution ink masks match. The earlier page's result is reused.
+
+Hashes are indexed by bands (any two hashes within ``max_distance`` bits agree
+exactly on at least one of ``max_distance + 1`` bands), so a lookup only
+compares against candidates sharing a band rather than every page seen. A hash
+only sees the layout, so copies of one form template filled in with different
+values hash alike; the ink comparison is what tells them apart. It tolerates
+anti-aliasing and one-pixel shifts, not the noise of a second scan, so a
+re-scanned sheet is inferred again rather than risk reusing the wrong values.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+import threading
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from providers.base import ImageInput, load_image
+
+# Side of the grayscale thumbnail the blank check runs on
+_THUMBNAIL_SIDE = 512
+# Side of the square tiles unmatched ink is counted in
+_INK_TILE = 16
+
+
+def ink_ratio(gray: np.ndarray, ink_threshold: int = 160) -> float:
+    """Share of pixels darker than ``ink_threshold`` in a grayscale image."""
+    return float(np.count_nonzero(gray < ink_threshold)) / gray.size
+
+
+def dhash(image: Image.Image, hash_size: int = 16) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a thumbnail.
+
+    Args:
+        image: Page image
+        hash_size: Thumbnail height; the hash has ``hash_size ** 2`` bits
+
+    Returns:
+        The hash as an integer
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    """Grow a boolean mask by one pixel in every direction (3x3 neighbourhood)."""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    result = grown.copy()
+    result[:, 1:] |= grown[:, :-1]
+    result[:, :-1] |= grown[:, 1:]
+    return result
+
+
+def unmatched_ink(a: np.ndarray, b: np.ndarray, tile: int = _INK_TILE) -> int:
+    """Most ink pixels in any tile that have no ink within one pixel on the other page.
+
+    Counting per tile keeps a changed digit from being averaged away over the
+    whole page.
+
+    Args:
+        a: Ink mask of one page
+        b: Ink mask of the other page, of the same shape
+        tile: Side of the square tiles
+
+    Returns:
+        The largest count of unmatched ink pixels (of both pages) in a tile
+    """
+    unmatched = (a & ~_dilate(b)) | (b & ~_dilate(a))
+    height, width = unmatched.shape
+    padded = np.zeros((-(-height // tile) * tile, -(-width // tile) * tile), dtype=bool)
+    padded[:height, :width] = unmatched
+    counts = padded.reshape(padded.shape[0] // tile, tile, padded.shape[1] // tile, tile)
+    return int(counts.sum(axis=(1, 3)).max())
+
+
+@dataclass(frozen=True)
+class FilterDecision:
+    """Why a page can skip inference."""
+
+    reason: str  # "blank" or "duplicate"
+    ink_ratio: float
+    duplicate_of: Any = None  # Key of the page whose result is reused
+    distance: Optional[int] = None  # Hamming distance to that page
+    unmatched_ink: Optional[int] = None  # See ``unmatched_ink``, against that page
+
+
+class PageFilter:
+    """Detects blank pages and near-duplicates of pages seen earlier in a run.
+
+    Example:
+        page_filter = PageFilter(max_distance=4)
+        decision = page_filter.check(("a.pdf", 3), image)
+        if decision is None:
+            ...  # run inference
+    """
+
+    def __init__(
+        self,
+        skip_blank: bool = True,
+        skip_duplicates: bool = True,
+        blank_max_ink_ratio: float = 0.002,
+        ink_threshold: int = 160,
+        hash_size: int = 16,
+        max_distance: int = 4,
+        max_unmatched_ink: int = 0,
+    ):
+        """
+        Args:
+            skip_blank: Whether to report blank pages
+            skip_duplicates: Whether to report near-duplicate pages
+            blank_max_ink_ratio: Pages with at most this share of ink pixels
+                are blank
+            ink_threshold: Grayscale level below which a pixel counts as ink
+            hash_size: dHash thumbnail height (``hash_size ** 2`` bits)
+            max_distance: Largest Hamming distance between near-duplicates
+            max_unmatched_ink: Most unmatched ink pixels per tile (see
+                ``unmatched_ink``) between near-duplicates
+        """
+        self.skip_blank = skip_blank
+        self.skip_duplicates = skip_duplicates
+        self.blank_max_ink_ratio = blank_max_ink_ratio
+        self.ink_threshold = ink_threshold
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.max_unmatched_ink = max_unmatched_ink
+        # Split the hash into max_distance + 1 bands (pigeonhole principle)
+        bits = hash_size * hash_size
+        self._bands = min(max_distance + 1, bits)
+        self._band_bits = -(-bits // self._bands)
+        # Band value -> originals: (hash, key, compressed packed ink mask, mask shape)
+        self._index: list[dict[int, list[tuple[int, Any, bytes, tuple]]]] = [
+            {} for _ in range(self._bands)
+        ]
+        self._lock = threading.Lock()
+
+    def describe(self, reason: Optional[str] = None) -> dict:
+        """Settings of the filter (recorded in the skip report).
+
+        Args:
+            reason: Only the settings that decide ``"blank"`` or
+                ``"duplicate"`` skips (used in manifest keys)
+        """
+        blank = {
+            "blank_max_ink_ratio": self.blank_max_ink_ratio,
+            "ink_threshold": self.ink_threshold,
+        }
+        duplicate = {
+            "hash_size": self.hash_size,
+            "max_distance": self.max_distance,
+            "ink_threshold": self.ink_threshold,
+            "max_unmatched_ink": self.max_unmatched_ink,
+        }
+        if reason == "blank":
+            return blank
+        if reason == "duplicate":
+            return duplicate
+        return {
+            "skip_blank": self.skip_blank,
+            "skip_duplicates": self.skip_duplicates,
+            **blank,
+            **duplicate,
+        }
+
+    def _band_values(self, value: int) -> list[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(value >> (band * self._band_bits)) & mask for band in range(self._bands)]
+
+    def check(self, key: Any, image: ImageInput) -> Optional[FilterDecision]:
+        """Check a page, remembering it as an original if it needs inference.
+
+        Args:
+            key: Identifies the page (reported as ``duplicate_of`` for later pages)
+            image: The rendered page
+
+        Returns:
+            Why the page can skip inference, or None if it needs inference
+        """
+        pil_image = load_image(image)
+        gray = pil_image.convert("L")
+        thumbnail = gray.copy()
+        thumbnail.thumbnail((_THUMBNAIL_SIDE, _THUMBNAIL_SIDE))
+        ratio = ink_ratio(np.asarray(thumbnail), self.ink_threshold)
+        if self.skip_blank and ratio <= self.blank_max_ink_ratio:
+            return FilterDecision("blank", ratio)
+        if not self.skip_duplicates:
+            return None
+
+        value = dhash(thumbnail, self.hash_size)
+        bands = self._band_values(value)
+        with self._lock:
+            candidates = {
+                id(original): original
+                for band, band_value in enumerate(bands)
+                for original in self._index[band].get(band_value, ())
+                if hamming_distance(value, original[0]) <= self.max_distance
+            }
+
+        # Nearest hash first; reuse only a page whose ink matches
+        mask = np.asarray(gray) < self.ink_threshold
+        for other, other_key, packed, shape in sorted(
+            candidates.values(), key=lambda original: hamming_distance(value, original[0])
+        ):
+            if shape != mask.shape:
+                continue
+            other_mask = np.unpackbits(
+                np.frombuffer(zlib.decompress(packed), dtype=np.uint8), count=mask.size
+            ).reshape(shape)
+            unmatched = unmatched_ink(mask, other_mask.astype(bool))
+            if unmatched <= self.max_unmatched_ink:
+                return FilterDecision(
+                    "duplicate",
+                    ratio,
+                    duplicate_of=other_key,
+                    distance=hamming_distance(value, other),
+                    unmatched_ink=unmatched,
+                )
+
+        # Ink masks of text pages compress well, so originals stay cheap to keep
+        original = (value, key, zlib.compress(np.packbits(mask).tobytes(), 1), mask.shape)
+        with self._lock:
+            for band, band_value in enumerate(bands):
+                self._index[band].setdefault(band_value, []).append(original)
+        return None
@@ -1,84 +1,835 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Iterator
 import argparse
+import json
+import threading
+import time
 
-from converter import pdf_to_images, get_pdf_page_size, save_images
-from providers import LocalProvider, AlibabaCloudProvider, VLLMProvider
+from converter import PageRenderer, plan_pages, save_image
+from manifest import (
+    ROUTE_BLANK,
+    ROUTE_DUPLICATE,
+    ROUTE_MODEL,
+    ROUTE_TEXT_LAYER,
+    JobManifest,
+    inference_key,
+    render_key,
+    route_key,
+)
+from pipeline import PageJob, Pipeline
+from providers.resolution import ResolutionPlanner
+from table_detection import TableCropper, crop_info, write_crop_info
+from providers.tracing import Tracer, profile, set_tracer
+from page_filter import PageFilter
+from text_layer import TextLayerReader
+from search_index import SearchIndex
+from providers import (
+    BaseProvider,
+    CachedProvider,
+    PayloadEncoder,
+    available_providers,
+    get_provider_factory,
+    register_provider,
+)
+from providers.streaming import (
+    AnyCompletionDetector,
+    ClosingFenceDetector,
+    CompletionDetector,
+    CsvRowCountDetector,
+)
+from providers.structured import TableSchema, count_row_header_columns, parse_row_headers
 from config import (
     DEFAULT_MODEL,
     USE_MOE,
+    LOCAL_BATCH_SIZE,
+    LOCAL_MAX_BATCH_SIZE,
+    PROMPT_LAYOUT,
+    LOCAL_PREFIX_CACHE,
+    LOCAL_MAX_NEW_TOKENS,
+    LOCAL_DEVICE,
+    LOCAL_QUANTIZATION,
+    LOCAL_NUM_THREADS,
+    STREAM_RESPONSES,
+    STOP_AT_CLOSING_FENCE,
+    STOP_AFTER_CSV_ROWS,
     DEFAULT_PDF_FOLDER,
     DEFAULT_OUTPUT_FOLDER,
     TARGET_LONGEST_SIDE,
+    PIPELINE_QUEUE_SIZE,
+    SAVE_IMAGES,
+    RENDER_WORKERS,
+    SNAP_TO_PATCH_GRID,
+    CROP_TABLES,
+    CROP_DETECTION_LONGEST_SIDE,
+    CROP_MARGIN,
+    USE_TEXT_LAYER,
+    TEXT_LAYER_MIN_CHARS,
+    TEXT_LAYER_MAX_IMAGE_COVERAGE,
+    TEXT_LAYER_TABLES,
+    TEXT_LAYER_ROW_HEADER_COLUMNS,
+    SKIP_BLANK_PAGES,
+    SKIP_DUPLICATE_PAGES,
+    BLANK_MAX_INK_RATIO,
+    DUPLICATE_HASH_SIZE,
+    DUPLICATE_MAX_DISTANCE,
+    DUPLICATE_MAX_UNMATCHED_INK,
+    PAGE_FILTER_REPORT,
+    SEARCH_INDEX,
+    PATCH_FACTOR,
+    MIN_PIXELS,
+    MAX_PIXELS,
+    CACHE_ENABLED,
+    CACHE_PATH,
+    CACHE_MAX_BYTES,
+    TRACE_PATH,
+    METRICS_PATH,
+    METRICS_PORT,
+    PROFILE_PATH,
     DEFAULT_PROMPT,
+    TABLE_ROW_HEADERS,
+    STRUCTURED_OUTPUT,
+    STRUCTURED_MAX_COLUMNS,
+    STRUCTURED_MAX_CELL_LENGTH,
     DEFAULT_PROVIDER,
     ALIBABA_MODEL,
     ALIBABA_REGION,
     ALIBABA_MAX_TOKENS,
     ALIBABA_TEMPERATURE,
+    ALIBABA_MAX_IN_FLIGHT,
+    ALIBABA_RPM,
+    ALIBABA_TPM,
+    ALIBABA_MAX_RETRIES,
     VLLM_MODEL,
+    OCR_SERVER_HOST,
+    OCR_SERVER_PORT,
+    OCR_SERVER_MAX_IN_FLIGHT,
     VLLM_HOST,
     VLLM_PORT,
     VLLM_MAX_TOKENS,
     VLLM_TEMPERATURE,
+    VLLM_MAX_IN_FLIGHT,
+    VLLM_ENDPOINTS,
+    VLLM_HEALTH_CHECK_INTERVAL,
+    PAYLOAD_FORMAT,
+    PAYLOAD_QUALITY,
+    PAYLOAD_GRAYSCALE,
+    PAYLOAD_RESIZE_TO_PATCH_GRID,
+    PAYLOAD_MAX_PIXELS,
 )
 
 
+def build_payload_encoder() -> PayloadEncoder:
+    """Create the image payload encoder configured in config.py."""
+    return PayloadEncoder(
+        format=PAYLOAD_FORMAT,
+        quality=PAYLOAD_QUALITY,
+        grayscale=PAYLOAD_GRAYSCALE,
+        resize_to_patch_grid=PAYLOAD_RESIZE_TO_PATCH_GRID,
+        max_pixels=PAYLOAD_MAX_PIXELS,
+    )
+
+
+def build_resolution_planner() -> ResolutionPlanner | None:
+    """Create the page resolution planner from config.py, if enabled."""
+    if not SNAP_TO_PATCH_GRID:
+        return None
+    return ResolutionPlanner(
+        target_longest_side=TARGET_LONGEST_SIDE,
+        patch_factor=PATCH_FACTOR,
+        min_pixels=MIN_PIXELS,
+        max_pixels=MAX_PIXELS,
+    )
+
+
+def build_table_cropper() -> TableCropper | None:
+    """Create the table cropper from config.py, if enabled."""
+    if not CROP_TABLES:
+        return None
+    return TableCropper(
+        planner=build_resolution_planner(),
+        target_longest_side=TARGET_LONGEST_SIDE,
+        detection_longest_side=CROP_DETECTION_LONGEST_SIDE,
+        margin=CROP_MARGIN,
+    )
+
+
+def build_text_layer_reader(use_text_layer: bool = USE_TEXT_LAYER) -> TextLayerReader | None:
+    """Create the text layer reader from config.py, if enabled."""
+    if not use_text_layer:
+        return None
+    return TextLayerReader(
+        min_chars=TEXT_LAYER_MIN_CHARS,
+        max_image_coverage=TEXT_LAYER_MAX_IMAGE_COVERAGE,
+        extract_tables=TEXT_LAYER_TABLES,
+        row_header_columns=(
+            count_row_header_columns(TABLE_ROW_HEADERS)
+            if TEXT_LAYER_ROW_HEADER_COLUMNS is None
+            else TEXT_LAYER_ROW_HEADER_COLUMNS
+        ),
+    )
+
+
+def build_page_filter(
+    skip_blank: bool = SKIP_BLANK_PAGES, skip_duplicates: bool = SKIP_DUPLICATE_PAGES
+) -> PageFilter | None:
+    """Create the blank/near-duplicate page filter from config.py, if enabled."""
+    if not skip_blank and not skip_duplicates:
+        return None
+    return PageFilter(
+        skip_blank=skip_blank,
+        skip_duplicates=skip_duplicates,
+        blank_max_ink_ratio=BLANK_MAX_INK_RATIO,
+        hash_size=DUPLICATE_HASH_SIZE,
+        max_distance=DUPLICATE_MAX_DISTANCE,
+        max_unmatched_ink=DUPLICATE_MAX_UNMATCHED_INK,
+    )
+
+
+def build_structured_output() -> TableSchema | None:
+    """Create the table schema for constrained decoding, if enabled in config.py."""
+    if STRUCTURED_OUTPUT is None:
+        return None
+    return TableSchema(
+        row_headers=parse_row_headers(TABLE_ROW_HEADERS),
+        mode=STRUCTURED_OUTPUT,
+        max_columns=STRUCTURED_MAX_COLUMNS,
+        max_cell_length=STRUCTURED_MAX_CELL_LENGTH,
+    )
+
+
+def build_prompt() -> str:
+    """The extraction prompt, with the answer format appended in structured mode."""
+    schema = build_structured_output()
+    if schema is None:
+        return DEFAULT_PROMPT
+    return f"{DEFAULT_PROMPT}\n\n{schema.instructions()}"
+
+
+def build_completion_detector() -> CompletionDetector | None:
+    """Create the early-stopping detector from config.py, if any is enabled."""
+    if STRUCTURED_OUTPUT is not None:
+        # Constrained answers end on their own once the schema is complete
+        return None
+    detectors: list[CompletionDetector] = []
+    if STOP_AT_CLOSING_FENCE:
+        detectors.append(ClosingFenceDetector())
+    if STOP_AFTER_CSV_ROWS:
+        detectors.append(CsvRowCountDetector(STOP_AFTER_CSV_ROWS))
+    if not detectors:
+        return None
+    return detectors[0] if len(detectors) == 1 else AnyCompletionDetector(*detectors)
+
+
+# Built-in providers. Each factory imports its provider module itself, so
+# only the selected provider's dependencies (e.g. torch) are loaded
+
+
+@register_provider("local")
+def build_local_provider(model_name: str | None = None) -> BaseProvider:
+    """Local Transformers model with the ``LOCAL_*`` settings."""
+    from providers.local import LocalProvider
+
+    return LocalProvider(
+        model_name=model_name or DEFAULT_MODEL,
+        use_moe=USE_MOE,
+        batch_size=LOCAL_BATCH_SIZE,
+        max_batch_size=LOCAL_MAX_BATCH_SIZE,
+        min_pixels=MIN_PIXELS,
+        max_pixels=MAX_PIXELS,
+        prompt_layout=PROMPT_LAYOUT,
+        prefix_cache=LOCAL_PREFIX_CACHE,
+        max_new_tokens=LOCAL_MAX_NEW_TOKENS,
+        completion_detector=build_completion_detector(),
+        structured_output=build_structured_output(),
+        device=LOCAL_DEVICE,
+        quantization=LOCAL_QUANTIZATION,
+        num_threads=LOCAL_NUM_THREADS,
+    )
+
+
+@register_provider("alibaba_cloud")
+def build_alibaba_cloud_provider(model_name: str | None = None) -> BaseProvider:
+    """Alibaba Cloud DashScope API with the ``ALIBABA_*`` settings."""
+    from providers.alibaba_cloud import AlibabaCloudProvider
+
+    return AlibabaCloudProvider(
+        model_name=model_name or ALIBABA_MODEL,
+        region=ALIBABA_REGION,
+        max_tokens=ALIBABA_MAX_TOKENS,
+        temperature=ALIBABA_TEMPERATURE,
+        max_in_flight=ALIBABA_MAX_IN_FLIGHT,
+        payload_encoder=build_payload_encoder(),
+        requests_per_minute=ALIBABA_RPM,
+        tokens_per_minute=ALIBABA_TPM,
+        max_retries=ALIBABA_MAX_RETRIES,
+        stream=STREAM_RESPONSES,
+        completion_detector=build_completion_detector(),
+        structured_output=build_structured_output(),
+    )
+
+
+@register_provider("vllm")
+def build_vllm_provider(model_name: str | None = None) -> BaseProvider:
+    """VLLM server(s) with the ``VLLM_*`` settings."""
+    from providers.vllm import VLLMProvider
+
+    return VLLMProvider(
+        model_name=model_name or VLLM_MODEL,
+        host=VLLM_HOST,
+        port=VLLM_PORT,
+        max_tokens=VLLM_MAX_TOKENS,
+        temperature=VLLM_TEMPERATURE,
+        max_in_flight=VLLM_MAX_IN_FLIGHT,
+        payload_encoder=build_payload_encoder(),
+        endpoints=VLLM_ENDPOINTS,
+        health_check_interval=VLLM_HEALTH_CHECK_INTERVAL,
+        stream=STREAM_RESPONSES,
+        completion_detector=build_completion_detector(),
+        structured_output=build_structured_output(),
+    )
+
+
+@register_provider("ocr_server")
+def build_ocr_server_provider(model_name: str | None = None) -> BaseProvider:
+    """Client of a running ``ocr_server.py`` with the ``OCR_SERVER_*`` settings."""
+    from providers.openai_compatible import OpenAICompatibleProvider
+
+    # Early stopping and structured output run inside the server, which
+    # loads the local model with the same LOCAL_* settings
+    completion_detector = build_completion_detector()
+    structured_output = build_structured_output()
+    return OpenAICompatibleProvider(
+        base_url=f"http://{OCR_SERVER_HOST}:{OCR_SERVER_PORT}/v1",
+        api_key="dummy",
+        model_name=model_name or DEFAULT_MODEL,
+        max_tokens=LOCAL_MAX_NEW_TOKENS,
+        provider_name="OCR server",
+        max_in_flight=OCR_SERVER_MAX_IN_FLIGHT,
+        payload_encoder=build_payload_encoder(),
+        server_settings={
+            "min_pixels": MIN_PIXELS,
+            "max_pixels": MAX_PIXELS,
+            "prompt_layout": PROMPT_LAYOUT,
+            "completion_detector": (
+                completion_detector.describe() if completion_detector else None
+            ),
+            "structured_output": structured_output.describe() if structured_output else None,
+            "quantization": LOCAL_QUANTIZATION,
+        },
+    )
+
+
+def build_provider(provider: str, model_name: str | None = None) -> BaseProvider:
+    """Initialize the OCR provider with the settings from config.py.
+
+    Args:
+        provider: Name of a registered provider ("local", "alibaba_cloud",
+            "vllm", "ocr_server" or an installed plugin; see
+            ``providers.registry``)
+        model_name: Model to use instead of the one configured for the provider
+
+    Returns:
+        The initialized provider
+
+    Raises:
+        ValueError: If no provider is registered under ``provider``
+    """
+    return get_provider_factory(provider)(model_name)
+
+
 def main(
     pdf_folder_path: Path,
     output_folder: Path = Path("output/"),
-    provider: str = "local",
-):
+    provider: str | BaseProvider = "local",
+    use_cache: bool = CACHE_ENABLED,
+    resume: bool = True,
+    save_images: bool = SAVE_IMAGES,
+    use_text_layer: bool = USE_TEXT_LAYER,
+    skip_blank_pages: bool = SKIP_BLANK_PAGES,
+    skip_duplicate_pages: bool = SKIP_DUPLICATE_PAGES,
+    update_search_index: bool = SEARCH_INDEX,
+    trace_path: Path | None = TRACE_PATH,
+    metrics_path: Path | None = METRICS_PATH,
+    metrics_port: int | None = METRICS_PORT,
+    profile_path: Path | None = PROFILE_PATH,
+) -> dict:
     """Main workflow for batch processing PDFs with OCR.
     
     Args:
         pdf_folder_path: Path to folder containing PDF files
         output_folder: Path to output folder for results
-        provider: OCR provider to use ("local", "alibaba_cloud", or "vllm")
+        provider: Name of a registered OCR provider (see ``build_provider``),
+            or an already configured provider instance
+        use_cache: Whether to reuse cached results for previously seen pages
+        resume: Whether to skip pages already completed by a previous run
+        save_images: Whether to also write each rendered page as imageN.png
+        use_text_layer: Whether to read pages with a usable text layer
+            directly instead of rendering and inferring them
+        skip_blank_pages: Whether to leave the text of blank pages empty
+            instead of running inference
+        skip_duplicate_pages: Whether to reuse the result of an earlier
+            near-identical page instead of running inference
+        update_search_index: Whether to add every page's text to the output
+            folder's full-text search index (see ``search_index.py``)
+        trace_path: JSONL file every stage span is appended to
+        metrics_path: Prometheus text file written at the end of the run
+        metrics_port: Port serving Prometheus metrics while the run lasts
+        profile_path: Where to write cProfile stats of the inference loop
+
+    Returns:
+        Run summary: processed, failed, skipped (done by a previous run),
+        filtered (blank or duplicate) and text layer page counts, wall time
+        and the time spent in each stage (see ``Tracer.stage_summary``)
     """
-    # Initialize the appropriate provider
-    if provider == "local":
-        provider_model = LocalProvider(model_name=DEFAULT_MODEL, use_moe=USE_MOE)
-    elif provider == "alibaba_cloud":
-        provider_model = AlibabaCloudProvider(
-            model_name=ALIBABA_MODEL,
-            region=ALIBABA_REGION,
-            max_tokens=ALIBABA_MAX_TOKENS,
-            temperature=ALIBABA_TEMPERATURE,
+    started = time.perf_counter()
+    # Whatever the setup opens is released again if a later step fails
+    with ExitStack() as setup:
+        # Workflow and provider stages are recorded as spans on this run's tracer
+        tracer = Tracer(trace_path)
+        setup.callback(tracer.close)
+        previous_tracer = set_tracer(tracer)
+        setup.callback(set_tracer, previous_tracer)
+        if metrics_port is not None:
+            tracer.serve_metrics(metrics_port)
+
+        # Initialize the appropriate provider
+        base_provider = build_provider(provider) if isinstance(provider, str) else provider
+
+        # Serve previously seen page/prompt/model combinations from the cache
+        provider_model = CachedProvider(
+            base_provider,
+            cache_path=CACHE_PATH,
+            max_bytes=CACHE_MAX_BYTES,
+            enabled=use_cache,
         )
-    elif provider == "vllm":
-        provider_model = VLLMProvider(
-            model_name=VLLM_MODEL,
-            host=VLLM_HOST,
-            port=VLLM_PORT,
-            max_tokens=VLLM_MAX_TOKENS,
-            temperature=VLLM_TEMPERATURE,
+        setup.callback(provider_model.close)
+
+        # The manifest lets a restarted run skip work that is already done
+        manifest = JobManifest(output_folder)
+        setup.callback(manifest.close)
+        if not resume:
+            manifest.reset()
+        search_index = None
+        if update_search_index:
+            search_index = SearchIndex(output_folder)
+            setup.callback(search_index.close)
+            # Pages skipped on resume, or written while indexing was off, are
+            # only on disk; the viewer reads its page list from the index
+            with tracer.span("index_sync"):
+                counts = search_index.sync()
+            if any(counts.values()):
+                print(
+                    f"Search index: {counts['added']} added, {counts['updated']} updated, "
+                    f"{counts['removed']} removed before the run"
+                )
+        prompt = build_prompt()
+        page_infer_key = inference_key(prompt, provider_model.cache_identity())
+        skipped = 0
+        processed = 0
+        failed = 0
+        planner = build_resolution_planner()
+        cropper = build_table_cropper()
+        page_filter = build_page_filter(skip_blank_pages, skip_duplicate_pages)
+        text_reader = build_text_layer_reader(use_text_layer)
+        # Pages finished on a route count as done only while the route is
+        # enabled with the same settings (and, for copies, the same model)
+        route_keys = {ROUTE_MODEL: page_infer_key}
+        if text_reader is not None:
+            route_keys[ROUTE_TEXT_LAYER] = route_key(ROUTE_TEXT_LAYER, **text_reader.describe())
+        if skip_blank_pages:
+            route_keys[ROUTE_BLANK] = route_key(ROUTE_BLANK, **page_filter.describe("blank"))
+        if skip_duplicate_pages:
+            route_keys[ROUTE_DUPLICATE] = route_key(
+                ROUTE_DUPLICATE, model=page_infer_key, **page_filter.describe("duplicate")
+            )
+        # Setup is done; from here on the run closes these itself
+        setup.pop_all()
+
+    text_layer_pages = 0
+    filter_report: list[dict] = []
+    # Pages whose inference failed; their duplicates are inferred instead
+    failed_pages: set[tuple[str, int]] = set()
+    # Results are recorded from the inference threads
+    record_lock = threading.RLock()
+    # Pages submitted for inference, and the duplicates waiting for their result
+    pending_pages: set[tuple[str, int]] = set()
+    waiting_duplicates: dict[tuple[str, int], list[PageJob]] = {}
+
+    def render_pages() -> Iterator[PageJob]:
+        nonlocal skipped, text_layer_pages
+        # Pages are rasterized by a process pool; the bounded queue throttles
+        # this stage whenever saving or inference falls behind
+        for pdf_path in sorted(pdf_folder_path.rglob("*.pdf")):
+            relative_path = pdf_path.relative_to(pdf_folder_path)
+            pdf_key = relative_path.as_posix()
+            if manifest.sync_pdf(pdf_key, pdf_path):
+                print(f"New or changed PDF: {relative_path}")
+
+            # Size each page individually so its longest side matches the
+            # target resolution, snapped to the vision patch grid if enabled
+            with tracer.span("plan", pdf=pdf_key):
+                if planner is not None:
+                    plans = plan_pages(pdf_path, planner=planner)
+                else:
+                    plans = plan_pages(pdf_path, target_longest_side=TARGET_LONGEST_SIDE)
+            # Cropped pages get their final size in the render process, so
+            # the key covers the crop settings as well
+            crop_settings = {"crop": cropper.describe()} if cropper is not None else {}
+            render_keys = {
+                plan.page_index: render_key(
+                    dpi=plan.dpi, pixel_size=plan.pixel_size, **crop_settings
+                )
+                for plan in plans
+            }
+            page_sizes = {plan.page_index: (plan.width, plan.height) for plan in plans}
+
+            # Preserve directory structure in the output folder
+            pdf_output_folder = output_folder / relative_path.parent / pdf_path.stem
+
+            def make_job(page_index: int, image=None, crop=None, text=None) -> PageJob:
+                return PageJob(
+                    pdf_path=pdf_path,
+                    page_index=page_index,
+                    image_path=pdf_output_folder / f"image{page_index}.png",
+                    image=image,
+                    pdf_key=pdf_key,
+                    render_key=render_keys[page_index],
+                    crop=crop,
+                    text=text,
+                )
+
+            completed = manifest.completed_pages(pdf_key, render_keys, route_keys)
+            skipped += len(completed)
+
+            # Born-digital pages are read from the text layer, skipping both
+            # rendering and inference
+            texts: dict[int, str] = {}
+            if text_reader is not None:
+                with tracer.span("text_layer", pdf=pdf_key):
+                    texts = text_reader.read_pages(
+                        pdf_path,
+                        [plan.page_index for plan in plans if plan.page_index not in completed],
+                    )
+                text_layer_pages += len(texts)
+                for page_index, text in sorted(texts.items()):
+                    yield make_job(page_index, text=text)
+
+            done = completed | texts.keys()
+            reusable = manifest.rendered_pages(pdf_key, render_keys) - done
+            # Pages rendered by a previous run only need inference
+            for page_index in sorted(reusable):
+                yield make_job(page_index)
+
+            to_render = [plan for plan in plans if plan.page_index not in done | reusable]
+            pages = renderer.render(pdf_path, to_render, refine=cropper)
+            while True:
+                # Time spent waiting on the render pool, not on the consumer
+                render_started = time.perf_counter()
+                page = next(pages, None)
+                if page is None:
+                    break
+                tracer.record(
+                    "render",
+                    time.perf_counter() - render_started,
+                    pdf=pdf_key,
+                    page=page.page_index,
+                )
+                crop = None
+                if page.clip is not None:
+                    crop = crop_info(page_sizes[page.page_index], page.clip, page.image.size)
+                job = make_job(page.page_index, page.image, crop)
+                if page_filter is not None:
+                    with tracer.span("filter", pdf=pdf_key, page=page.page_index):
+                        job.skip = page_filter.check(job, page.image)
+                yield job
+
+    # Pages go straight from the renderer to the provider in memory; writing
+    # the PNGs is an optional side output handled by background threads
+    image_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-writer")
+    # Bounds the number of pages waiting to be written
+    write_slots = threading.BoundedSemaphore(PIPELINE_QUEUE_SIZE)
+    write_errors: list[str] = []
+
+    def write_image(job: PageJob, image) -> None:
+        try:
+            with tracer.span("save_image", pdf=job.pdf_key, page=job.page_index):
+                save_image(job.image_path.parent, image, job.page_index)
+            manifest.mark_rendered(
+                job.pdf_key, job.page_index, job.render_key, job.image_path
+            )
+        except Exception as e:
+            write_errors.append(f"{job.image_path}: {e}")
+        finally:
+            write_slots.release()
+
+    def record_result(
+        job: PageJob,
+        result: str | Exception,
+        route: str = ROUTE_MODEL,
+        duplicate_of: str | None = None,
+    ) -> None:
+        """Write a page's text output and record it and its route in the manifest."""
+        nonlocal processed, failed
+        job.image = None
+        with record_lock:
+            if isinstance(result, Exception):
+                # A failed page shouldn't take down the rest of the run
+                print(f"Failed to process {job.image_path}: {result}")
+                failed += 1
+                failed_pages.add((job.pdf_key, job.page_index))
+                tracer.count("pages", status="failed")
+                manifest.mark_failed(
+                    job.pdf_key,
+                    job.page_index,
+                    job.render_key,
+                    job.image_path,
+                    str(result),
+                )
+                return
+            # Save the text output alongside the image
+            with tracer.span("write_text", pdf=job.pdf_key, page=job.page_index):
+                job.text_path.write_text(result, encoding="utf-8")
+            if search_index is not None:
+                with tracer.span("index_text", pdf=job.pdf_key, page=job.page_index):
+                    search_index.add_page(job.text_path, result)
+            processed += 1
+            tracer.count("pages", status="done" if route == ROUTE_MODEL else route)
+            manifest.mark_done(
+                job.pdf_key,
+                job.page_index,
+                job.render_key,
+                job.image_path,
+                route_keys[route],
+                route=route,
+                duplicate_of=duplicate_of,
+            )
+
+    def infer(jobs: list[PageJob]) -> None:
+        """Infer a batch of pages, then fill in the duplicates waiting for them."""
+        with tracer.span("infer", items=len(jobs)):
+            results = provider_model.process_many(
+                # Pages reused from a previous run are read back from disk
+                [job.image if job.image is not None else job.image_path for job in jobs],
+                [prompt] * len(jobs),
+            )
+        retry = []
+        for job, result in zip(jobs, results):
+            record_result(job, result)
+            with record_lock:
+                pending_pages.discard((job.pdf_key, job.page_index))
+                duplicates = waiting_duplicates.pop((job.pdf_key, job.page_index), [])
+            retry.extend(duplicate for duplicate in duplicates if not reuse_result(duplicate))
+        if retry:
+            # Their original failed, so they get inference of their own
+            infer(retry)
+
+    def reuse_result(job: PageJob) -> bool:
+        """Fill in a filtered page without inference; False if it needs inference after all."""
+        entry = {
+            "pdf": job.pdf_key,
+            "page": job.page_index,
+            "reason": job.skip.reason,
+            "ink_ratio": job.skip.ink_ratio,
+        }
+        if job.skip.reason == "blank":
+            filter_report.append(entry)
+            record_result(job, "", route=ROUTE_BLANK)
+            return True
+        original: PageJob = job.skip.duplicate_of
+        entry["duplicate_of"] = {"pdf": original.pdf_key, "page": original.page_index}
+        entry["distance"] = job.skip.distance
+        entry["unmatched_ink"] = job.skip.unmatched_ink
+        if (original.pdf_key, original.page_index) in failed_pages:
+            return False
+        filter_report.append(entry)
+        record_result(
+            job,
+            original.text_path.read_text(encoding="utf-8"),
+            route=ROUTE_DUPLICATE,
+            duplicate_of=f"{original.pdf_key}#{original.page_index}",
         )
-    else:
-        raise ValueError(f"Unknown provider: {provider}")
+        return True
+
+    # Inference runs on a sliding window: up to ``concurrency`` batches are
+    # outstanding and each is recorded as soon as it is back, so a slow page
+    # never holds up the pages rendered after it
+    concurrency = provider_model.concurrency
+    inference_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="infer")
+    inference_slots = threading.BoundedSemaphore(concurrency)
+    inference_futures: list[Future] = []
 
-    # Convert all PDFs to images
-    image_paths = []
-    for pdf_path in pdf_folder_path.rglob("*.pdf"):
-        # Get PDF page size
-        page_size = get_pdf_page_size(pdf_path)
+    def submit_inference(jobs: list[PageJob]) -> None:
+        """Infer a batch in the background; the caller holds an inference slot."""
 
-        # Define DPI such that longest side matches target resolution
-        dpi = int(TARGET_LONGEST_SIDE / max(page_size) * 72)
+        def run() -> None:
+            try:
+                infer(jobs)
+            finally:
+                inference_slots.release()
 
-        # Convert PDF to images
-        images = pdf_to_images(pdf_path, dpi=dpi)
+        inference_futures.append(inference_pool.submit(run))
 
-        # Save images - preserve directory structure
-        relative_path = pdf_path.relative_to(pdf_folder_path)
-        pdf_output_folder = output_folder / relative_path.parent / pdf_path.stem
-        image_paths.extend(save_images(pdf_output_folder, images))
+    def check_inference() -> None:
+        """Re-raise errors of finished inference batches (not per-page failures)."""
+        for future in [future for future in inference_futures if future.done()]:
+            inference_futures.remove(future)
+            future.result()
+
+    def handle_batch(batch: list[PageJob]) -> bool:
+        """Record or submit one batch of pages.
+
+        Returns:
+            True if pages were submitted for inference (taking the caller's
+            inference slot)
+        """
+        for job in batch:
+            job.image_path.parent.mkdir(parents=True, exist_ok=True)
+            if job.crop is not None:
+                # Lets results be mapped from the crop back to the page
+                write_crop_info(job.crop_path, job.crop)
+            if save_images and job.image is not None:
+                write_slots.acquire()
+                image_writer.submit(write_image, job, job.image)
+
+        for job in batch:
+            if job.text is not None:
+                record_result(job, job.text, route=ROUTE_TEXT_LAYER)
+        to_infer = [job for job in batch if job.text is None and job.skip is None]
+        with record_lock:
+            pending_pages.update((job.pdf_key, job.page_index) for job in to_infer)
+        # Originals come before their duplicates in the stream; a duplicate
+        # whose original is still being inferred is filled in once it is back
+        for job in batch:
+            if job.skip is None:
+                continue
+            if job.skip.reason == "duplicate":
+                original = (job.skip.duplicate_of.pdf_key, job.skip.duplicate_of.page_index)
+                with record_lock:
+                    if original in pending_pages:
+                        waiting_duplicates.setdefault(original, []).append(job)
+                        continue
+            if not reuse_result(job):
+                to_infer.append(job)
+        if not to_infer:
+            return False
+        submit_inference(to_infer)
+        return True
+
+    # Rendering, PNG persistence and inference run concurrently. The queue
+    # holds at least a full batch, so a batch can be ready when a slot frees up
+    renderer = PageRenderer(workers=RENDER_WORKERS)
+    pipeline = Pipeline(maxsize=max(PIPELINE_QUEUE_SIZE, provider_model.batch_size))
+    try:
+        rendered = pipeline.source("render", render_pages)
+        batches = pipeline.drain_batches(rendered, provider_model.batch_size)
+        with profile(profile_path):
+            while True:
+                # Take pages off the queue only once a slot is free, so a
+                # batch holds everything rendered in the meantime
+                inference_slots.acquire()
+                # Time the inference loop spends starved for rendered pages
+                with tracer.span("wait"):
+                    batch = next(batches, None)
+                if batch is None or not handle_batch(batch):
+                    inference_slots.release()
+                if batch is None:
+                    break
+                check_inference()
+            inference_pool.shutdown(wait=True)
+            check_inference()
+    finally:
+        inference_pool.shutdown(wait=True, cancel_futures=True)
+        pipeline.close()
+        image_writer.shutdown(wait=True)
+        renderer.close()
+        provider_model.close()
+        set_tracer(previous_tracer)
+        tracer.count("pages", skipped, status="skipped")
+        if metrics_path is not None:
+            tracer.write_prometheus(metrics_path)
+        tracer.close()
+    elapsed = time.perf_counter() - started
+
+    for error in write_errors:
+        print(f"Failed to save image {error}")
+    if text_layer_pages:
+        print(f"Text layer: {text_layer_pages} page(s) read without inference")
+    if page_filter is not None:
+        report_path = output_folder / PAGE_FILTER_REPORT
+        report_path.write_text(
+            json.dumps(
+                {"settings": page_filter.describe(), "skipped": filter_report}, indent=2
+            ),
+            encoding="utf-8",
+        )
+        blank = sum(entry["reason"] == "blank" for entry in filter_report)
+        print(
+            f"Page filter: {blank} blank and {len(filter_report) - blank} near-duplicate "
+            f"page(s) not inferred (see {report_path})"
+        )
+    if skipped:
+        print(f"Skipped {skipped} page(s) completed by a previous run")
+    print(f"Manifest: {manifest.summary()}")
+    manifest.close()
+    if search_index is not None:
+        print(f"Search index: {len(search_index)} page(s) in {search_index.path}")
+        search_index.close()
+
+    if use_cache:
+        stats = provider_model.stats()
+        print(
+            f"Cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+            f"{stats['evictions']} eviction(s)"
+        )
+    payload_stats = getattr(base_provider, "payload_stats", None)
+    if payload_stats is not None and payload_stats.pages:
+        print(
+            f"Image payload: {payload_stats.pages} page(s), "
+            f"{payload_stats.mean_bytes / 1024:.0f} KiB/page on average "
+            f"(min {payload_stats.min_bytes / 1024:.0f} KiB, "
+            f"max {payload_stats.max_bytes / 1024:.0f} KiB)"
+        )
+    stream_stats = getattr(base_provider, "stream_stats", None)
+    if stream_stats is not None and stream_stats.requests:
+        print(
+            f"Streaming: {stream_stats.requests} completion(s), mean time to first token "
+            f"{stream_stats.mean_ttft_s:.2f}s, {stream_stats.stopped_early} stopped early"
+        )
+    scheduler = getattr(base_provider, "scheduler", None)
+    if scheduler is not None and scheduler.stats.requests:
+        summary = scheduler.summary()
+        utilization = ", ".join(
+            f"{summary[key]:.0%} of {label}"
+            for key, label in (("rpm_utilization", "RPM"), ("tpm_utilization", "TPM"))
+            if key in summary
+        )
+        print(
+            f"API quota: {summary['requests']} request(s), {summary['tokens']} token(s)"
+            + (f" ({utilization})" if utilization else "")
+            + f"; {summary['throttled']} throttled, {summary['retries']} retried, "
+            f"concurrency limit {summary['concurrency_limit']}"
+        )
+    endpoint_stats = getattr(base_provider, "endpoint_stats", None)
+    for base_url, stats in (endpoint_stats() if endpoint_stats else {}).items():
+        print(
+            f"Endpoint {base_url}: {stats['requests']} request(s), "
+            f"{stats['failures']} failed, {stats['throughput_rps']:.2f} req/s, "
+            f"mean latency {stats['mean_latency_s']:.2f}s, p95 {stats['p95_latency_s']:.2f}s"
+            + ("" if stats["healthy"] else " (ejected)")
+        )
 
-    # Process each image with the provider
-    for image_path in image_paths:
-        output_text = provider_model.process_image(str(image_path), DEFAULT_PROMPT)
-        # Save the text output alongside the image
-        text_path = image_path.with_suffix(".txt")
-        text_path.write_text(output_text, encoding="utf-8")
+    return {
+        "pages": processed,
+        "failed": failed,
+        "skipped": skipped,
+        "filtered": len(filter_report),
+        "text_layer": text_layer_pages,
+        "elapsed_s": elapsed,
+        "pages_per_s": processed / elapsed if elapsed > 0 else 0.0,
+        "stages": tracer.stage_summary(),
+    }
 
 
 if __name__ == "__main__":
@@ -101,9 +852,76 @@ if __name__ == "__main__":
         "--provider",
         type=str,
         default=DEFAULT_PROVIDER,
-        choices=["local", "alibaba_cloud", "vllm"],
+        choices=available_providers(),
         help=f"OCR provider to use (default: {DEFAULT_PROVIDER})",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the OCR result cache and re-infer every page",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignore the job manifest and re-render and re-infer every page",
+    )
+    parser.add_argument(
+        "--no-save-images",
+        action="store_true",
+        help="Don't write rendered pages as PNG files (only the OCR text is saved)",
+    )
+    parser.add_argument(
+        "--search-index",
+        action=argparse.BooleanOptionalAction,
+        default=SEARCH_INDEX,
+        help="Add page texts to the output folder's full-text search index "
+        "(default from SEARCH_INDEX in config.py)",
+    )
+    parser.add_argument(
+        "--text-layer",
+        action=argparse.BooleanOptionalAction,
+        default=USE_TEXT_LAYER,
+        help="Read born-digital pages from the PDF's text layer instead of running inference "
+        "(default from USE_TEXT_LAYER in config.py)",
+    )
+    parser.add_argument(
+        "--skip-blank",
+        action=argparse.BooleanOptionalAction,
+        default=SKIP_BLANK_PAGES,
+        help="Leave the text of blank pages empty instead of running inference "
+        "(default from SKIP_BLANK_PAGES in config.py)",
+    )
+    parser.add_argument(
+        "--skip-duplicates",
+        action=argparse.BooleanOptionalAction,
+        default=SKIP_DUPLICATE_PAGES,
+        help="Reuse the result of an earlier near-identical page instead of running inference "
+        "(default from SKIP_DUPLICATE_PAGES in config.py)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=TRACE_PATH,
+        help="Append a JSONL span for every workflow and provider stage to this file",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=METRICS_PATH,
+        help="Write Prometheus metrics (stage timings, tokens, pages) to this file",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="Serve Prometheus metrics on this port while the run lasts",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=PROFILE_PATH,
+        help="Write cProfile stats of the inference loop to this file",
+    )
 
     args = parser.parse_args()
 
@@ -131,4 +949,19 @@ if __name__ == "__main__":
     print(f"Found {len(list(pdf_folder.rglob('*.pdf')))} PDF file(s)")
     print()
 
-    main(pdf_folder, output_folder, provider=provider)
+    main(
+        pdf_folder,
+        output_folder,
+        provider=provider,
+        use_cache=not args.no_cache,
+        resume=not args.no_resume,
+        save_images=not args.no_save_images,
+        use_text_layer=args.text_layer,
+        skip_blank_pages=args.skip_blank,
+        skip_duplicate_pages=args.skip_duplicates,
+        update_search_index=args.search_index,
+        trace_path=args.trace,
+        metrics_path=args.metrics_file,
+        metrics_port=args.metrics_port,
+        profile_path=args.profile,
+    )
@@ -0,0 +1,178 @@
+"""Bounded producer/consumer pipeline for the PDF OCR workflow.
+
+The source stage runs in its own thread and hands work to the consumer through
+a bounded queue. A full queue blocks the source (backpressure), so only a
+handful of rendered pages are ever held in memory at once, regardless of how
+large the corpus is.
+"""
+
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from PIL import Image
+
+
+@dataclass
+class PageJob:
+    """A single PDF page travelling through the pipeline."""
+
+    pdf_path: Path
+    page_index: int
+    image_path: Path
+    image: Optional[Image.Image] = None  # In-memory render, if not yet consumed
+    pdf_key: str = ""  # PDF path relative to the input folder (manifest key)
+    render_key: str = ""  # Fingerprint of the render parameters
+    crop: Optional[dict] = None  # Where the image lies on the page, if cropped
+    skip: Any = None  # Why the page needs no inference (``page_filter.FilterDecision``)
+    text: Optional[str] = None  # Output read from the PDF's text layer, if usable
+
+    @property
+    def text_path(self) -> Path:
+        """Path of the OCR text output for this page."""
+        return self.image_path.with_suffix(".txt")
+
+    @property
+    def crop_path(self) -> Path:
+        """Path of the crop description of this page (see ``table_detection``)."""
+        return self.image_path.with_suffix(".crop.json")
+
+
+class _Done:
+    """End-of-stream marker passed between stages."""
+
+
+class _Failure:
+    """Wraps an exception raised inside a stage so the consumer can re-raise it."""
+
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+_DONE = _Done()
+
+
+class Pipeline:
+    """Threaded source stage feeding the calling thread through a bounded queue.
+
+    Example:
+        pipeline = Pipeline(maxsize=8)
+        rendered = pipeline.source("render", render_pages)
+        try:
+            for batch in pipeline.drain_batches(rendered, max_size=4):
+                ...
+        finally:
+            pipeline.close()
+    """
+
+    def __init__(self, maxsize: int = 8):
+        """Initialize the pipeline.
+
+        Args:
+            maxsize: Capacity of the queue between the source and the consumer
+        """
+        self.maxsize = maxsize
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def _new_queue(self) -> queue.Queue:
+        return queue.Queue(maxsize=self.maxsize)
+
+    def _put(self, outbox: queue.Queue, item: Any) -> bool:
+        """Put an item, giving up if the pipeline has been stopped.
+
+        Returns:
+            False if the pipeline was stopped before the item could be queued
+        """
+        while not self._stop.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _start(self, name: str, target: Callable[[], None]) -> None:
+        thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def source(self, name: str, produce: Callable[[], Iterable[Any]]) -> queue.Queue:
+        """Start a stage that feeds items from an iterable into a new queue.
+
+        Args:
+            name: Stage name (used for the thread name and error messages)
+            produce: Zero-argument callable returning the items to emit
+
+        Returns:
+            The queue the items are written to
+        """
+        outbox = self._new_queue()
+
+        def run() -> None:
+            try:
+                for item in produce():
+                    if not self._put(outbox, item):
+                        return
+            except BaseException as e:
+                self._put(outbox, _Failure(name, e))
+                return
+            self._put(outbox, _DONE)
+
+        self._start(name, run)
+        return outbox
+
+    def drain(self, inbox: queue.Queue) -> Iterator[Any]:
+        """Consume the final queue on the calling thread.
+
+        Raises:
+            RuntimeError: If any upstream stage failed
+        """
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise RuntimeError(
+                        f"Pipeline stage '{item.stage}' failed: {item.error}"
+                    ) from item.error
+                yield item
+        finally:
+            self.close()
+
+    def drain_batches(self, inbox: queue.Queue, max_size: int) -> Iterator[list[Any]]:
+        """Consume the final queue in batches on the calling thread.
+
+        Blocks for the first item of each batch, then takes whatever else is
+        already queued (up to ``max_size``) without waiting for more.
+
+        Raises:
+            RuntimeError: If any upstream stage failed
+        """
+        items = self.drain(inbox)
+        try:
+            for first in items:
+                batch = [first]
+                while len(batch) < max_size:
+                    try:
+                        item = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE or isinstance(item, _Failure):
+                        # Hand the marker back to the underlying drain
+                        inbox.put(item)
+                        break
+                    batch.append(item)
+                yield batch
+        finally:
+            items.close()
+
+    def close(self) -> None:
+        """Stop all stages and wait for their threads to exit."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
@@ -1,15 +1,57 @@
-"""Provider modules for OCR processing."""
+"""Provider modules for OCR processing.
+
+Provider classes are imported on first access, so importing the package
+doesn't load torch and transformers (``LocalProvider``) or the OpenAI client
+(the API providers) until a provider is actually used.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
 from .base import BaseProvider
-from .local import LocalProvider
-from .openai_compatible import OpenAICompatibleProvider
-from .alibaba_cloud import AlibabaCloudProvider
-from .vllm import VLLMProvider
+from .cached import CachedProvider
+from .payload import PayloadEncoder
+from .registry import (
+    ProviderFactory,
+    available_providers,
+    get_provider_factory,
+    register_provider,
+)
+
+if TYPE_CHECKING:
+    from .alibaba_cloud import AlibabaCloudProvider
+    from .local import LocalProvider
+    from .openai_compatible import OpenAICompatibleProvider
+    from .vllm import VLLMProvider
+
+# Provider classes and the submodules they are imported from on first access
+_LAZY_CLASSES = {
+    "LocalProvider": ".local",
+    "OpenAICompatibleProvider": ".openai_compatible",
+    "AlibabaCloudProvider": ".alibaba_cloud",
+    "VLLMProvider": ".vllm",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_CLASSES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "BaseProvider",
+    "CachedProvider",
     "LocalProvider",
     "OpenAICompatibleProvider",
     "AlibabaCloudProvider",
     "VLLMProvider",
+    "PayloadEncoder",
+    "ProviderFactory",
+    "available_providers",
+    "get_provider_factory",
+    "register_provider",
 ]
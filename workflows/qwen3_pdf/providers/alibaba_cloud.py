@@ -1,9 +1,13 @@
 """Alibaba Cloud (DashScope) OCR provider using OpenAI-compatible API."""
 
 import os
-from typing import Optional
+from typing import Any, Optional
 
 from .openai_compatible import OpenAICompatibleProvider
+from .payload import PayloadEncoder
+from .rate_limit import RateLimitScheduler
+from .streaming import CompletionDetector
+from .structured import TableSchema
 
 
 class AlibabaCloudProvider(OpenAICompatibleProvider):
@@ -14,6 +18,11 @@ class AlibabaCloudProvider(OpenAICompatibleProvider):
 
     Requires DASHSCOPE_API_KEY environment variable to be set.
 
+    DashScope enforces per-model RPM/TPM quotas. Pass ``requests_per_minute``
+    and/or ``tokens_per_minute`` to pace requests just under them; concurrency
+    then adapts between 1 and ``max_in_flight`` and throttled requests are
+    retried with backoff instead of failing the batch.
+
     Documentation: https://www.alibabacloud.com/help/en/model-studio/use-qwen-by-calling-api
     """
 
@@ -24,6 +33,15 @@ class AlibabaCloudProvider(OpenAICompatibleProvider):
         api_key: Optional[str] = None,
         max_tokens: int = 1024,
         temperature: float = 0.1,
+        max_in_flight: int = 4,
+        payload_encoder: Optional[PayloadEncoder] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        stream: bool = False,
+        completion_detector: Optional[CompletionDetector] = None,
+        base_url: Optional[str] = None,
+        structured_output: Optional[TableSchema] = None,
     ):
         """Initialize the Alibaba Cloud provider.
 
@@ -33,6 +51,18 @@ class AlibabaCloudProvider(OpenAICompatibleProvider):
             api_key: API key for DashScope. If None, reads from DASHSCOPE_API_KEY env var
             max_tokens: Maximum tokens to generate in response
             temperature: Sampling temperature (0.0 to 2.0)
+            max_in_flight: Maximum number of concurrent requests in the batch API
+            payload_encoder: How images are encoded for requests (default: send as-is)
+            requests_per_minute: Account RPM quota for the model. None means unlimited
+            tokens_per_minute: Account TPM quota for the model. None means unlimited
+            max_retries: Retries per request after throttling or transient errors
+            stream: Stream completions and record time-to-first-token
+            completion_detector: Stops a streamed completion once the answer
+                is complete (enables streaming)
+            base_url: Overrides the regional DashScope URL (e.g. a proxy or a
+                local stand-in server for benchmarks)
+            structured_output: Ask for answers in this table schema. DashScope
+                only enforces valid JSON ("json" mode), not the schema itself
         """
         # Get API key from parameter or environment
         resolved_api_key = api_key or os.getenv("DASHSCOPE_API_KEY")
@@ -46,13 +76,14 @@ class AlibabaCloudProvider(OpenAICompatibleProvider):
         # Set base URL based on region
         region_lower = region.lower()
         if region_lower == "singapore":
-            base_url = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+            region_url = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
         elif region_lower == "beijing":
-            base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+            region_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
         else:
             raise ValueError(
                 f"Invalid region: {region}. Must be 'singapore' or 'beijing'"
             )
+        base_url = base_url or region_url
 
         # Initialize the parent OpenAI-compatible provider
         super().__init__(
@@ -61,5 +92,24 @@ class AlibabaCloudProvider(OpenAICompatibleProvider):
             model_name=model_name,
             max_tokens=max_tokens,
             temperature=temperature,
+            max_in_flight=max_in_flight,
+            payload_encoder=payload_encoder,
+            scheduler=RateLimitScheduler(
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_concurrency=max_in_flight,
+                max_retries=max_retries,
+            ),
             provider_name=f"Alibaba Cloud ({region})",
+            stream=stream,
+            completion_detector=completion_detector,
+            structured_output=structured_output,
         )
+
+    def _structured_output_kwargs(self) -> dict[str, Any]:
+        """DashScope's JSON mode; the schema is conveyed by the prompt instructions."""
+        if self.structured_output is None:
+            return {}
+        if self.structured_output.mode != "json":
+            raise ValueError(f"{self.provider_name} only supports structured output mode 'json'")
+        return {"response_format": {"type": "json_object"}}
@@ -1,23 +1,148 @@
 """Abstract base class for OCR providers."""
 
+import hashlib
+import io
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, Union
+
+import numpy as np
+from PIL import Image
+
+# Anything a provider accepts as an image: a path to an image file, an
+# in-memory PIL image, encoded image bytes (PNG, JPEG, ...) or a NumPy array
+# of pixels (H x W x 3 RGB or H x W grayscale)
+ImageInput = Union[str, Path, Image.Image, bytes, np.ndarray]
+
+
+def load_image(image: ImageInput) -> Image.Image:
+    """Return an RGB PIL image for any supported image input.
+
+    Args:
+        image: Path, PIL image, encoded bytes or NumPy array
+
+    Returns:
+        The image as an RGB PIL image (the input itself if it already is one)
+    """
+    if isinstance(image, Image.Image):
+        pil_image = image
+    elif isinstance(image, np.ndarray):
+        pil_image = Image.fromarray(image)
+    elif isinstance(image, bytes):
+        pil_image = Image.open(io.BytesIO(image))
+    else:
+        pil_image = Image.open(image)
+    return pil_image if pil_image.mode == "RGB" else pil_image.convert("RGB")
+
+
+def image_size(image: ImageInput) -> tuple[int, int]:
+    """Return (width, height) of an image input without decoding pixel data."""
+    if isinstance(image, Image.Image):
+        return image.size
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    source = io.BytesIO(image) if isinstance(image, bytes) else image
+    with Image.open(source) as opened:
+        return opened.size
+
+
+def image_digest(image: ImageInput) -> str:
+    """Hash the decoded pixels of an image input.
+
+    Hashing pixels rather than file bytes gives the same digest whether a page
+    arrives as a PNG on disk or straight from the renderer.
+    """
+    pil_image = load_image(image)
+    digest = hashlib.sha256()
+    digest.update(f"{pil_image.mode}:{pil_image.size}".encode("utf-8"))
+    digest.update(pil_image.tobytes())
+    return digest.hexdigest()
 
 
 class BaseProvider(ABC):
     """Abstract base class for all OCR providers.
-    
+
     This defines the interface that all provider implementations must follow.
+    Images can be passed as file paths or in memory (see ``ImageInput``).
     """
 
+    @property
+    def batch_size(self) -> int:
+        """Number of pages the workflow should hand to ``process_many`` at once."""
+        return 1
+
+    @property
+    def concurrency(self) -> int:
+        """Number of ``process_many`` calls the workflow may run at the same time.
+
+        Providers that overlap independent requests (API clients) report how
+        many pages may be outstanding; the workflow then keeps that many in
+        flight and records each result as soon as it is back.
+        """
+        return 1
+
+    def cache_identity(self) -> dict:
+        """Describe the settings that determine this provider's output.
+
+        Used by ``CachedProvider`` as part of the cache key, so changing the
+        model or generation settings never returns stale results.
+        """
+        return {"provider": type(self).__name__}
+
+    def close(self) -> None:
+        """Release the provider's resources (connections, background threads).
+
+        The default implementation holds nothing to release.
+        """
+
     @abstractmethod
-    def process_image(self, image_path: str, prompt: str) -> str:
+    def process_image(self, image: ImageInput, prompt: str) -> str:
         """Process a single image with the given prompt.
-        
+
         Args:
-            image_path: Path to the image file to process
+            image: Path to the image file, or an in-memory image
             prompt: The prompt/instruction for the OCR model
-            
+
         Returns:
             The extracted text from the image
         """
         pass
+
+    def process_many(
+        self, images: list[ImageInput], prompts: list[str]
+    ) -> list[str | Exception]:
+        """Process several images, isolating per-image failures.
+
+        The default implementation calls ``process_image`` sequentially.
+        Providers that can batch or overlap requests override this.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+
+        Returns:
+            One entry per image, in input order: the extracted text, or the
+            exception raised while processing that image
+        """
+        results: list[str | Exception] = []
+        for image, prompt in zip(images, prompts, strict=True):
+            try:
+                results.append(self.process_image(image, prompt))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stream_image(self, image: ImageInput, prompt: str) -> Iterator[str]:
+        """Process a single image, yielding the output text as it is generated.
+
+        The default implementation yields the complete result at once.
+        Providers that support token streaming override this.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Yields:
+            Consecutive pieces of the extracted text
+        """
+        yield self.process_image(image, prompt)
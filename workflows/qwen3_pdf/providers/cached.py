@@ -0,0 +1,260 @@
+"""Persistent, content-addressed result cache for any OCR provider."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .base import BaseProvider, ImageInput, image_digest
+
+# Encoded pages whose pixel digest is remembered (see ``CachedProvider._digest``)
+DIGEST_MEMO_SIZE = 8
+
+
+class CachedProvider(BaseProvider):
+    """Wraps another provider and caches its results in a SQLite database.
+
+    Results are keyed on a hash of the image pixels, the prompt text and the
+    wrapped provider's ``cache_identity()`` (model name, generation settings),
+    so identical pages hit the cache even when they come from different PDFs.
+    The cache is capped at ``max_bytes`` of stored text; the least recently
+    used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        provider: BaseProvider,
+        cache_path: str | Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        enabled: bool = True,
+    ):
+        """Initialize the cache.
+
+        Args:
+            provider: The provider to cache results for
+            cache_path: Path to the SQLite cache file (created if missing)
+            max_bytes: Maximum total size of cached results before LRU eviction
+            enabled: If False, every call goes straight to the wrapped provider
+        """
+        self.provider = provider
+        self.cache_path = Path(cache_path)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._digests: OrderedDict[bytes, str] = OrderedDict()
+
+        if self.enabled:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            self._total_bytes = row[0]
+
+        print(f"Result cache: {self.cache_path if self.enabled else 'disabled'}")
+
+    @property
+    def batch_size(self) -> int:
+        """Batch size of the wrapped provider."""
+        return self.provider.batch_size
+
+    @property
+    def concurrency(self) -> int:
+        """Concurrency of the wrapped provider."""
+        return self.provider.concurrency
+
+    def cache_identity(self) -> dict:
+        """Settings of the wrapped provider that affect its output."""
+        return self.provider.cache_identity()
+
+    def cache_key(self, image: ImageInput, prompt: str) -> str:
+        """Compute the content-addressed cache key for a request.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            {
+                "image": self._digest(image),
+                "prompt": prompt,
+                "provider": self.provider.cache_identity(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _digest(self, image: ImageInput) -> str:
+        """Pixel digest of an image, remembered for recently seen encoded pages.
+
+        A page sent as encoded bytes with many prompts (the table pipeline's
+        header, column and row passes) is decoded and hashed only once.
+        """
+        if not isinstance(image, bytes):
+            return image_digest(image)
+        with self._lock:
+            digest = self._digests.get(image)
+            if digest is not None:
+                self._digests.move_to_end(image)
+                return digest
+        digest = image_digest(image)
+        with self._lock:
+            self._digests[image] = digest
+            while len(self._digests) > DIGEST_MEMO_SIZE:
+                self._digests.popitem(last=False)
+        return digest
+
+    def _get(self, key: str) -> Optional[str]:
+        assert self._conn is not None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def _put(self, key: str, result: str) -> None:
+        assert self._conn is not None
+        size = len(result.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, result, size, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, result, size, time.time()),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        assert self._conn is not None
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def process_image(self, image: ImageInput, prompt: str) -> str:
+        """Return the cached result for this image and prompt, or compute it.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Returns:
+            The extracted text from the image
+        """
+        if not self.enabled:
+            return self.provider.process_image(image, prompt)
+
+        key = self.cache_key(image, prompt)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        result = self.provider.process_image(image, prompt)
+        self._put(key, result)
+        return result
+
+    def process_many(
+        self, images: list[ImageInput], prompts: list[str]
+    ) -> list[str | Exception]:
+        """Serve cached pages directly and forward only the misses.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+
+        Returns:
+            One entry per image, in input order: the extracted text, or the
+            exception raised for that image
+        """
+        if not self.enabled:
+            return self.provider.process_many(images, prompts)
+
+        results: list[str | Exception | None] = [None] * len(images)
+        keys: list[Optional[str]] = [None] * len(images)
+        pending = []
+        for i, (image, prompt) in enumerate(zip(images, prompts, strict=True)):
+            try:
+                keys[i] = self.cache_key(image, prompt)
+            except (OSError, ValueError) as e:
+                results[i] = e
+                continue
+            cached = self._get(keys[i])  # type: ignore[arg-type]
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            computed = self.provider.process_many(
+                [images[i] for i in pending], [prompts[i] for i in pending]
+            )
+            for i, result in zip(pending, computed):
+                results[i] = result
+                if not isinstance(result, Exception):
+                    self._put(keys[i], result)  # type: ignore[arg-type]
+
+        return results  # type: ignore[return-value]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection and the wrapped provider."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.provider.close()
@@ -0,0 +1,246 @@
+"""Least-outstanding-requests load balancing over OpenAI-compatible replicas."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """Turn ``"host:port"`` or a server URL into an API base URL ending in /v1."""
+    if "://" not in endpoint:
+        endpoint = f"http://{endpoint}"
+    endpoint = endpoint.rstrip("/")
+    return endpoint if endpoint.endswith("/v1") else f"{endpoint}/v1"
+
+
+@dataclass
+class Endpoint:
+    """One replica with its client, load and health."""
+
+    base_url: str
+    client: AsyncOpenAI
+    healthy: bool = True
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    total_latency: float = 0.0
+    first_request: Optional[float] = None
+    last_response: Optional[float] = None
+    latencies: list[float] = field(default_factory=list, repr=False)
+
+    @property
+    def health_url(self) -> str:
+        """vLLM serves ``/health`` next to (not under) the ``/v1`` API."""
+        return self.base_url.removesuffix("/v1") + "/health"
+
+    def stats(self) -> dict:
+        """Latency and throughput of this replica."""
+        completed = self.requests - self.failures
+        elapsed = (
+            self.last_response - self.first_request
+            if self.first_request is not None and self.last_response is not None
+            else 0.0
+        )
+        latencies = sorted(self.latencies)
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "mean_latency_s": self.total_latency / completed if completed else 0.0,
+            "p95_latency_s": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+            "throughput_rps": completed / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class LoadBalancer:
+    """Routes requests to the healthy replica with the fewest outstanding requests.
+
+    Replicas that fail ``failure_threshold`` requests in a row (connection
+    errors or 5xx) are ejected. A background task polls every replica's
+    ``/health`` endpoint each ``health_check_interval`` seconds, ejecting
+    replicas that stop answering and readmitting those that recover.
+
+    All methods must be called from the same event loop.
+    """
+
+    # Latencies kept per replica for percentile stats
+    MAX_LATENCY_SAMPLES = 10_000
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        api_key: str,
+        max_connections: int = 32,
+        health_check_interval: float = 10.0,
+        failure_threshold: int = 3,
+        unavailable_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            base_urls: API base URLs of the replicas (e.g. "http://host:8000/v1")
+            api_key: API key sent to every replica
+            max_connections: Connection pool size per replica
+            health_check_interval: Seconds between health checks
+            failure_threshold: Consecutive failed requests before a replica is ejected
+            unavailable_timeout: Seconds to wait for a healthy replica before failing
+        """
+        if not base_urls:
+            raise ValueError("At least one endpoint is required")
+        self.base_urls = base_urls
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.failure_threshold = failure_threshold
+        self.unavailable_timeout = unavailable_timeout
+        self.endpoints: list[Endpoint] = []
+        self._health_task: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    def _ensure_started(self) -> None:
+        """Create the clients and start health checks on the running loop."""
+        if self._changed is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        self.endpoints = [
+            Endpoint(
+                base_url=base_url,
+                client=AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=base_url,
+                    http_client=DefaultAsyncHttpxClient(limits=limits),
+                    # Failed requests are retried on another replica instead
+                    max_retries=0,
+                ),
+            )
+            for base_url in self.base_urls
+        ]
+        self._changed = asyncio.Condition()
+        if self.health_check_interval > 0:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _pick(self, exclude: set[str]) -> Endpoint:
+        """Wait for a healthy replica and return the least loaded one."""
+        assert self._changed is not None
+        deadline = time.monotonic() + self.unavailable_timeout
+        async with self._changed:
+            while True:
+                candidates = [
+                    e for e in self.endpoints if e.healthy and e.base_url not in exclude
+                ]
+                if not candidates and exclude:
+                    # Every healthy replica was tried already; allow a repeat
+                    candidates = [e for e in self.endpoints if e.healthy]
+                if candidates:
+                    endpoint = min(candidates, key=lambda e: e.outstanding)
+                    endpoint.outstanding += 1
+                    return endpoint
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"No healthy endpoint among {', '.join(self.base_urls)}"
+                    )
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    @asynccontextmanager
+    async def route(self, exclude: Optional[set[str]] = None) -> AsyncIterator[Endpoint]:
+        """Reserve the least loaded healthy replica for one request.
+
+        Args:
+            exclude: Base URLs to avoid if another replica is healthy (e.g. ones
+                that already failed this request)
+
+        Yields:
+            The chosen endpoint; use ``endpoint.client`` for the request
+        """
+        self._ensure_started()
+        endpoint = await self._pick(exclude or set())
+        started = time.monotonic()
+        if endpoint.first_request is None:
+            endpoint.first_request = started
+        endpoint.requests += 1
+        try:
+            yield endpoint
+        except Exception as e:
+            endpoint.failures += 1
+            if _is_replica_failure(e):
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.failure_threshold:
+                    await self._set_health(endpoint, False)
+            raise
+        else:
+            finished = time.monotonic()
+            latency = finished - started
+            endpoint.total_latency += latency
+            endpoint.last_response = finished
+            endpoint.consecutive_failures = 0
+            if len(endpoint.latencies) < self.MAX_LATENCY_SAMPLES:
+                endpoint.latencies.append(latency)
+        finally:
+            endpoint.outstanding -= 1
+            async with self._changed:  # type: ignore[union-attr]
+                self._changed.notify_all()  # type: ignore[union-attr]
+
+    async def _set_health(self, endpoint: Endpoint, healthy: bool) -> None:
+        if endpoint.healthy == healthy:
+            return
+        endpoint.healthy = healthy
+        if healthy:
+            endpoint.consecutive_failures = 0
+            print(f"Endpoint {endpoint.base_url} is healthy again")
+        else:
+            endpoint.ejections += 1
+            print(f"Endpoint {endpoint.base_url} ejected")
+        assert self._changed is not None
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _health_loop(self) -> None:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                await asyncio.gather(
+                    *(self._check(client, endpoint) for endpoint in self.endpoints)
+                )
+                await asyncio.sleep(self.health_check_interval)
+
+    async def _check(self, client: httpx.AsyncClient, endpoint: Endpoint) -> None:
+        try:
+            response = await client.get(endpoint.health_url)
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+        await self._set_health(endpoint, healthy)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-replica latency, throughput and health, keyed by base URL."""
+        return {endpoint.base_url: endpoint.stats() for endpoint in self.endpoints}
+
+    async def aclose(self) -> None:
+        """Stop health checks and close the replica clients."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+
+def _is_replica_failure(error: BaseException) -> bool:
+    """Whether an error points at the replica rather than the request."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
@@ -1,41 +1,200 @@
 """Local Transformers-based OCR provider."""
 
+import copy
 import importlib.util
-from typing import Any
+import threading
+import time
+from typing import Any, Iterator, Optional
 
+import torch
 from transformers import (
     AutoProcessor,
+    DynamicCache,
     Qwen3VLForConditionalGeneration,
     Qwen3VLMoeForConditionalGeneration,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
 )
 
-from .base import BaseProvider
+from .base import BaseProvider, ImageInput, image_size, load_image
+from .prompt_template import CompiledPrompt, compile_prompt
+from .streaming import CompletionDetector, StreamResult, StreamStats
+from .structured import TableSchema
+from .tracing import get_tracer
+
+
+class _DetectorStoppingCriteria(StoppingCriteria):
+    """Stops each sequence of a batch once its completion detector fires.
+
+    Only the tokens generated since the previous step are decoded; the text
+    of every sequence is accumulated here and handed to the detector.
+    """
+
+    def __init__(self, detector: CompletionDetector, tokenizer: Any, prompt_length: int):
+        self.detector = detector
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self._done: Optional[torch.Tensor] = None
+        self._texts: list[str] = []
+        # Per sequence, the first token not yet part of its text
+        self._decoded_up_to: list[int] = []
+
+    def __call__(self, input_ids: torch.LongTensor, scores: Any, **kwargs) -> torch.BoolTensor:
+        if self._done is None:
+            self._done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+            self._texts = [""] * input_ids.shape[0]
+            self._decoded_up_to = [self.prompt_length] * input_ids.shape[0]
+        for row in range(input_ids.shape[0]):
+            if self._done[row]:
+                continue
+            piece = self.tokenizer.decode(
+                input_ids[row, self._decoded_up_to[row] :], skip_special_tokens=True
+            )
+            if piece.endswith("\ufffd"):
+                # A multi-byte character is split across tokens; wait for the rest
+                continue
+            self._decoded_up_to[row] = input_ids.shape[1]
+            if not piece:
+                continue
+            self._texts[row] += piece
+            if self.detector.find_end(self._texts[row]) is not None:
+                self._done[row] = True
+        return self._done.clone()  # type: ignore[return-value]
 
 
 class LocalProvider(BaseProvider):
     """Provider for local Qwen3-VL models using Transformers."""
 
-    def __init__(self, model_name: str, use_moe: bool = False):
+    # Rough prompt length (image + instruction tokens) of a page rendered at
+    # TARGET_LONGEST_SIDE, used to size batches from free memory
+    ESTIMATED_PROMPT_TOKENS = 3072
+
+    def __init__(
+        self,
+        model_name: str,
+        use_moe: bool = False,
+        batch_size: Optional[int] = None,
+        max_batch_size: int = 16,
+        min_pixels: Optional[int] = None,
+        max_pixels: Optional[int] = None,
+        prompt_layout: str = "image_first",
+        prefix_cache: bool = False,
+        max_new_tokens: int = 1024,
+        completion_detector: Optional[CompletionDetector] = None,
+        structured_output: Optional[TableSchema] = None,
+        device: str = "auto",
+        quantization: Optional[str] = None,
+        num_threads: Optional[int] = None,
+    ):
         """Initialize the local provider with a specific model.
         
         Args:
             model_name: Hugging Face model identifier (e.g., "Qwen/Qwen3-VL-30B-A3B-Instruct")
             use_moe: Whether to use the MoE model variant
+            batch_size: Pages per ``generate`` call. If None, chosen from free GPU memory
+            max_batch_size: Upper bound for the automatically chosen batch size
+            min_pixels: Smallest pixel budget the processor resizes images to.
+                None keeps the model's default
+            max_pixels: Largest pixel budget the processor resizes images to.
+                Match the resolution planner's budget so planned pages are
+                not resized a second time. None keeps the model's default
+            prompt_layout: "image_first" (page, then instruction) or
+                "text_first" (instruction, then page). Text first makes the
+                whole instruction a prefix shared by every page
+            prefix_cache: Compute the attention state of the shared prompt
+                prefix once and reuse it for every page instead of
+                re-encoding it. Most effective with ``prompt_layout="text_first"``
+            max_new_tokens: Maximum tokens to generate per page
+            completion_detector: Stops generating a page as soon as its
+                answer is complete (e.g. all CSV rows emitted)
+            structured_output: Constrain generation to this table schema by
+                masking the logits (requires ``lm-format-enforcer``)
+            device: "auto" spreads the model over the available GPUs; "cpu"
+                runs it in float32 on the CPU with SDPA attention (practical
+                for the smaller checkpoints such as Qwen3-VL-2B)
+            quantization: "int8" quantizes the weights of the linear layers
+                to int8 after loading (dynamic quantization, CPU only). None
+                keeps full precision
+            num_threads: Intra-op threads torch uses on the CPU (applies to
+                the whole process). None keeps torch's default
         """
+        if device not in ("auto", "cpu"):
+            raise ValueError(f"Unknown device: {device!r} (expected 'auto' or 'cpu')")
+        if quantization not in (None, "int8"):
+            raise ValueError(f"Unknown quantization: {quantization!r} (expected None or 'int8')")
+        if quantization is not None and device != "cpu":
+            raise ValueError("Dynamic int8 quantization requires device='cpu'")
         self.model_name = model_name
         self.use_moe = use_moe
+        self.max_batch_size = max_batch_size
+        self.min_pixels = min_pixels
+        self.max_pixels = max_pixels
+        self.prompt_layout = prompt_layout
+        self.prefix_cache = prefix_cache
+        self.max_new_tokens = max_new_tokens
+        self.completion_detector = completion_detector
+        self.device = device
+        self.quantization = quantization
+        self.stream_stats = StreamStats()
+        # Prompts are rendered and tokenized once; with ``prefix_cache`` the
+        # KV state of their shared prefix is kept as well
+        self._compiled_prompts: dict[str, CompiledPrompt] = {}
+        self._prefix_states: dict[str, DynamicCache] = {}
+        self.structured_output = structured_output
+        # Token vocabulary prepared for the format enforcer on first use
+        self._enforcer_tokenizer_data: Any = None
+        if structured_output is not None and importlib.util.find_spec("lmformatenforcer") is None:
+            raise ImportError(
+                "Structured output with LocalProvider requires lm-format-enforcer: "
+                "pip install lm-format-enforcer"
+            )
         
-        # Check if Flash Attention 2 is available
-        self.use_flash_attn = self._check_flash_attention_available()
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        # Check if Flash Attention 2 is available (GPU only)
+        self.use_flash_attn = device != "cpu" and self._check_flash_attention_available()
         
         # Initialize model and processor
         self.model = self._load_model()
-        self.processor = AutoProcessor.from_pretrained(self.model_name)
+        self.processor = AutoProcessor.from_pretrained(self.model_name, **self._processor_kwargs())
+        # Decoder-only generation needs left padding so every prompt ends at
+        # the same position in a batch
+        self.processor.tokenizer.padding_side = "left"
+
+        self._batch_size = batch_size or self._auto_batch_size()
         
         print(f"LocalProvider initialized with model: {self.model_name}")
+        if self.device == "cpu":
+            print(
+                f"  Device: cpu ({torch.get_num_threads()} threads), "
+                f"quantization: {self.quantization or 'none'}"
+            )
+        print(f"  Batch size: {self._batch_size}")
+        print(f"  Prompt layout: {self.prompt_layout}, prefix cache: {self.prefix_cache}")
+        print(f"  Max new tokens: {self.max_new_tokens}")
+        if self.completion_detector is not None:
+            print(f"  Early stop: {self.completion_detector.describe()}")
+        if self.structured_output is not None:
+            print(f"  Structured output: {self.structured_output.mode}")
         if self.use_flash_attn:
             print("Using Flash Attention 2 for optimized performance")
+
+    @property
+    def batch_size(self) -> int:
+        """Number of pages processed per ``generate`` call."""
+        return self._batch_size
     
+    def _processor_kwargs(self) -> dict[str, Any]:
+        """Pixel budget overrides for the image processor."""
+        kwargs = {}
+        if self.min_pixels is not None:
+            kwargs["min_pixels"] = self.min_pixels
+        if self.max_pixels is not None:
+            kwargs["max_pixels"] = self.max_pixels
+        return kwargs
+
     def _check_flash_attention_available(self) -> bool:
         """Check if Flash Attention 2 is available on the system.
         
@@ -55,15 +214,23 @@ class LocalProvider(BaseProvider):
         Returns:
             The loaded model instance
         """
-        # Configure model loading based on Flash Attention availability
-        attn_implementation = "flash_attention_2" if self.use_flash_attn else "eager"
-        dtype = "bfloat16" if self.use_flash_attn else "auto"
-        
-        model_kwargs = {
-            "dtype": dtype,
-            "device_map": "auto",
-            "attn_implementation": attn_implementation,
-        }
+        if self.device == "cpu":
+            # Dynamic quantization and most CPU kernels expect float32 weights;
+            # SDPA is much faster than eager attention on the CPU
+            model_kwargs = {
+                "dtype": torch.float32,
+                "attn_implementation": "sdpa",
+            }
+        else:
+            # Configure model loading based on Flash Attention availability
+            attn_implementation = "flash_attention_2" if self.use_flash_attn else "eager"
+            dtype = "bfloat16" if self.use_flash_attn else "auto"
+
+            model_kwargs = {
+                "dtype": dtype,
+                "device_map": "auto",
+                "attn_implementation": attn_implementation,
+            }
         
         # Load the appropriate model variant
         if self.use_moe:
@@ -77,57 +244,425 @@ class LocalProvider(BaseProvider):
                 **model_kwargs,  # type: ignore
             )
         
+        model.eval()
+        if self.quantization == "int8":
+            # Weights are stored as int8; activations are quantized on the fly
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
         print("Model loaded successfully")
         return model
     
-    def process_image(self, image_path: str, prompt: str) -> str:
+    def cache_identity(self) -> dict:
+        """Describe the settings that determine this provider's output."""
+        return {
+            "provider": "local",
+            "model_name": self.model_name,
+            "max_tokens": self.max_new_tokens,
+            "temperature": None,  # greedy / model default generation config
+            "min_pixels": self.min_pixels,
+            "max_pixels": self.max_pixels,
+            "prompt_layout": self.prompt_layout,
+            # Early stopping truncates the output
+            "completion_detector": (
+                self.completion_detector.describe() if self.completion_detector else None
+            ),
+            "structured_output": (
+                self.structured_output.describe() if self.structured_output else None
+            ),
+            # Quantized weights change the output
+            "quantization": self.quantization,
+        }
+
+    def _auto_batch_size(self) -> int:
+        """Choose a batch size that fits the KV cache in free GPU memory.
+
+        Returns:
+            Batch size between 1 and ``max_batch_size``
+        """
+        if self.device == "cpu" or not torch.cuda.is_available():
+            return 1
+
+        # Weights are already loaded, so free memory is what's left for
+        # activations and the KV cache
+        free_bytes = sum(
+            torch.cuda.mem_get_info(device)[0]
+            for device in range(torch.cuda.device_count())
+        )
+
+        text_config = getattr(self.model.config, "text_config", self.model.config)
+        head_dim = getattr(
+            text_config,
+            "head_dim",
+            text_config.hidden_size // text_config.num_attention_heads,
+        )
+        kv_bytes_per_token = (
+            2  # keys and values
+            * text_config.num_hidden_layers
+            * text_config.num_key_value_heads
+            * head_dim
+            * self.model.dtype.itemsize
+        )
+        tokens_per_sample = self.ESTIMATED_PROMPT_TOKENS + self.max_new_tokens
+        # Leave headroom for activations, the vision tower and fragmentation
+        bytes_per_sample = kv_bytes_per_token * tokens_per_sample * 2
+        usable_bytes = int(free_bytes * 0.8)
+
+        return max(1, min(self.max_batch_size, usable_bytes // bytes_per_sample))
+
+    def _compiled_prompt(self, prompt: str) -> CompiledPrompt:
+        """Return the compiled form of a prompt, compiling it on first use."""
+        compiled = self._compiled_prompts.get(prompt)
+        if compiled is None:
+            compiled = compile_prompt(self.processor, prompt, self.prompt_layout)
+            self._compiled_prompts[prompt] = compiled
+        return compiled
+
+    def _prepare(
+        self, images: list[ImageInput], prompts: list[str]
+    ) -> tuple[list[list[int]], dict[str, torch.Tensor]]:
+        """Run the image processor and assemble each sample's prompt tokens.
+
+        Args:
+            images: Image files or in-memory images
+            prompts: One prompt per image
+
+        Returns:
+            Tuple of (token ids per sample, image tensors for the model)
+        """
+        with get_tracer().span("preprocess", items=len(images)) as span:
+            image_inputs = self.processor.image_processor(
+                images=[load_image(image) for image in images], return_tensors="pt"
+            )
+            merge_length = self.processor.image_processor.merge_size**2
+            input_ids = [
+                self._compiled_prompt(prompt).input_ids(int(grid.prod()) // merge_length)
+                for prompt, grid in zip(prompts, image_inputs["image_grid_thw"])
+            ]
+            prompt_tokens = sum(len(ids) for ids in input_ids)
+            span.set(prompt_tokens=prompt_tokens)
+        get_tracer().count("tokens", prompt_tokens, kind="prompt")
+        return input_ids, dict(image_inputs)
+
+    def _format_enforcer(self) -> Any:
+        """``prefix_allowed_tokens_fn`` restricting tokens to the table schema.
+
+        The enforcer keeps per-sequence parser state, so a new one is built
+        for every ``generate`` call; the vocabulary analysis is reused.
+        """
+        from lmformatenforcer import JsonSchemaParser, RegexParser
+        from lmformatenforcer.integrations.transformers import (
+            build_token_enforcer_tokenizer_data,
+            build_transformers_prefix_allowed_tokens_fn,
+        )
+
+        assert self.structured_output is not None
+        if self._enforcer_tokenizer_data is None:
+            self._enforcer_tokenizer_data = build_token_enforcer_tokenizer_data(
+                self.processor.tokenizer
+            )
+        if self.structured_output.mode == "json":
+            parser = JsonSchemaParser(self.structured_output.json_schema())
+        else:
+            parser = RegexParser(self.structured_output.regex())
+        return build_transformers_prefix_allowed_tokens_fn(
+            self._enforcer_tokenizer_data, parser
+        )
+
+    def _generation_kwargs(self, prompt_length: int) -> dict[str, Any]:
+        """Length limit, early-stopping and output format arguments for ``generate``."""
+        kwargs: dict[str, Any] = {"max_new_tokens": self.max_new_tokens}
+        if self.structured_output is not None:
+            kwargs["prefix_allowed_tokens_fn"] = self._format_enforcer()
+        if self.completion_detector is not None:
+            kwargs["stopping_criteria"] = StoppingCriteriaList(
+                [
+                    _DetectorStoppingCriteria(
+                        self.completion_detector, self.processor.tokenizer, prompt_length
+                    )
+                ]
+            )
+        return kwargs
+
+    def _generate(
+        self, images: list[ImageInput], prompts: list[str], **generate_kwargs: Any
+    ) -> list[str]:
+        """Run one padded ``generate`` call over a batch of pages.
+
+        Args:
+            images: Image files or in-memory images
+            prompts: One prompt per image
+            **generate_kwargs: Extra arguments for ``generate`` (e.g. a streamer)
+
+        Returns:
+            Decoded output text, one entry per image
+        """
+        # Preparation for inference
+        input_ids, image_inputs = self._prepare(images, prompts)
+
+        # Left-pad so every prompt ends at the same position
+        length = max(len(ids) for ids in input_ids)
+        pad_id = self.processor.tokenizer.pad_token_id
+        padded = torch.tensor([[pad_id] * (length - len(ids)) + ids for ids in input_ids])
+        attention_mask = torch.tensor(
+            [[0] * (length - len(ids)) + [1] * len(ids) for ids in input_ids]
+        )
+
+        # Inference: Generation of the output
+        with get_tracer().span("generate", items=len(images), prompt_length=length):
+            generated_ids = self.model.generate(
+                input_ids=padded.to(self.model.device),
+                attention_mask=attention_mask.to(self.model.device),
+                **{key: value.to(self.model.device) for key, value in image_inputs.items()},
+                **self._generation_kwargs(length),
+                **generate_kwargs,
+            )
+        return self._decode(generated_ids[:, length:])
+
+    def _prefix_state(self, compiled: CompiledPrompt) -> DynamicCache:
+        """KV cache of the prompt text that precedes the image.
+
+        Computed once per prompt; callers must copy it before extending it.
+        """
+        state = self._prefix_states.get(compiled.prompt)
+        if state is None:
+            state = DynamicCache()
+            prefix_ids = torch.tensor([compiled.ids_before_image], device=self.model.device)
+            with torch.no_grad():
+                self.model.model(input_ids=prefix_ids, past_key_values=state, use_cache=True)
+            self._prefix_states[compiled.prompt] = state
+        return state
+
+    def _generate_with_prefix(self, images: list[ImageInput], prompt: str) -> list[str]:
+        """Generate for pages whose prompts have identical length, reusing the
+        cached prefix state.
+
+        The model only re-derives image positions when it prefills from an
+        empty cache, so the image and trailing text are prefilled here with
+        explicit multimodal position ids; ``generate`` then continues from the
+        last prompt token.
+
+        Args:
+            images: Image files or in-memory images with the same token count
+            prompt: The prompt shared by all pages
+
+        Returns:
+            Decoded output text, one entry per image
+        """
+        compiled = self._compiled_prompt(prompt)
+        input_ids, image_inputs = self._prepare(images, [prompt] * len(images))
+        device = self.model.device
+        input_ids = torch.tensor(input_ids, device=device)
+        attention_mask = torch.ones_like(input_ids)
+        image_inputs = {key: value.to(device) for key, value in image_inputs.items()}
+        prefix_length = len(compiled.ids_before_image)
+        length = input_ids.shape[1]
+
+        past_key_values = copy.deepcopy(self._prefix_state(compiled))
+        if len(images) > 1:
+            past_key_values.batch_repeat_interleave(len(images))
+
+        position_ids, rope_deltas = self.model.model.get_rope_index(
+            input_ids, image_inputs["image_grid_thw"], None, attention_mask=attention_mask
+        )
+        with get_tracer().span("prefill", items=len(images)), torch.no_grad():
+            self.model.model(
+                input_ids=input_ids[:, prefix_length:-1],
+                attention_mask=attention_mask[:, :-1],
+                position_ids=position_ids[:, :, prefix_length:-1],
+                past_key_values=past_key_values,
+                cache_position=torch.arange(prefix_length, length - 1, device=device),
+                use_cache=True,
+                **image_inputs,
+            )
+        # Decoding positions are offset by the deltas of this batch's images
+        self.model.model.rope_deltas = rope_deltas
+
+        with get_tracer().span("generate", items=len(images), prompt_length=length):
+            generated_ids = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                **self._generation_kwargs(length),
+            )
+        return self._decode(generated_ids[:, length:])
+
+    def _decode(self, generated_ids: torch.Tensor) -> list[str]:
+        """Decode generated token ids (prompt already removed).
+
+        With a completion detector, text generated after the answer was
+        complete (in the step that triggered the stop) is cut off.
+        """
+        # Finished sequences are padded up to the longest one in the batch
+        completion_tokens = int((generated_ids != self.processor.tokenizer.pad_token_id).sum())
+        get_tracer().count("tokens", completion_tokens, kind="completion")
+        with get_tracer().span(
+            "decode", items=generated_ids.shape[0], completion_tokens=completion_tokens
+        ):
+            texts = self.processor.batch_decode(
+                generated_ids,
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=False,
+            )
+            return [self._truncate(text) for text in texts]
+
+    def _truncate(self, text: str) -> str:
+        """Cut text at the end of the complete answer, if detected."""
+        if self.completion_detector is None:
+            return text
+        end = self.completion_detector.find_end(text)
+        return text if end is None else text[:end]
+
+    def _run_batch(self, images: list[ImageInput], prompts: list[str]) -> list[str]:
+        """Generate for one batch, via the prefix cache if enabled."""
+        if not self.prefix_cache:
+            return self._generate(images, prompts)
+
+        # The prefix state can only be shared by prompts of equal length, so
+        # split the batch by prompt and image size
+        groups: dict[tuple[str, tuple[int, int]], list[int]] = {}
+        for i, (image, prompt) in enumerate(zip(images, prompts)):
+            groups.setdefault((prompt, image_size(image)), []).append(i)
+        results: list[str] = [""] * len(images)
+        for (prompt, _), indices in groups.items():
+            outputs = self._generate_with_prefix([images[i] for i in indices], prompt)
+            for i, output in zip(indices, outputs):
+                results[i] = output
+        return results
+
+    def process_batch(self, images: list[ImageInput], prompts: list[str]) -> list[str]:
+        """Process several images with batched generation.
+
+        Pages are grouped by rendered size before batching, so pages in the
+        same ``generate`` call have (nearly) the same number of vision tokens
+        and little compute is wasted on padding.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+
+        Returns:
+            The extracted text for each image, in input order
+        """
+        if len(images) != len(prompts):
+            raise ValueError("images and prompts must have the same length")
+
+        # Only image headers are read here, so this is cheap
+        sizes = [image_size(image) for image in images]
+        order = sorted(range(len(images)), key=lambda i: sizes[i])
+
+        results: list[str] = [""] * len(images)
+        for start in range(0, len(order), self._batch_size):
+            indices = order[start : start + self._batch_size]
+            outputs = self._run_batch(
+                [images[i] for i in indices], [prompts[i] for i in indices]
+            )
+            for i, output in zip(indices, outputs):
+                results[i] = output
+        return results
+
+    def process_many(
+        self, images: list[ImageInput], prompts: list[str]
+    ) -> list[str | Exception]:
+        """Process several images with batched generation, isolating failures.
+
+        If a batch fails (e.g. out of memory), its pages are retried one at a
+        time so a single bad page doesn't fail the others.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+
+        Returns:
+            One entry per image, in input order: the extracted text, or the
+            exception raised for that image
+        """
+        try:
+            return list(self.process_batch(images, prompts))
+        except Exception as e:
+            if len(images) == 1:
+                return [e]
+            print(f"Batched generation failed ({e}); retrying pages individually")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            return super().process_many(images, prompts)
+
+    def process_image(self, image: ImageInput, prompt: str) -> str:
         """Process a single image with the Qwen3-VL model.
         
         Args:
-            image_path: Path to the image file to process
+            image: Path to the image file, or an in-memory image
             prompt: The prompt/instruction for the OCR model
             
         Returns:
             The extracted text from the image
         """
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "image": image_path,
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt,
-                    },
-                ],
-            }
-        ]
-        
-        # Preparation for inference
-        inputs = self.processor.apply_chat_template(
-            messages,
-            tokenize=True,
-            add_generation_prompt=True,
-            return_dict=True,
-            return_tensors="pt",
-        )
-        inputs = inputs.to(self.model.device)
-        
-        # Inference: Generation of the output
-        generated_ids = self.model.generate(**inputs, max_new_tokens=1024)
-        generated_ids_trimmed = [
-            out_ids[len(in_ids) :]
-            for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-        ]
-        output_text = self.processor.batch_decode(
-            generated_ids_trimmed,
+        return self._run_batch([image], [prompt])[0]
+
+    def stream_image(self, image: ImageInput, prompt: str) -> Iterator[str]:
+        """Process a single image, yielding the output text as it is generated.
+
+        Time-to-first-token and early stops are recorded in ``stream_stats``.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Yields:
+            Consecutive pieces of the extracted text
+        """
+        streamer = TextIteratorStreamer(
+            self.processor.tokenizer,
+            skip_prompt=True,
             skip_special_tokens=True,
             clean_up_tokenization_spaces=False,
         )
-        
-        result = output_text[0]
-        print(result)
-        return result
+        errors: list[Exception] = []
+
+        def run() -> None:
+            try:
+                self._generate([image], [prompt], streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        started = time.monotonic()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        ttft = None
+        chunks = 0
+        text = ""
+        end = None
+        for delta in streamer:
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.monotonic() - started
+            chunks += 1
+            previous_length = len(text)
+            text += delta
+            if self.completion_detector is not None:
+                end = self.completion_detector.find_end(text)
+            if end is not None:
+                # The stopping criteria ends generation in this same step
+                delta = text[previous_length:end]
+                text = text[:end]
+            if delta:
+                yield delta
+            if end is not None:
+                break
+        thread.join()
+        if errors:
+            raise errors[0]
+
+        self.stream_stats.record(
+            StreamResult(
+                text=text,
+                ttft_s=ttft,
+                elapsed_s=time.monotonic() - started,
+                chunks=chunks,
+                stopped_early=end is not None,
+            )
+        )
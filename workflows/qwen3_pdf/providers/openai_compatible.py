@@ -1,11 +1,21 @@
 """Generic OpenAI-compatible API provider for OCR processing."""
 
+import asyncio
 import base64
-from pathlib import Path
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
 
-from .base import BaseProvider
+from .base import BaseProvider, ImageInput, image_size
+from .payload import PayloadEncoder, PayloadStats
+from .rate_limit import RateLimitScheduler
+from .streaming import CompletionDetector, StreamResult, StreamStats
+from .structured import TableSchema
+from .tracing import Span, get_tracer
 
 
 class OpenAICompatibleProvider(BaseProvider):
@@ -20,6 +30,22 @@ class OpenAICompatibleProvider(BaseProvider):
     - And many others
 
     The provider handles image encoding and API communication in a standardized way.
+
+    Besides the blocking ``process_image``, it offers an asyncio batch API
+    (``process_images_async`` / ``process_many``) that keeps up to
+    ``max_in_flight`` requests open at once on a pooled async client, so
+    servers with continuous batching (e.g. VLLM) see many concurrent sequences.
+
+    An optional ``RateLimitScheduler`` paces requests to the account's RPM/TPM
+    quotas, adapts concurrency and retries throttled requests with backoff.
+
+    With ``stream=True`` (implied by a ``completion_detector``) completions are
+    streamed: time-to-first-token is recorded in ``stream_stats`` and the
+    request is cut off as soon as the detector sees a complete answer.
+
+    With a ``structured_output`` schema, decoding is constrained to the
+    expected table shape (JSON schema ``response_format`` by default;
+    subclasses map it to their server's guided decoding options).
     """
 
     def __init__(
@@ -30,6 +56,13 @@ class OpenAICompatibleProvider(BaseProvider):
         max_tokens: int = 1024,
         temperature: float = 0.1,
         provider_name: str = "OpenAI-Compatible",
+        max_in_flight: int = 8,
+        payload_encoder: Optional[PayloadEncoder] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        stream: bool = False,
+        completion_detector: Optional[CompletionDetector] = None,
+        structured_output: Optional[TableSchema] = None,
+        server_settings: Optional[dict] = None,
     ):
         """Initialize the OpenAI-compatible provider.
 
@@ -40,6 +73,17 @@ class OpenAICompatibleProvider(BaseProvider):
             max_tokens: Maximum tokens to generate in response
             temperature: Sampling temperature (0.0 to 2.0)
             provider_name: Human-readable name for logging purposes
+            max_in_flight: Maximum number of concurrent requests in the batch API
+            payload_encoder: How images are encoded for requests (default: send as-is)
+            scheduler: Rate limiting, adaptive concurrency and retries for
+                requests (default: none, errors are raised immediately)
+            stream: Stream completions and record time-to-first-token
+            completion_detector: Stops a streamed completion once the answer
+                is complete (enables streaming)
+            structured_output: Constrain answers to this table schema
+            server_settings: Generation settings the server applies on its
+                own (e.g. the local model behind ``ocr_server.py``); part of
+                the cache identity, since requests can't change them
         """
         self.base_url = base_url
         self.api_key = api_key
@@ -47,6 +91,18 @@ class OpenAICompatibleProvider(BaseProvider):
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.provider_name = provider_name
+        self.max_in_flight = max_in_flight
+        self.payload_encoder = payload_encoder or PayloadEncoder()
+        self.payload_stats = PayloadStats()
+        self._stats_lock = threading.Lock()
+        self.scheduler = scheduler
+        self.completion_detector = completion_detector
+        self.stream = stream or completion_detector is not None
+        self.stream_stats = StreamStats()
+        self.structured_output = structured_output
+        self.server_settings = server_settings
+        # Fail early if the server can't enforce the requested mode
+        self._structured_output_kwargs()
 
         # Initialize OpenAI client
         self.client = OpenAI(
@@ -54,60 +110,155 @@ class OpenAICompatibleProvider(BaseProvider):
             base_url=self.base_url,
         )
 
+        # The async client and its event loop are created on first use
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
         print(f"{self.provider_name} initialized")
         print(f"  Model: {self.model_name}")
         print(f"  Base URL: {self.base_url}")
+        print(f"  Max in-flight requests: {self.max_in_flight}")
+        print(f"  Image payload: {self.payload_encoder.describe()}")
+        if self.stream:
+            detector = completion_detector.describe() if completion_detector else None
+            print(f"  Streaming: on, early stop: {detector}")
+        if self.structured_output is not None:
+            print(f"  Structured output: {self.structured_output.mode}")
+        if self.scheduler is not None:
+            print(
+                f"  Rate limits: {self.scheduler.requests_per_minute or 'unlimited'} RPM, "
+                f"{self.scheduler.tokens_per_minute or 'unlimited'} TPM"
+            )
 
-    def _encode_image_base64(self, image_path: str) -> str:
-        """Encode image file to base64 string.
+    @property
+    def batch_size(self) -> int:
+        """Pages are sent one request each, so they are handed over one at a time."""
+        return 1
 
-        Args:
-            image_path: Path to the image file
+    @property
+    def concurrency(self) -> int:
+        """Number of requests the workflow may keep in flight."""
+        return self.max_in_flight
 
-        Returns:
-            Base64-encoded image string
+    def cache_identity(self) -> dict:
+        """Describe the settings that determine this provider's output."""
+        identity = {
+            "provider": "openai_compatible",
+            "model_name": self.model_name,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            # Lossy or resized payloads can change what the model reads
+            "payload": self.payload_encoder.describe(),
+            # Early stopping truncates the output
+            "completion_detector": (
+                self.completion_detector.describe() if self.completion_detector else None
+            ),
+            "structured_output": (
+                self.structured_output.describe() if self.structured_output else None
+            ),
+        }
+        if self.server_settings is not None:
+            # Left out otherwise, so existing cache entries stay valid
+            identity["server_settings"] = self.server_settings
+        return identity
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background event loop used by the sync batch API.
+
+        The loop lives in a daemon thread for the lifetime of the provider so
+        that the pooled async client (and its keep-alive connections) can be
+        reused across batches.
         """
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name=f"{self.provider_name}-loop",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop, self._loop_thread = loop, thread
+            return self._loop
+
+    def close(self) -> None:
+        """Close the clients and stop the background event loop."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop, self._loop_thread = None, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join()
+            loop.close()
+        self.client.close()
+
+    async def _aclose(self) -> None:
+        """Close what lives on the background event loop."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
-    def _get_image_mime_type(self, image_path: str) -> str:
-        """Determine MIME type from image file extension.
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Return the pooled async client, creating it on first use.
+
+        Must be called from the event loop that will use the client.
+        """
+        if self._async_client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+            )
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=DefaultAsyncHttpxClient(limits=limits),
+                # The scheduler does its own (quota-aware) retries
+                max_retries=0 if self.scheduler is not None else 2,
+            )
+        return self._async_client
+
+    def _encode_image(self, image: ImageInput) -> tuple[str, bytes]:
+        """Get the encoded bytes and MIME type of an image.
+
+        Encoding is delegated to ``self.payload_encoder``; the size of every
+        payload is recorded in ``self.payload_stats``.
 
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, or an in-memory image
 
         Returns:
-            MIME type string (e.g., "image/png", "image/jpeg")
-        """
-        suffix = Path(image_path).suffix.lower()
-        mime_types = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }
-        return mime_types.get(suffix, "image/png")
+            Tuple of (MIME type, encoded image bytes)
+        """
+        mime_type, image_bytes = self.payload_encoder.encode(image)
+        with self._stats_lock:
+            self.payload_stats.record(len(image_bytes))
+        return mime_type, image_bytes
 
-    def process_image(self, image_path: str, prompt: str) -> str:
-        """Process a single image with the OpenAI-compatible API.
+    def _build_messages(self, image: ImageInput, prompt: str) -> list[dict[str, Any]]:
+        """Build the chat messages for a single image + prompt request.
 
         Args:
-            image_path: Path to the image file to process
+            image: Path to the image file, or an in-memory image
             prompt: The prompt/instruction for the OCR model
 
         Returns:
-            The extracted text from the image
+            Messages in OpenAI chat format
         """
         # Encode image to base64
-        base64_image = self._encode_image_base64(image_path)
-        mime_type = self._get_image_mime_type(image_path)
+        with get_tracer().span("encode") as span:
+            mime_type, image_bytes = self._encode_image(image)
+            base64_image = base64.b64encode(image_bytes).decode("utf-8")
+            span.set(payload_bytes=len(image_bytes), mime_type=mime_type)
 
         # Construct image URL in data URI format
         image_url = f"data:{mime_type};base64,{base64_image}"
 
         # Create messages in OpenAI format
-        messages = [
+        return [
             {
                 "role": "user",
                 "content": [
@@ -123,23 +274,365 @@ class OpenAICompatibleProvider(BaseProvider):
             }
         ]
 
-        # Call the API
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,  # type: ignore
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
+    def _estimate_tokens(self, image: ImageInput, prompt: str) -> int:
+        """Upper estimate of the tokens a request counts against a TPM quota.
+
+        One vision token per patch-grid cell of the image, roughly one token
+        per three prompt characters, plus the full completion budget. The
+        scheduler corrects the estimate with the reported usage afterwards.
+        """
+        width, height = image_size(image)
+        factor = self.payload_encoder.patch_factor
+        image_tokens = max(1, (width // factor) * (height // factor))
+        return image_tokens + len(prompt) // 3 + self.max_tokens
+
+    @property
+    def _requires_event_loop(self) -> bool:
+        """Whether blocking calls must also go through the background event loop.
+
+        True when request state (quotas, replica load) lives on that loop, or
+        when completions are streamed (streaming is implemented once, async).
+        """
+        return self.scheduler is not None or self.stream
+
+    def _structured_output_kwargs(self) -> dict[str, Any]:
+        """Request arguments that constrain decoding to ``structured_output``.
+
+        Uses the OpenAI ``json_schema`` response format, which has no regex
+        equivalent. Subclasses override this for servers with other options.
+
+        Raises:
+            ValueError: If the server can't enforce the schema's mode
+        """
+        if self.structured_output is None:
+            return {}
+        if self.structured_output.mode != "json":
+            raise ValueError(
+                f"{self.provider_name} only supports structured output mode 'json'"
             )
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "table",
+                    "schema": self.structured_output.json_schema(),
+                    "strict": True,
+                },
+            }
+        }
 
-            # Extract the response text
+    def _completion_kwargs(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        """Arguments of the chat completion request for the given messages."""
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            **self._structured_output_kwargs(),
+        }
+
+    async def _create_completion(
+        self,
+        messages: list[dict[str, Any]],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        """Send one chat completion request on the pooled async client.
+
+        Subclasses override this to choose where requests are sent.
+        """
+        return await self._request(self._get_async_client(), messages, on_delta)
+
+    async def _request(
+        self,
+        client: AsyncOpenAI,
+        messages: list[dict[str, Any]],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        """Send one chat completion request with the given client.
+
+        The completion is streamed if streaming is enabled or ``on_delta`` is
+        given; a streamed request returns a ``StreamResult``.
+
+        Args:
+            client: Client of the server to send the request to
+            messages: Chat messages of the request
+            on_delta: Called with every piece of text as it arrives
+
+        Returns:
+            The chat completion, or a ``StreamResult`` when streaming
+        """
+        kwargs = self._completion_kwargs(messages)
+        tracer = get_tracer()
+        if not self.stream and on_delta is None:
+            with tracer.span("api_request", base_url=str(client.base_url)) as span:
+                response = await client.chat.completions.create(**kwargs)
+                self._record_usage(span, getattr(response, "usage", None))
+            return response
+
+        with tracer.span("api_request", base_url=str(client.base_url), stream=True) as span:
+            result = await self._stream_completion(client, kwargs, on_delta)
+            span.set(ttft_s=result.ttft_s, stopped_early=result.stopped_early)
+            # An aborted stream never receives the final usage chunk; count
+            # the streamed chunks (about one token each) instead
+            self._record_usage(span, result.usage, completion_fallback=result.chunks)
+        self.stream_stats.record(result)
+        return result
+
+    def _record_usage(
+        self, span: Span, usage: Any, completion_fallback: Optional[int] = None
+    ) -> None:
+        """Count the prompt and completion tokens reported by the API."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", completion_fallback)
+        tracer = get_tracer()
+        if prompt_tokens is not None:
+            tracer.count("tokens", prompt_tokens, kind="prompt")
+        if completion_tokens is not None:
+            tracer.count("tokens", completion_tokens, kind="completion")
+        span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    async def _stream_completion(
+        self,
+        client: AsyncOpenAI,
+        kwargs: dict[str, Any],
+        on_delta: Optional[Callable[[str], None]],
+    ) -> StreamResult:
+        """Stream one completion, stopping once the completion detector fires."""
+        started = time.monotonic()
+        ttft = None
+        chunks = 0
+        text = ""
+        end = None
+        usage = None
+        stream = await client.chat.completions.create(
+            **kwargs, stream=True, stream_options={"include_usage": True}
+        )
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = time.monotonic() - started
+                chunks += 1
+                previous_length = len(text)
+                text += delta
+                if self.completion_detector is not None:
+                    end = self.completion_detector.find_end(text)
+                if end is not None:
+                    # Closing the stream aborts the request, so the server
+                    # stops decoding
+                    delta = text[previous_length:end]
+                    text = text[:end]
+                if on_delta is not None and delta:
+                    on_delta(delta)
+                if end is not None:
+                    break
+        finally:
+            await stream.close()
+
+        return StreamResult(
+            text=text,
+            ttft_s=ttft,
+            elapsed_s=time.monotonic() - started,
+            chunks=chunks,
+            stopped_early=end is not None,
+            usage=usage,
+        )
+
+    def _extract_result(self, response: Any) -> str:
+        """Extract the response text from a chat completion or stream."""
+        if isinstance(response, StreamResult):
+            result = response.text or None
+        else:
             result = response.choices[0].message.content
-            if result is None:
-                raise RuntimeError("API returned empty response")
-            print(result)
+        if result is None:
+            raise RuntimeError("API returned empty response")
+        return result
+
+    def process_image(self, image: ImageInput, prompt: str) -> str:
+        """Process a single image with the OpenAI-compatible API.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Returns:
+            The extracted text from the image
+        """
+        if self._requires_event_loop:
+            result = self.process_many([image], [prompt])[0]
+            if isinstance(result, Exception):
+                raise result
             return result
 
+        messages = self._build_messages(image, prompt)
+
+        # Call the API
+        try:
+            with get_tracer().span("api_request", base_url=self.base_url) as span:
+                response = self.client.chat.completions.create(
+                    **self._completion_kwargs(messages)
+                )
+                self._record_usage(span, getattr(response, "usage", None))
+
+            # Extract the response text
+            return self._extract_result(response)
+
         except Exception as e:
             error_msg = f"Error calling {self.provider_name} API: {str(e)}"
             print(error_msg)
             raise RuntimeError(error_msg) from e
+
+    async def process_image_async(self, image: ImageInput, prompt: str) -> str:
+        """Process a single image with the OpenAI-compatible API asynchronously.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Returns:
+            The extracted text from the image
+        """
+        return await self._process_image_async(image, prompt)
+
+    async def _process_image_async(
+        self,
+        image: ImageInput,
+        prompt: str,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """``process_image_async``, optionally reporting streamed text to ``on_delta``."""
+        # Image encoding is CPU-bound; keep it off the event loop
+        messages = await asyncio.to_thread(self._build_messages, image, prompt)
+
+        def request() -> Any:
+            return self._create_completion(messages, on_delta)
+
+        try:
+            if self.scheduler is not None:
+                estimated_tokens = await asyncio.to_thread(self._estimate_tokens, image, prompt)
+                response = await self.scheduler.run(request, estimated_tokens)
+            else:
+                response = await request()
+            return self._extract_result(response)
+
+        except Exception as e:
+            error_msg = f"Error calling {self.provider_name} API: {str(e)}"
+            print(error_msg)
+            raise RuntimeError(error_msg) from e
+
+    async def stream_image_async(self, image: ImageInput, prompt: str) -> AsyncIterator[str]:
+        """Process a single image, yielding the output text as it arrives.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Yields:
+            Consecutive pieces of the extracted text (ends early if the
+            completion detector fires)
+        """
+        deltas: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+        async def produce() -> None:
+            try:
+                await self._process_image_async(image, prompt, on_delta=deltas.put_nowait)
+            finally:
+                deltas.put_nowait(None)
+
+        task = asyncio.ensure_future(produce())
+        try:
+            while (delta := await deltas.get()) is not None:
+                yield delta
+            await task  # re-raise request errors
+        finally:
+            task.cancel()
+
+    def stream_image(self, image: ImageInput, prompt: str) -> Iterator[str]:
+        """Process a single image, yielding the output text as it arrives.
+
+        Blocking wrapper around ``stream_image_async``, which runs on the
+        provider's background event loop.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+            prompt: The prompt/instruction for the OCR model
+
+        Yields:
+            Consecutive pieces of the extracted text
+        """
+        deltas: queue.Queue[Optional[str]] = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for delta in self.stream_image_async(image, prompt):
+                    deltas.put(delta)
+            finally:
+                deltas.put(None)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._get_loop())
+        try:
+            while (delta := deltas.get()) is not None:
+                yield delta
+            future.result()  # re-raise request errors
+        finally:
+            future.cancel()
+
+    async def process_images_async(
+        self,
+        images: list[ImageInput],
+        prompts: list[str],
+        max_in_flight: Optional[int] = None,
+    ) -> list[str | Exception]:
+        """Process many images concurrently with a bounded number of requests.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+            max_in_flight: Concurrency limit (defaults to ``self.max_in_flight``)
+
+        Returns:
+            One entry per image, in input order: the extracted text, or the
+            exception raised for that image
+        """
+        if len(images) != len(prompts):
+            raise ValueError("images and prompts must have the same length")
+
+        semaphore = asyncio.Semaphore(max_in_flight or self.max_in_flight)
+
+        async def run_one(image: ImageInput, prompt: str) -> str:
+            async with semaphore:
+                return await self.process_image_async(image, prompt)
+
+        results = await asyncio.gather(
+            *(run_one(image, prompt) for image, prompt in zip(images, prompts)),
+            return_exceptions=True,
+        )
+        # Cancellation and other BaseExceptions are not per-request failures
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return list(results)  # type: ignore[arg-type]
+
+    def process_many(
+        self, images: list[ImageInput], prompts: list[str]
+    ) -> list[str | Exception]:
+        """Process several images concurrently (blocking wrapper).
+
+        Runs ``process_images_async`` on the provider's background event loop.
+
+        Args:
+            images: Image files or in-memory images to process
+            prompts: One prompt per image
+
+        Returns:
+            One entry per image, in input order: the extracted text, or the
+            exception raised for that image
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.process_images_async(images, prompts), self._get_loop()
+        )
+        return future.result()
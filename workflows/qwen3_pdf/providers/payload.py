@@ -0,0 +1,128 @@
+"""Configurable image payload encoding for API-based providers."""
+
+import io
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from .base import ImageInput, load_image
+from .resolution import (
+    QWEN3_VL_MAX_PIXELS,
+    QWEN3_VL_MIN_PIXELS,
+    QWEN3_VL_PATCH_FACTOR,
+    smart_resize,
+)
+
+PAYLOAD_FORMATS = ("original", "png", "jpeg", "webp")
+
+_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class PayloadEncoder:
+    """Turns page images into the bytes sent to an API.
+
+    With the default ``format="original"`` files and encoded bytes are sent
+    unchanged and in-memory images are sent as lossless PNG. Choosing
+    ``"jpeg"``/``"webp"``, ``grayscale`` and/or ``resize_to_patch_grid`` can cut
+    the request size by an order of magnitude; use ``calibrate_payload.py`` to
+    check that OCR output is unaffected before switching.
+    """
+
+    format: str = "original"  # "original", "png", "jpeg" or "webp"
+    quality: int = 90  # JPEG/WebP quality (1-100)
+    grayscale: bool = False
+    resize_to_patch_grid: bool = False
+    patch_factor: int = QWEN3_VL_PATCH_FACTOR
+    min_pixels: int = QWEN3_VL_MIN_PIXELS
+    max_pixels: int = QWEN3_VL_MAX_PIXELS
+
+    def __post_init__(self):
+        if self.format not in PAYLOAD_FORMATS:
+            raise ValueError(
+                f"Invalid payload format: {self.format}. Must be one of {PAYLOAD_FORMATS}"
+            )
+
+    @property
+    def is_passthrough(self) -> bool:
+        """Whether encoded inputs are sent without re-encoding."""
+        return self.format == "original" and not self.grayscale and not self.resize_to_patch_grid
+
+    def describe(self) -> dict:
+        """Settings that can change OCR output (used in cache keys)."""
+        if self.is_passthrough:
+            return {"format": "original"}
+        return asdict(self)
+
+    def encode(self, image: ImageInput) -> tuple[str, bytes]:
+        """Encode an image for an API request.
+
+        Args:
+            image: Path to the image file, or an in-memory image
+
+        Returns:
+            Tuple of (MIME type, encoded image bytes)
+        """
+        if self.is_passthrough:
+            if isinstance(image, (str, Path)):
+                mime_type = _MIME_TYPES.get(Path(image).suffix.lower(), "image/png")
+                return mime_type, Path(image).read_bytes()
+            if isinstance(image, bytes):
+                with Image.open(io.BytesIO(image)) as opened:
+                    image_format = opened.format
+                return Image.MIME.get(image_format or "PNG", "image/png"), image
+
+        pil_image = load_image(image)
+        if self.resize_to_patch_grid:
+            size = smart_resize(
+                *pil_image.size,
+                factor=self.patch_factor,
+                min_pixels=self.min_pixels,
+                max_pixels=self.max_pixels,
+            )
+            if size != pil_image.size:
+                pil_image = pil_image.resize(size, Image.Resampling.LANCZOS)
+        if self.grayscale:
+            pil_image = pil_image.convert("L")
+
+        buffer = io.BytesIO()
+        if self.format == "jpeg":
+            pil_image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+            mime_type = "image/jpeg"
+        elif self.format == "webp":
+            pil_image.save(buffer, format="WEBP", quality=self.quality, method=4)
+            mime_type = "image/webp"
+        else:
+            pil_image.save(buffer, format="PNG")
+            mime_type = "image/png"
+        return mime_type, buffer.getvalue()
+
+
+@dataclass
+class PayloadStats:
+    """Running totals of the image bytes sent to an API."""
+
+    pages: int = 0
+    total_bytes: int = 0
+    min_bytes: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+    def record(self, size: int) -> None:
+        """Record the payload size of one page."""
+        self.pages += 1
+        self.total_bytes += size
+        self.min_bytes = size if self.min_bytes is None else min(self.min_bytes, size)
+        self.max_bytes = size if self.max_bytes is None else max(self.max_bytes, size)
+
+    @property
+    def mean_bytes(self) -> float:
+        """Average payload size per page."""
+        return self.total_bytes / self.pages if self.pages else 0.0
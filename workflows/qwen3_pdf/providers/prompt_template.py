@@ -0,0 +1,91 @@
+"""Pre-tokenized chat prompts for the local Qwen3-VL provider."""
+
+from dataclasses import dataclass
+from typing import Any
+
+PROMPT_LAYOUTS = ("image_first", "text_first")
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """A chat prompt rendered and tokenized once, with a slot for one image.
+
+    The chat template is rendered around a single image placeholder and the
+    text on either side is tokenized up front. Per page only the image
+    processor runs; the placeholder is expanded to the page's number of
+    vision tokens and spliced between the pre-tokenized halves.
+    """
+
+    prompt: str
+    layout: str
+    ids_before_image: tuple[int, ...]  # ends with <|vision_start|>
+    ids_after_image: tuple[int, ...]  # starts with <|vision_end|>
+    image_token_id: int
+
+    def input_ids(self, num_image_tokens: int) -> list[int]:
+        """Token ids of the full prompt for an image of the given size.
+
+        Args:
+            num_image_tokens: Number of vision tokens the image expands to
+
+        Returns:
+            Token ids of the prompt, ending with the assistant turn header
+        """
+        return [
+            *self.ids_before_image,
+            *([self.image_token_id] * num_image_tokens),
+            *self.ids_after_image,
+        ]
+
+
+def build_messages(image: Any, prompt: str, layout: str = "image_first") -> list[dict[str, Any]]:
+    """Build the chat messages for a single image + prompt request.
+
+    Args:
+        image: Image (or placeholder) for the image content part
+        prompt: The prompt/instruction for the OCR model
+        layout: "image_first" puts the page before the instruction text;
+            "text_first" puts the instruction first so it forms a prefix
+            shared by every page
+
+    Returns:
+        Chat messages in the processor's format
+    """
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Invalid prompt layout: {layout}. Must be one of {PROMPT_LAYOUTS}")
+    image_part = {"type": "image", "image": image}
+    text_part = {"type": "text", "text": prompt}
+    content = [image_part, text_part] if layout == "image_first" else [text_part, image_part]
+    return [{"role": "user", "content": content}]
+
+
+def compile_prompt(processor: Any, prompt: str, layout: str = "image_first") -> CompiledPrompt:
+    """Render the chat template once and tokenize the text around the image.
+
+    Args:
+        processor: The model's Transformers processor
+        prompt: The prompt/instruction for the OCR model
+        layout: Prompt layout (see ``build_messages``)
+
+    Returns:
+        The compiled prompt
+    """
+    text = processor.apply_chat_template(
+        build_messages(None, prompt, layout),
+        tokenize=False,
+        add_generation_prompt=True,
+    )
+    before, image_token, after = text.partition(processor.image_token)
+    if not image_token or processor.image_token in after:
+        raise ValueError("Chat template must contain exactly one image placeholder")
+
+    # Both halves end/start at special tokens (<|vision_start|>, <|vision_end|>),
+    # so tokenizing them separately matches tokenizing the expanded prompt
+    tokenizer = processor.tokenizer
+    return CompiledPrompt(
+        prompt=prompt,
+        layout=layout,
+        ids_before_image=tuple(tokenizer(before, add_special_tokens=False)["input_ids"]),
+        ids_after_image=tuple(tokenizer(after, add_special_tokens=False)["input_ids"]),
+        image_token_id=processor.image_token_id,
+    )
@@ -0,0 +1,338 @@
+"""Quota-aware request scheduling for API-based providers.
+
+Hosted APIs such as DashScope enforce per-minute request (RPM) and token
+(TPM) quotas and answer with HTTP 429 when a client exceeds them. The
+``RateLimitScheduler`` keeps a provider just under those limits:
+
+- two token buckets pace requests and tokens to the configured quotas,
+- an AIMD limiter adapts the number of concurrent requests, halving it when
+  the server throttles and growing it again while requests succeed,
+- throttled and transient failures are retried with jittered exponential
+  backoff (honouring ``Retry-After`` when the server sends it).
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate_per_minute``.
+
+    The bucket holds ``burst_seconds`` worth of tokens, so traffic stays
+    smooth: APIs commonly enforce per-minute quotas over much shorter windows
+    and reject bursts that a full minute's allowance would permit. A request
+    larger than the capacity is admitted once the bucket is full and charged
+    in full: the balance goes negative, and later requests wait until the
+    debt has been refilled, so the quota holds for requests of any size.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 1.0):
+        """
+        Args:
+            rate_per_minute: Refill rate, i.e. the per-minute quota
+            burst_seconds: Bucket capacity, in seconds of refill
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate_per_minute = rate_per_minute
+        self.capacity = max(1.0, rate_per_minute / 60 * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate_per_minute / 60
+        )
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Wait until ``amount`` tokens are available and take them.
+
+        Returns:
+            The tokens charged (all of ``amount``, even beyond the capacity)
+        """
+        # More than the capacity is never available; wait for a full bucket
+        required = min(amount, self.capacity)
+        # Waiters are served one at a time, in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= required:
+                    self._tokens -= amount
+                    return amount
+                missing = required - self._tokens
+                await asyncio.sleep(missing * 60 / self.rate_per_minute)
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens (or take more, if ``amount`` is negative)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase/multiplicative-decrease limit on concurrent requests.
+
+    Every ``limit`` successful requests raise the limit by one; a throttled
+    request halves it. Within ``cooldown`` seconds of a decrease the limit
+    neither grows nor shrinks again: requests that were already in flight
+    fail (or succeed) together and say nothing new about the limit.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease_factor: float = 0.5,
+        cooldown: float = 5.0,
+    ):
+        """
+        Args:
+            initial: Starting concurrency limit
+            minimum: Lower bound for the limit
+            maximum: Upper bound for the limit
+            decrease_factor: Multiplier applied to the limit when throttled
+            cooldown: Seconds after a decrease during which the limit is left unchanged
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free concurrency slot."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        """Free a concurrency slot."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def on_success(self) -> None:
+        """Additive increase: one more slot per ``limit`` successes."""
+        if time.monotonic() - self._last_decrease < self.cooldown:
+            return
+        async with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease after the server signals overload."""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        self._successes = 0
+        self._last_decrease = now
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter.
+
+    Args:
+        attempt: Retry number, starting at 0
+        base: Delay scale in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        A random delay in [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _is_throttle(error: BaseException) -> bool:
+    return isinstance(error, openai.RateLimitError)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True  # APITimeoutError is an APIConnectionError
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said so."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+@dataclass
+class SchedulerStats:
+    """Counters describing how a scheduler used its quota."""
+
+    requests: int = 0
+    tokens: int = 0
+    throttled: int = 0
+    retries: int = 0
+    failures: int = 0
+    started: Optional[float] = None
+
+
+class RateLimitScheduler:
+    """Paces API requests to RPM/TPM quotas with adaptive concurrency.
+
+    Example:
+        scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=500_000)
+        response = await scheduler.run(
+            lambda: client.chat.completions.create(...), estimated_tokens=4000
+        )
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 16,
+        initial_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+        cooldown: float = 5.0,
+    ):
+        """
+        Args:
+            requests_per_minute: Request quota. None means unlimited
+            tokens_per_minute: Token quota (prompt + completion). None means unlimited
+            max_concurrency: Upper bound for concurrent requests
+            initial_concurrency: Starting concurrency (default: half of the maximum)
+            max_retries: Retries per request for throttled or transient failures
+            backoff_base: Backoff delay scale in seconds
+            backoff_cap: Maximum backoff delay in seconds
+            cooldown: Seconds after a concurrency decrease before it adapts again
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_concurrency = max_concurrency
+        self.cooldown = cooldown
+        self.initial_concurrency = initial_concurrency or max(1, max_concurrency // 2)
+        self.stats = SchedulerStats()
+        # asyncio primitives bind to the loop that first uses them, so they
+        # are created lazily on that loop
+        self._request_bucket: Optional[TokenBucket] = None
+        self._token_bucket: Optional[TokenBucket] = None
+        self._limiter: Optional[AdaptiveConcurrencyLimiter] = None
+
+    def _ensure_started(self) -> None:
+        if self._limiter is not None:
+            return
+        if self.requests_per_minute:
+            self._request_bucket = TokenBucket(self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._token_bucket = TokenBucket(self.tokens_per_minute)
+        self._limiter = AdaptiveConcurrencyLimiter(
+            self.initial_concurrency, maximum=self.max_concurrency, cooldown=self.cooldown
+        )
+        self.stats.started = time.monotonic()
+
+    async def run(
+        self, request: Callable[[], Awaitable[T]], estimated_tokens: int = 0
+    ) -> T:
+        """Run one API request within the quotas, retrying when throttled.
+
+        Args:
+            request: Coroutine factory performing the request (called once per attempt)
+            estimated_tokens: Tokens reserved before sending; reconciled with the
+                response's ``usage.total_tokens`` when available
+
+        Returns:
+            The result of ``request()``
+        """
+        self._ensure_started()
+        assert self._limiter is not None
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            try:
+                if self._request_bucket is not None:
+                    await self._request_bucket.acquire(1)
+                charged = 0.0
+                if self._token_bucket is not None:
+                    charged = await self._token_bucket.acquire(estimated_tokens)
+                self.stats.requests += 1
+                try:
+                    response = await request()
+                except Exception as e:
+                    error: Exception = e
+                else:
+                    await self._limiter.on_success()
+                    self._record_usage(response, estimated_tokens, charged)
+                    return response
+            finally:
+                await self._limiter.release()
+
+            if _is_throttle(error):
+                self.stats.throttled += 1
+                self._limiter.on_throttle()
+            if not _is_retryable(error) or attempt >= self.max_retries:
+                self.stats.failures += 1
+                raise error
+            delay = _retry_after(error) or backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+            self.stats.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _record_usage(self, response: Any, estimated_tokens: int, charged: float) -> None:
+        """Count the tokens a request used and settle them with the token bucket.
+
+        Args:
+            response: The API response (its ``usage.total_tokens`` if present)
+            estimated_tokens: Tokens the request was expected to use
+            charged: Tokens taken from the token bucket for the request
+        """
+        usage = getattr(response, "usage", None)
+        used = getattr(usage, "total_tokens", None)
+        if used is None:
+            used = estimated_tokens
+        self.stats.tokens += used
+        if self._token_bucket is not None:
+            self._token_bucket.refund(charged - used)
+
+    def summary(self) -> dict:
+        """Quota utilization and retry counters since the first request."""
+        elapsed = time.monotonic() - self.stats.started if self.stats.started else 0.0
+        minutes = elapsed / 60
+        summary: dict[str, Any] = {
+            "requests": self.stats.requests,
+            "tokens": self.stats.tokens,
+            "throttled": self.stats.throttled,
+            "retries": self.stats.retries,
+            "failures": self.stats.failures,
+            "concurrency_limit": self._limiter.limit if self._limiter else self.initial_concurrency,
+            "elapsed_s": elapsed,
+        }
+        if minutes > 0:
+            summary["requests_per_minute"] = self.stats.requests / minutes
+            summary["tokens_per_minute"] = self.stats.tokens / minutes
+            if self.requests_per_minute:
+                summary["rpm_utilization"] = summary["requests_per_minute"] / self.requests_per_minute
+            if self.tokens_per_minute:
+                summary["tpm_utilization"] = summary["tokens_per_minute"] / self.tokens_per_minute
+        return summary
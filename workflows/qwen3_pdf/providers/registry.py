@@ -0,0 +1,89 @@
+"""Registry of provider factories, selected by name.
+
+A factory builds a configured provider from an optional model name override.
+Factories import their provider module themselves, so only the selected
+provider's dependencies are loaded (torch and transformers for the local
+model, the OpenAI client for the APIs).
+
+Third-party packages add providers without touching this repository by
+declaring an entry point in the ``qwen3_pdf.providers`` group::
+
+    [project.entry-points."qwen3_pdf.providers"]
+    my_ocr = "my_package.ocr:build_provider"
+
+Entry points are only loaded when their provider is selected.
+"""
+
+from importlib.metadata import EntryPoint, entry_points
+from typing import Callable, Optional
+import threading
+
+from .base import BaseProvider
+
+ENTRY_POINT_GROUP = "qwen3_pdf.providers"
+
+# Builds a provider; the argument overrides the configured model (None keeps it)
+ProviderFactory = Callable[[Optional[str]], BaseProvider]
+
+_factories: dict[str, ProviderFactory] = {}
+_entry_points: Optional[dict[str, EntryPoint]] = None
+_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Optional[ProviderFactory] = None):
+    """Register a provider factory under ``name``.
+
+    Usable directly or as a decorator:
+
+        @register_provider("my_ocr")
+        def build_my_ocr(model_name: str | None = None) -> BaseProvider:
+            from my_package.ocr import MyProvider
+            return MyProvider(model_name or "default-model")
+
+    Args:
+        name: Name the provider is selected by (e.g. ``--provider my_ocr``)
+        factory: The factory; omit to use the function as a decorator
+
+    Returns:
+        The factory (or, without one, a decorator registering its argument)
+    """
+    def register(factory: ProviderFactory) -> ProviderFactory:
+        with _lock:
+            _factories[name] = factory
+        return factory
+
+    return register if factory is None else register(factory)
+
+
+def _discovered_entry_points() -> dict[str, EntryPoint]:
+    """Entry points of installed provider plugins (discovered once, not loaded)."""
+    global _entry_points
+    with _lock:
+        if _entry_points is None:
+            _entry_points = {
+                entry_point.name: entry_point
+                for entry_point in entry_points(group=ENTRY_POINT_GROUP)
+            }
+        return _entry_points
+
+
+def available_providers() -> list[str]:
+    """Names of the registered and installed providers."""
+    return sorted(set(_factories) | set(_discovered_entry_points()))
+
+
+def get_provider_factory(name: str) -> ProviderFactory:
+    """Return the factory of a provider, loading its plugin if needed.
+
+    Raises:
+        ValueError: If no provider is registered or installed under ``name``
+    """
+    factory = _factories.get(name)
+    if factory is not None:
+        return factory
+    entry_point = _discovered_entry_points().get(name)
+    if entry_point is None:
+        raise ValueError(
+            f"Unknown provider: {name} (available: {', '.join(available_providers())})"
+        )
+    return register_provider(name, entry_point.load())
@@ -0,0 +1,95 @@
+"""Image geometry helpers for Qwen3-VL's vision patch grid.
+
+Qwen3-VL splits images into 16x16 pixel patches and merges 2x2 patches into
+one vision token, so image sides that are a multiple of 32 pixels map onto the
+token grid exactly. Any other size is resized (or padded) by the model's
+processor, which wastes work and vision tokens.
+"""
+
+import math
+from dataclasses import dataclass
+
+# Pixels per vision token side: patch size (16) x spatial merge size (2)
+QWEN3_VL_PATCH_FACTOR = 32
+
+# Pixel budget bounds used by the Qwen3-VL processor by default
+QWEN3_VL_MIN_PIXELS = 64 * QWEN3_VL_PATCH_FACTOR * QWEN3_VL_PATCH_FACTOR
+QWEN3_VL_MAX_PIXELS = 16384 * QWEN3_VL_PATCH_FACTOR * QWEN3_VL_PATCH_FACTOR
+
+
+def smart_resize(
+    width: int,
+    height: int,
+    factor: int = QWEN3_VL_PATCH_FACTOR,
+    min_pixels: int = QWEN3_VL_MIN_PIXELS,
+    max_pixels: int = QWEN3_VL_MAX_PIXELS,
+) -> tuple[int, int]:
+    """Snap an image size to the patch grid within a pixel budget.
+
+    Both sides become multiples of ``factor`` while keeping the aspect ratio
+    as close as possible, and the total pixel count ends up within
+    [``min_pixels``, ``max_pixels``]. This mirrors the resize the Qwen-VL
+    processors apply, so an image already at the returned size is not
+    resized again by the model.
+
+    Args:
+        width: Original width in pixels
+        height: Original height in pixels
+        factor: Grid multiple for both sides
+        min_pixels: Minimum total pixel count
+        max_pixels: Maximum total pixel count
+
+    Returns:
+        Tuple of (width, height) in pixels
+    """
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid image size: {width}x{height}")
+
+    new_width = max(factor, round(width / factor) * factor)
+    new_height = max(factor, round(height / factor) * factor)
+
+    if new_width * new_height > max_pixels:
+        beta = math.sqrt(width * height / max_pixels)
+        new_width = max(factor, math.floor(width / beta / factor) * factor)
+        new_height = max(factor, math.floor(height / beta / factor) * factor)
+    elif new_width * new_height < min_pixels:
+        beta = math.sqrt(min_pixels / (width * height))
+        new_width = math.ceil(width * beta / factor) * factor
+        new_height = math.ceil(height * beta / factor) * factor
+
+    return new_width, new_height
+
+
+@dataclass(frozen=True)
+class ResolutionPlanner:
+    """Chooses the pixel size each PDF page is rendered at.
+
+    Each page is scaled so its longest side is close to
+    ``target_longest_side``, then snapped to the patch grid within the pixel
+    budget. Portrait and landscape pages in the same document therefore get
+    the same scale, and the model's processor never has to resize them again.
+    """
+
+    target_longest_side: int = 1800
+    patch_factor: int = QWEN3_VL_PATCH_FACTOR
+    min_pixels: int = QWEN3_VL_MIN_PIXELS
+    max_pixels: int = QWEN3_VL_MAX_PIXELS
+
+    def plan(self, width_pt: float, height_pt: float) -> tuple[int, int]:
+        """Pick the render size of a page.
+
+        Args:
+            width_pt: Page width in points (1/72 inch)
+            height_pt: Page height in points (1/72 inch)
+
+        Returns:
+            Tuple of (width, height) in pixels
+        """
+        scale = self.target_longest_side / max(width_pt, height_pt)
+        return smart_resize(
+            max(1, round(width_pt * scale)),
+            max(1, round(height_pt * scale)),
+            factor=self.patch_factor,
+            min_pixels=self.min_pixels,
+            max_pixels=self.max_pixels,
+        )
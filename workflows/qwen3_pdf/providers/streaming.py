@@ -0,0 +1,155 @@
+"""Streaming helpers: completion detectors and time-to-first-token stats.
+
+A completion detector looks at the text generated so far and decides whether
+the answer is already complete, e.g. because the expected number of CSV rows
+has been emitted or a code block was closed. Providers stop generating as soon
+as a detector fires, which saves the decode time the model would otherwise
+spend on trailing commentary.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
+
+FENCE = "```"
+
+
+class CompletionDetector(ABC):
+    """Decides when a partially generated answer is complete."""
+
+    @abstractmethod
+    def find_end(self, text: str) -> Optional[int]:
+        """Check whether the generated text already holds a complete answer.
+
+        Args:
+            text: Text generated so far
+
+        Returns:
+            Length of the complete answer (the text is truncated there), or
+            None if generation should continue
+        """
+
+    @abstractmethod
+    def describe(self) -> dict:
+        """Settings of the detector (used in cache keys)."""
+
+
+class ClosingFenceDetector(CompletionDetector):
+    """Fires once a Markdown code block has been opened and closed."""
+
+    def find_end(self, text: str) -> Optional[int]:
+        opening = text.find(FENCE)
+        if opening == -1:
+            return None
+        # The closing fence starts a line after the opening one
+        first_line_end = text.find("\n", opening)
+        if first_line_end == -1:
+            return None
+        closing = text.find(FENCE, first_line_end)
+        return None if closing == -1 else closing + len(FENCE)
+
+    def describe(self) -> dict:
+        return {"detector": "closing_fence"}
+
+
+class CsvRowCountDetector(CompletionDetector):
+    """Fires once ``expected_rows`` complete CSV rows have been emitted.
+
+    Only lines inside the answer's code block are rows, so a preamble such
+    as "Here is the table:" is never counted. Blank lines don't count, and a
+    row counts once its terminating newline has been generated.
+    """
+
+    def __init__(self, expected_rows: int):
+        """
+        Args:
+            expected_rows: Number of rows the answer should contain
+        """
+        if expected_rows < 1:
+            raise ValueError("expected_rows must be at least 1")
+        self.expected_rows = expected_rows
+
+    def find_end(self, text: str) -> Optional[int]:
+        opening = text.find(FENCE)
+        if opening == -1:
+            return None
+        # Rows start on the line after the opening fence
+        position = text.find("\n", opening) + 1
+        if position == 0:
+            return None
+        rows = 0
+        while True:
+            line_end = text.find("\n", position)
+            if line_end == -1:
+                return None
+            line = text[position:line_end].strip()
+            position = line_end + 1
+            if line.startswith(FENCE):
+                # The block closed short of the expected rows
+                return None
+            if line:
+                rows += 1
+                if rows >= self.expected_rows:
+                    return line_end
+
+    def describe(self) -> dict:
+        return {"detector": "csv_rows", "expected_rows": self.expected_rows}
+
+
+class AnyCompletionDetector(CompletionDetector):
+    """Fires as soon as any of the wrapped detectors fires."""
+
+    def __init__(self, *detectors: CompletionDetector):
+        self.detectors = detectors
+
+    def find_end(self, text: str) -> Optional[int]:
+        ends = [end for end in (d.find_end(text) for d in self.detectors) if end is not None]
+        return min(ends) if ends else None
+
+    def describe(self) -> dict:
+        return {"detector": "any", "detectors": [d.describe() for d in self.detectors]}
+
+
+@dataclass
+class StreamResult:
+    """Outcome of one streamed completion."""
+
+    text: str
+    ttft_s: Optional[float]  # None if no token arrived
+    elapsed_s: float
+    chunks: int
+    stopped_early: bool
+    usage: Any = None  # Token usage, if the server sent it before the stream ended
+
+
+class StreamStats:
+    """Thread-safe running totals over streamed completions."""
+
+    def __init__(self):
+        self.requests = 0
+        self.stopped_early = 0
+        self.total_ttft_s = 0.0
+        self.total_elapsed_s = 0.0
+        self._ttft_count = 0
+        self._lock = threading.Lock()
+
+    def record(self, result: StreamResult) -> None:
+        """Record one completed stream."""
+        with self._lock:
+            self.requests += 1
+            self.stopped_early += result.stopped_early
+            self.total_elapsed_s += result.elapsed_s
+            if result.ttft_s is not None:
+                self.total_ttft_s += result.ttft_s
+                self._ttft_count += 1
+
+    @property
+    def mean_ttft_s(self) -> float:
+        """Average time to first token."""
+        return self.total_ttft_s / self._ttft_count if self._ttft_count else 0.0
+
+    @property
+    def mean_elapsed_s(self) -> float:
+        """Average time until the stream ended (or was stopped)."""
+        return self.total_elapsed_s / self.requests if self.requests else 0.0
@@ -0,0 +1,163 @@
+"""Structured output for table extraction.
+
+With known row headers the answer's shape is fixed: one line of data values
+per row header. ``TableSchema`` describes that shape as a JSON schema or a
+regular expression, which providers pass to constrained (guided) decoding so
+the model can only produce well-formed answers with exactly the expected rows.
+"""
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass
+
+STRUCTURED_MODES = ("json", "csv")
+
+
+def parse_row_headers(headers_csv: str, delimiter: str = " / ") -> tuple[str, ...]:
+    """Turn the row header CSV of a prompt into one unique label per row.
+
+    Rows that leave the first column empty belong to the group above them,
+    e.g. ``",W2 - height,"`` below ``"Dimensions,W1 - width 1,mm"`` becomes
+    ``"Dimensions / W2 - height"``.
+
+    Args:
+        headers_csv: Row headers as CSV, one table row per line
+        delimiter: Joins the levels of multi-level row headers
+
+    Returns:
+        Labels in table order
+    """
+    labels: list[str] = []
+    group = ""
+    for cells in csv.reader(io.StringIO(headers_csv.strip())):
+        cells = [cell.strip() for cell in cells]
+        if not any(cells):
+            continue
+        if cells[0]:
+            group = cells[0]
+        label = delimiter.join(part for part in [group, *cells[1:]] if part)
+        # Keep labels unique so they can serve as JSON keys
+        unique, n = label, 2
+        while unique in labels:
+            unique, n = f"{label} ({n})", n + 1
+        labels.append(unique)
+    return tuple(labels)
+
+
+def count_row_header_columns(headers_csv: str) -> int:
+    """Count the columns of the row header CSV of a prompt.
+
+    Args:
+        headers_csv: Row headers as CSV, one table row per line
+
+    Returns:
+        Cells in the widest row
+    """
+    return max((len(cells) for cells in csv.reader(io.StringIO(headers_csv.strip()))), default=0)
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """Shape of a table answer: data values for each known row header.
+
+    Args:
+        row_headers: Row labels (see ``parse_row_headers``)
+        mode: "json" (an object mapping each row label to its values) or
+            "csv" (one comma-separated line of values per row)
+        max_columns: Most data columns a row may have
+        max_cell_length: Most characters in a single value
+    """
+
+    row_headers: tuple[str, ...]
+    mode: str = "json"
+    max_columns: int = 12
+    max_cell_length: int = 40
+
+    def __post_init__(self):
+        if self.mode not in STRUCTURED_MODES:
+            raise ValueError(
+                f"Invalid structured output mode: {self.mode}. "
+                f"Must be one of {', '.join(STRUCTURED_MODES)}"
+            )
+        if not self.row_headers:
+            raise ValueError("At least one row header is required")
+
+    def json_schema(self) -> dict:
+        """JSON schema of the answer in "json" mode."""
+        row = {
+            "type": "array",
+            "items": {"type": "string", "maxLength": self.max_cell_length},
+            "maxItems": self.max_columns,
+        }
+        return {
+            "type": "object",
+            "properties": {label: row for label in self.row_headers},
+            "required": list(self.row_headers),
+            "additionalProperties": False,
+        }
+
+    def regex(self) -> str:
+        """Regular expression of the answer in "csv" mode."""
+        cell = f"[^,\\n\"]{{0,{self.max_cell_length}}}"
+        row = f"{cell}(?:,{cell}){{0,{self.max_columns - 1}}}"
+        return f"(?:{row}\\n){{{len(self.row_headers) - 1}}}{row}"
+
+    def instructions(self) -> str:
+        """Answer format description to append to the prompt.
+
+        Constrained decoding enforces the format either way; telling the
+        model about it keeps the values it picks sensible.
+        """
+        if self.mode == "json":
+            return (
+                "Answer with a JSON object only. Use these row headers as keys, in "
+                "this order, and give each a list with the row's data values as "
+                "strings (one per data column, empty string if a cell is blank): "
+                + json.dumps(list(self.row_headers))
+            )
+        return (
+            f"Answer with exactly {len(self.row_headers)} lines of CSV and nothing "
+            "else: one line per row header, in order, holding only that row's data "
+            "values separated by commas (leave a value empty if the cell is blank)."
+        )
+
+    def parse(self, text: str) -> list[list[str]]:
+        """Parse an answer into one list of data values per row header.
+
+        Args:
+            text: Model output in this schema's mode
+
+        Returns:
+            Data values per row, in row header order
+
+        Raises:
+            ValueError: If the answer doesn't match the schema
+        """
+        if self.mode == "json":
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Answer is not valid JSON: {e}") from e
+            if not isinstance(data, dict):
+                raise ValueError("Answer is not a JSON object")
+            missing = [label for label in self.row_headers if label not in data]
+            if missing:
+                raise ValueError(f"Answer is missing rows: {', '.join(missing)}")
+            return [[str(value) for value in data[label]] for label in self.row_headers]
+
+        if not re.fullmatch(self.regex(), text.strip("\n")):
+            raise ValueError(
+                f"Answer is not {len(self.row_headers)} lines of CSV values"
+            )
+        return [line.split(",") for line in text.strip("\n").split("\n")]
+
+    def describe(self) -> dict:
+        """Settings of the schema (used in cache keys)."""
+        return {
+            "mode": self.mode,
+            "row_headers": list(self.row_headers),
+            "max_columns": self.max_columns,
+            "max_cell_length": self.max_cell_length,
+        }
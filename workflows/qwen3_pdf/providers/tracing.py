@@ -0,0 +1,306 @@
+"""Span tracing and metrics export for the PDF OCR workflow.
+
+Stages of the workflow and the providers (planning, rendering, image
+encoding, API round-trips, generation, decoding, ...) are timed as spans on
+the active ``Tracer``. Finished spans can be appended to a JSONL trace file
+and are aggregated into per-stage histograms, which together with counters
+(tokens, pages) are exported in the Prometheus text format, either as a file
+(e.g. for the node exporter's textfile collector) or over HTTP.
+
+Example:
+    tracer = Tracer(trace_path=Path("trace.jsonl"))
+    previous = set_tracer(tracer)
+    with get_tracer().span("render", pdf="a.pdf"):
+        ...
+    tracer.write_prometheus(Path("metrics.prom"))
+    set_tracer(previous)
+"""
+
+import contextvars
+import cProfile
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "qwen3_pdf"
+
+# Span of the enclosing ``Tracer.span`` block, for parent links
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """A timed stage; attributes added with ``set`` end up in the trace file."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    started: float  # Unix time
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes to the span (e.g. payload size, token counts)."""
+        self.attributes.update(attributes)
+
+
+class _Histogram:
+    """Cumulative duration histogram of one stage."""
+
+    def __init__(self):
+        self.buckets = [0] * len(STAGE_BUCKETS)
+        self.count = 0
+        self.items = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float, items: int) -> None:
+        self.count += 1
+        self.items += items
+        self.total += seconds
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+class Tracer:
+    """Collects spans and counters; thread-safe.
+
+    Stages overlap (rendering, image writes and inference run concurrently,
+    API requests run side by side), so per-stage totals show where the work
+    goes rather than a breakdown of wall time.
+    """
+
+    def __init__(self, trace_path: Optional[Path] = None):
+        """
+        Args:
+            trace_path: JSONL file every finished span is appended to. None
+                keeps only the aggregated metrics
+        """
+        self.trace_path = trace_path
+        self._histograms: dict[str, _Histogram] = {}
+        self._counters: dict[str, dict[tuple[tuple[str, str], ...], float]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._trace_file = None
+        if trace_path is not None:
+            trace_path.parent.mkdir(parents=True, exist_ok=True)
+            self._trace_file = open(trace_path, "a", encoding="utf-8")
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @contextmanager
+    def span(self, name: str, items: int = 1, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as one ``name`` span.
+
+        Args:
+            name: Stage name
+            items: Number of pages (or other units) the span covers
+            **attributes: Extra fields for the trace file
+
+        Yields:
+            The span, so attributes known only later can be added
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            started=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span, time.perf_counter() - started, items)
+
+    def record(self, name: str, seconds: float, items: int = 1, **attributes: Any) -> None:
+        """Record a span timed elsewhere (e.g. waits on a generator)."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            started=time.time() - seconds,
+            attributes=attributes,
+        )
+        self._finish(span, seconds, items)
+
+    def _finish(self, span: Span, seconds: float, items: int) -> None:
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = _Histogram()
+            histogram.observe(seconds, items)
+            if self._trace_file is not None:
+                record = {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start": span.started,
+                    "duration_s": seconds,
+                    "items": items,
+                    "thread": threading.current_thread().name,
+                    **span.attributes,
+                }
+                self._trace_file.write(json.dumps(record, default=str) + "\n")
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add ``value`` to a counter (e.g. ``count("tokens", 812, kind="prompt")``)."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter."""
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def stage_summary(self) -> dict[str, dict[str, float]]:
+        """Total seconds, span count, item count and mean seconds per item of every stage."""
+        with self._lock:
+            return {
+                name: {
+                    "seconds": histogram.total,
+                    "spans": histogram.count,
+                    "items": histogram.items,
+                    "mean_s": histogram.total / histogram.items if histogram.items else 0.0,
+                }
+                for name, histogram in self._histograms.items()
+            }
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        metric = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {metric} Time spent per span in each workflow stage",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                stage = _escape(name)
+                for bound, count in zip(STAGE_BUCKETS, histogram.buckets):
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+            for name, series in sorted(self._counters.items()):
+                counter = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {counter} counter")
+                for labels, value in sorted(series.items()):
+                    label_text = ",".join(f'{key}="{_escape(v)}"' for key, v in labels)
+                    lines.append(f"{counter}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write the metrics to a file, replacing it atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(path.suffix + ".tmp")
+        temporary.write_text(self.prometheus_text(), encoding="utf-8")
+        temporary.replace(path)
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve the metrics at ``http://host:port/metrics`` from a background thread.
+
+        Listens on localhost only by default; pass ``host="0.0.0.0"`` to let
+        a Prometheus server on another machine scrape the endpoint.
+        """
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002 - silence access logs
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        ).start()
+
+    def close(self) -> None:
+        """Stop the metrics server and close the trace file."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_active_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """The tracer spans are currently recorded on."""
+    return _active_tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Make ``tracer`` the active tracer.
+
+    Returns:
+        The previously active tracer, to restore afterwards
+    """
+    global _active_tracer
+    previous, _active_tracer = _active_tracer, tracer
+    return previous
+
+
+@contextmanager
+def profile(path: Optional[Path]) -> Iterator[None]:
+    """Profile the enclosed block with cProfile and dump the stats to ``path``.
+
+    Depending on the Python version, cProfile may only see the calling
+    thread. To see the render, image writer and request threads as well, run
+    the workflow under a sampling profiler instead, e.g.
+    ``py-spy record --threads -o profile.svg -- python pdf_workflow.py``
+    (threads are named after their stage).
+
+    Args:
+        path: Where to write the stats (readable with ``pstats`` or
+            snakeviz). None disables profiling
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
@@ -1,8 +1,14 @@
 """VLLM provider for locally hosted vision-language models."""
 
-from typing import Optional
+from typing import Any, Callable, Optional
 
+import openai
+
+from .load_balancer import LoadBalancer, normalize_endpoint
 from .openai_compatible import OpenAICompatibleProvider
+from .payload import PayloadEncoder
+from .streaming import CompletionDetector
+from .structured import TableSchema
 
 
 class VLLMProvider(OpenAICompatibleProvider):
@@ -13,6 +19,12 @@ class VLLMProvider(OpenAICompatibleProvider):
 
     VLLM typically doesn't require an API key for local deployments.
 
+    With several ``endpoints`` (replicas serving the same model), each request
+    goes to the healthy replica with the fewest outstanding requests, and
+    ``max_in_flight`` applies per replica, so throughput grows with the number
+    of replicas. Replicas are health-checked in the background; see
+    ``LoadBalancer``.
+
     Documentation: https://docs.vllm.ai/en/latest/
     """
 
@@ -24,6 +36,13 @@ class VLLMProvider(OpenAICompatibleProvider):
         api_key: Optional[str] = None,
         max_tokens: int = 1024,
         temperature: float = 0.1,
+        max_in_flight: int = 32,
+        payload_encoder: Optional[PayloadEncoder] = None,
+        endpoints: Optional[list[str]] = None,
+        health_check_interval: float = 10.0,
+        stream: bool = False,
+        completion_detector: Optional[CompletionDetector] = None,
+        structured_output: Optional[TableSchema] = None,
     ):
         """Initialize the VLLM provider.
 
@@ -34,19 +53,112 @@ class VLLMProvider(OpenAICompatibleProvider):
             api_key: API key if VLLM server requires authentication (default: "dummy")
             max_tokens: Maximum tokens to generate in response
             temperature: Sampling temperature (0.0 to 2.0)
+            max_in_flight: Maximum number of concurrent requests per server
+            payload_encoder: How images are encoded for requests (default: send as-is)
+            endpoints: Replica addresses ("host:port" or URLs). If given,
+                ``host``/``port`` are ignored and requests are load balanced
+            health_check_interval: Seconds between replica health checks
+            stream: Stream completions and record time-to-first-token
+            completion_detector: Stops a streamed completion once the answer
+                is complete (enables streaming)
+            structured_output: Constrain answers to this table schema with
+                VLLM's guided decoding (JSON schema or regex)
         """
-        # Construct base URL from host and port
-        base_url = f"http://{host}:{port}/v1"
+        # Construct base URLs from the replica list, or from host and port
+        base_urls = [normalize_endpoint(e) for e in endpoints or [f"{host}:{port}"]]
 
         # Use "dummy" as default API key for local VLLM servers
         resolved_api_key = api_key or "dummy"
 
+        self.balancer: Optional[LoadBalancer] = None
+        if len(base_urls) > 1:
+            self.balancer = LoadBalancer(
+                base_urls,
+                api_key=resolved_api_key,
+                max_connections=max_in_flight,
+                health_check_interval=health_check_interval,
+            )
+
+        if self.balancer is not None:
+            provider_name = f"VLLM ({len(base_urls)} replicas)"
+        elif endpoints:
+            provider_name = f"VLLM ({base_urls[0]})"
+        else:
+            provider_name = f"VLLM ({host}:{port})"
+
         # Initialize the parent OpenAI-compatible provider
         super().__init__(
-            base_url=base_url,
+            base_url=base_urls[0],
             api_key=resolved_api_key,
             model_name=model_name,
             max_tokens=max_tokens,
             temperature=temperature,
-            provider_name=f"VLLM ({host}:{port})",
+            max_in_flight=max_in_flight * len(base_urls),
+            payload_encoder=payload_encoder,
+            provider_name=provider_name,
+            stream=stream,
+            completion_detector=completion_detector,
+            structured_output=structured_output,
         )
+        if self.balancer is not None:
+            for base_url in base_urls:
+                print(f"  Replica: {base_url}")
+
+    def _structured_output_kwargs(self) -> dict[str, Any]:
+        """Guided decoding options of the VLLM server (JSON schema or regex)."""
+        if self.structured_output is None:
+            return {}
+        if self.structured_output.mode == "json":
+            guide = {"guided_json": self.structured_output.json_schema()}
+        else:
+            guide = {"guided_regex": self.structured_output.regex()}
+        return {"extra_body": guide}
+
+    @property
+    def _requires_event_loop(self) -> bool:
+        """Replica load is tracked on the background event loop."""
+        return self.balancer is not None or super()._requires_event_loop
+
+    async def _create_completion(
+        self,
+        messages: list[dict[str, Any]],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        """Send the request to the least loaded replica.
+
+        Requests that fail because a replica is down or erroring are retried
+        once on each of the other replicas. A stream that already delivered
+        text is not retried: the caller has seen its deltas, and a second
+        answer would repeat them.
+        """
+        if self.balancer is None:
+            return await super()._create_completion(messages, on_delta)
+
+        delivered = False
+
+        def forward(delta: str) -> None:
+            nonlocal delivered
+            delivered = True
+            on_delta(delta)
+
+        tried: set[str] = set()
+        while True:
+            try:
+                async with self.balancer.route(exclude=tried) as endpoint:
+                    tried.add(endpoint.base_url)
+                    return await self._request(
+                        endpoint.client, messages, forward if on_delta else None
+                    )
+            except (openai.APIConnectionError, openai.InternalServerError):
+                if delivered or len(tried) >= len(self.balancer.base_urls):
+                    raise
+
+    async def _aclose(self) -> None:
+        """Also stop the health checks and close the replica clients."""
+        await super()._aclose()
+        if self.balancer is not None:
+            await self.balancer.aclose()
+
+    def endpoint_stats(self) -> dict[str, dict]:
+        """Per-replica latency, throughput and health (empty with one server)."""
+        return self.balancer.stats() if self.balancer is not None else {}
@@ -0,0 +1,293 @@
+"""Full-text search over the OCR outputs of a workflow output folder.
+
+The index is a SQLite FTS5 database stored in the output folder next to the
+job manifest. The workflow adds every page as its ``imageN.txt`` is written,
+so finding a cube mark or lab reference doesn't mean grepping tens of
+thousands of files. ``sync`` brings the index up to date with files written
+before it existed (or edited by hand) by re-reading only the files whose size
+or mtime changed.
+
+The text is indexed with the trigram tokenizer, so any substring of at least
+three characters matches, case-insensitively (e.g. ``1234`` finds
+``CM-1234``), like grep.
+
+Query from the workflow folder:
+
+    python search_index.py "CM-1234"
+    python search_index.py --sync "lab ref 22/001"
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import argparse
+import re
+import sqlite3
+import sys
+import threading
+
+from config import DEFAULT_OUTPUT_FOLDER
+
+INDEX_FILENAME = "search_index.sqlite"
+
+# Trigram tokens: shorter search terms can't match anything
+MIN_TERM_LENGTH = 3
+
+_PAGE_TEXT = re.compile(r"image(\d+)\.txt")
+
+
+def index_path(output_folder: Path) -> Path:
+    """Location of the search index of an output folder."""
+    return Path(output_folder) / INDEX_FILENAME
+
+
+def page_number(text_path: Path) -> Optional[int]:
+    """Page number of an ``imageN.txt`` output, or None for other files."""
+    match = _PAGE_TEXT.fullmatch(text_path.name)
+    return int(match.group(1)) if match else None
+
+
+def find_text_files(output_folder: Path) -> list[Path]:
+    """All ``imageN.txt`` outputs below an output folder, by folder and page."""
+    paths = [
+        path for path in Path(output_folder).rglob("image*.txt") if page_number(path) is not None
+    ]
+    return sorted(paths, key=lambda path: (path.parent, page_number(path)))
+
+
+def to_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching pages that contain every term.
+
+    Raises:
+        ValueError: If there are no terms or a term is too short to match
+    """
+    terms = text.split()
+    if not terms:
+        raise ValueError("Empty search")
+    short = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    if short:
+        raise ValueError(
+            f"Search terms need at least {MIN_TERM_LENGTH} characters: {' '.join(short)}"
+        )
+    # Quoted terms are matched literally (FTS5 operators and punctuation included)
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """A page matching a search."""
+
+    folder: Path  # Absolute result folder of the page
+    page: int
+    snippet: str  # Matching text, with the matches in [brackets]
+
+    @property
+    def text_path(self) -> Path:
+        return self.folder / f"image{self.page}.txt"
+
+
+class SearchIndex:
+    """Full-text index of the ``imageN.txt`` outputs of one output folder.
+
+    Example:
+        index = SearchIndex(output_folder)
+        index.sync()  # pick up pages written without the index
+        for hit in index.search("CM-1234"):
+            print(hit.text_path, hit.snippet)
+    """
+
+    def __init__(self, output_folder: Path):
+        """Open (or create) the index in the output folder.
+
+        Args:
+            output_folder: Workflow output folder the index belongs to
+        """
+        self.root = Path(output_folder)
+        self.path = index_path(self.root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written from the workflow's inference loop, read by viewers
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                folder TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                UNIQUE (folder, page)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                text, tokenize = 'trigram'
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _folder_key(self, folder: Path) -> str:
+        return folder.relative_to(self.root).as_posix()
+
+    def _upsert(self, text_path: Path, text: str) -> None:
+        """Index a page's text, replacing what was indexed for it before."""
+        stat = text_path.stat()
+        folder = self._folder_key(text_path.parent)
+        page = page_number(text_path)
+        row = self._conn.execute(
+            "SELECT id FROM pages WHERE folder = ? AND page = ?", (folder, page)
+        ).fetchone()
+        if row is None:
+            page_id = self._conn.execute(
+                "INSERT INTO pages (folder, page, mtime, size) VALUES (?, ?, ?, ?)",
+                (folder, page, stat.st_mtime, stat.st_size),
+            ).lastrowid
+        else:
+            page_id = row[0]
+            self._conn.execute(
+                "UPDATE pages SET mtime = ?, size = ? WHERE id = ?",
+                (stat.st_mtime, stat.st_size, page_id),
+            )
+            self._conn.execute("DELETE FROM page_text WHERE rowid = ?", (page_id,))
+        self._conn.execute("INSERT INTO page_text (rowid, text) VALUES (?, ?)", (page_id, text))
+
+    def add_page(self, text_path: Path, text: str) -> None:
+        """Index a page whose output was just written.
+
+        Args:
+            text_path: The page's ``imageN.txt`` inside the output folder
+            text: Its contents
+        """
+        with self._lock:
+            self._upsert(text_path, text)
+            self._conn.commit()
+
+    def sync(self) -> dict[str, int]:
+        """Update the index from the output folder's ``imageN.txt`` files.
+
+        Only files that are new or whose size or mtime changed are read;
+        pages whose file is gone are dropped.
+
+        Returns:
+            Counts of added, updated and removed pages
+        """
+        on_disk = {
+            (self._folder_key(path.parent), page_number(path)): path
+            for path in find_text_files(self.root)
+        }
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        with self._lock:
+            known = {
+                (folder, page): (page_id, mtime, size)
+                for page_id, folder, page, mtime, size in self._conn.execute(
+                    "SELECT id, folder, page, mtime, size FROM pages"
+                )
+            }
+            for key, path in on_disk.items():
+                stat = path.stat()
+                row = known.get(key)
+                if row is not None and row[1] == stat.st_mtime and row[2] == stat.st_size:
+                    continue
+                self._upsert(path, path.read_text(encoding="utf-8", errors="replace"))
+                counts["added" if row is None else "updated"] += 1
+            for key, (page_id, _, _) in known.items():
+                if key not in on_disk:
+                    self._conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+                    self._conn.execute("DELETE FROM page_text WHERE rowid = ?", (page_id,))
+                    counts["removed"] += 1
+            self._conn.commit()
+        return counts
+
+    def pages(self) -> list[tuple[Path, int]]:
+        """Indexed pages as (absolute folder, page number), by folder and page."""
+        with self._lock:
+            rows = self._conn.execute("SELECT folder, page FROM pages").fetchall()
+        return sorted((self.root / folder, page) for folder, page in rows)
+
+    def search(
+        self, query: str, limit: Optional[int] = 20, order: str = "rank"
+    ) -> list[SearchHit]:
+        """Find the pages containing every term of ``query``.
+
+        Args:
+            query: Search terms (at least ``MIN_TERM_LENGTH`` characters each)
+            limit: Most hits returned (None for all)
+            order: "rank" (best match first, BM25) or "page" (by folder and page)
+
+        Returns:
+            The matching pages
+
+        Raises:
+            ValueError: If the query has no usable terms
+        """
+        order_by = {"rank": "bm25(page_text)", "page": "pages.folder, pages.page"}[order]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pages.folder, pages.page,"
+                " snippet(page_text, 0, '[', ']', '...', 48)"
+                " FROM page_text JOIN pages ON pages.id = page_text.rowid"
+                f" WHERE page_text MATCH ? ORDER BY {order_by} LIMIT ?",
+                (to_match_query(query), -1 if limit is None else limit),
+            ).fetchall()
+        return [
+            SearchHit(self.root / folder, page, " ".join(snippet.split()))
+            for folder, page, snippet in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the OCR outputs of a workflow run")
+    parser.add_argument(
+        "query",
+        nargs="?",
+        help=f"Text to find; pages containing every term (of {MIN_TERM_LENGTH}+ characters) match",
+    )
+    parser.add_argument(
+        "--output-folder",
+        type=Path,
+        default=DEFAULT_OUTPUT_FOLDER,
+        help=f"Workflow output folder to search (default: {DEFAULT_OUTPUT_FOLDER})",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Update the index from the output folder's text files before searching",
+    )
+    parser.add_argument("--limit", type=int, default=20, help="Most hits shown (default: 20)")
+    args = parser.parse_args()
+
+    output_folder = args.output_folder.resolve()
+    if not output_folder.exists():
+        print(f"Error: Output folder not found: {output_folder}")
+        sys.exit(1)
+    if not args.sync and args.query is None:
+        parser.error("give a query, --sync, or both")
+
+    index = SearchIndex(output_folder)
+    try:
+        if args.sync:
+            counts = index.sync()
+            print(
+                f"Index: {counts['added']} added, {counts['updated']} updated, "
+                f"{counts['removed']} removed ({len(index)} page(s))"
+            )
+        if args.query is not None:
+            try:
+                hits = index.search(args.query, limit=args.limit)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            for hit in hits:
+                print(f"{hit.text_path.relative_to(output_folder)}: {hit.snippet}")
+            if not hits:
+                print(f"No pages match {args.query!r}")
+    finally:
+        index.close()
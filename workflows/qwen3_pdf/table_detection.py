@@ -0,0 +1,192 @@
+"""Table region detection and cropping before inference.
+
+The prompt asks the model to ignore everything but the table, yet a whole
+page spends most of its vision tokens on letterheads, signatures and
+whitespace. ``find_table_regions`` locates ruled tables on a rendered page
+with projection profiles: pixel rows that are mostly dark are horizontal
+rulings, rulings close together form a table, and the dark pixel columns
+within that band give its left and right edges. No model is involved.
+
+``TableCropper`` runs in the render processes: it renders the page at a low
+detection resolution, finds the table regions and clips the page to them, so
+the crop is rendered at the full target resolution instead of the whole page
+(a higher effective DPI for the same pixel budget). Pages without a ruled
+table are rendered whole. The clip is kept with the page (see ``crop_info``)
+so results can be mapped back to page coordinates.
+"""
+
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Optional
+import json
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from converter import PagePlan
+from providers.resolution import ResolutionPlanner
+
+# A region as (x0, y0, x1, y1), in pixels or points depending on context
+Box = tuple[float, float, float, float]
+
+
+def find_table_regions(
+    gray: np.ndarray,
+    dark_threshold: int = 160,
+    min_line_fraction: float = 0.25,
+    max_row_gap_fraction: float = 0.08,
+    min_lines: int = 3,
+) -> list[tuple[int, int, int, int]]:
+    """Find ruled tables in a grayscale page image.
+
+    Args:
+        gray: H x W grayscale pixels (0 = black)
+        dark_threshold: Pixels darker than this count as ink
+        min_line_fraction: Share of a pixel row (or column) that must be ink
+            for it to count as a ruling line
+        max_row_gap_fraction: Largest gap between rulings of the same table,
+            as a fraction of the page height
+        min_lines: Fewest horizontal rulings a table must have
+
+    Returns:
+        Pixel boxes (x0, y0, x1, y1) of the tables, top to bottom
+    """
+    height, width = gray.shape
+    dark = gray < dark_threshold
+    line_rows = np.flatnonzero(dark.mean(axis=1) >= min_line_fraction)
+    if len(line_rows) < min_lines:
+        return []
+
+    regions = []
+    # Rulings further apart than the largest row gap belong to different tables
+    splits = np.flatnonzero(np.diff(line_rows) > max_row_gap_fraction * height) + 1
+    for group in np.split(line_rows, splits):
+        # Adjacent pixel rows are one (thick) line
+        lines = 1 + np.count_nonzero(np.diff(group) > 1)
+        if lines < min_lines:
+            continue
+        top, bottom = int(group[0]), int(group[-1]) + 1
+        band = dark[top:bottom]
+        # Vertical rulings give the table's sides; borderless sides fall back
+        # to the extent of the horizontal rulings
+        line_columns = np.flatnonzero(band.mean(axis=0) >= min_line_fraction)
+        if len(line_columns) < 2:
+            line_columns = np.flatnonzero(dark[group].any(axis=0))
+        if len(line_columns) == 0:
+            continue
+        regions.append((int(line_columns[0]), top, int(line_columns[-1]) + 1, bottom))
+    return regions
+
+
+def union(boxes: list[Box]) -> Box:
+    """Smallest box containing all ``boxes``."""
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+@dataclass(frozen=True)
+class TableCropper:
+    """Clips page plans to the detected table regions (a ``PlanRefiner``).
+
+    Example:
+        cropper = TableCropper(planner=ResolutionPlanner(target_longest_side=1800))
+        for page in renderer.render(pdf_path, plans, refine=cropper):
+            ...  # page.clip is the rendered area in points, or None
+    """
+
+    planner: Optional[ResolutionPlanner] = None  # Sizes the crop; None uses target_longest_side
+    target_longest_side: int = 1800  # Crop resolution without a planner
+    detection_longest_side: int = 1000  # Resolution the regions are detected at
+    margin: float = 12.0  # Points added around the regions
+    min_area_fraction: float = 0.02  # Smaller regions are ignored (e.g. stray rules)
+    dark_threshold: int = 160
+    min_line_fraction: float = 0.25
+
+    def describe(self) -> dict:
+        """Settings that change the rendered image (used in render keys)."""
+        settings = asdict(self)
+        settings["planner"] = asdict(self.planner) if self.planner is not None else None
+        return settings
+
+    def detect(self, page: fitz.Page) -> list[Box]:
+        """Table regions of a page, in points."""
+        rect = page.rect
+        zoom = self.detection_longest_side / max(rect.width, rect.height)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+        gray = gray[:, : pix.width]
+        boxes = []
+        for x0, y0, x1, y1 in find_table_regions(
+            gray,
+            dark_threshold=self.dark_threshold,
+            min_line_fraction=self.min_line_fraction,
+        ):
+            if (x1 - x0) * (y1 - y0) < self.min_area_fraction * pix.width * pix.height:
+                continue
+            boxes.append(
+                (
+                    rect.x0 + x0 / zoom,
+                    rect.y0 + y0 / zoom,
+                    rect.x0 + x1 / zoom,
+                    rect.y0 + y1 / zoom,
+                )
+            )
+        return boxes
+
+    def __call__(self, page: fitz.Page, plan: PagePlan) -> PagePlan:
+        """Clip a page's plan to its tables, or leave it unchanged if there are none."""
+        boxes = self.detect(page)
+        if not boxes:
+            return plan
+        rect = page.rect
+        x0, y0, x1, y1 = union(boxes)
+        clip = (
+            max(rect.x0, x0 - self.margin),
+            max(rect.y0, y0 - self.margin),
+            min(rect.x1, x1 + self.margin),
+            min(rect.y1, y1 + self.margin),
+        )
+        width, height = clip[2] - clip[0], clip[3] - clip[1]
+        if self.planner is not None:
+            pixel_size = self.planner.plan(width, height)
+            dpi = round(max(pixel_size) / max(width, height) * 72)
+        else:
+            pixel_size = None
+            dpi = int(self.target_longest_side / max(width, height) * 72)
+        return replace(plan, clip=clip, dpi=dpi, pixel_size=pixel_size)
+
+
+def crop_info(
+    page_size: tuple[float, float], clip: Box, image_size: tuple[int, int]
+) -> dict:
+    """Describe a crop so image coordinates can be mapped back to the page.
+
+    Args:
+        page_size: Page (width, height) in points
+        clip: Rendered area (x0, y0, x1, y1) in points
+        image_size: (width, height) of the rendered crop in pixels
+
+    Returns:
+        JSON-serializable crop description (see ``to_page_coordinates``)
+    """
+    return {
+        "page_size_pt": list(page_size),
+        "clip_pt": list(clip),
+        "image_size_px": list(image_size),
+    }
+
+
+def to_page_coordinates(crop: dict, x: float, y: float) -> tuple[float, float]:
+    """Map a pixel position in a cropped image to points on the PDF page."""
+    x0, y0, x1, y1 = crop["clip_pt"]
+    width, height = crop["image_size_px"]
+    return x0 + x * (x1 - x0) / width, y0 + y * (y1 - y0) / height
+
+
+def write_crop_info(path: Path, crop: dict) -> None:
+    """Write a crop description as the JSON sidecar of a page image."""
+    path.write_text(json.dumps(crop, indent=2), encoding="utf-8")
@@ -0,0 +1,719 @@
+"""
+Text-anchored two-stage table extraction.
+
+Instead of asking for the whole table in one answer, every page goes through
+the passes described in ``.proposal``:
+
+1. Header pass: the row headers as a flat JSON list (multi-level headers
+   joined with a delimiter). Skipped when the row headers are predefined.
+2. Column pass: the data column names, left to right. Skipped when the
+   columns are predefined.
+3. Row pass: one request per row header for exactly that row's values as a
+   single CSV line. Row requests run concurrently, ``concurrency`` at a time.
+4. Validation: every row must have one value per column and pass the
+   optional per-column patterns; a row the model can't find is reported
+   with a sentinel.
+5. Targeted retries: only failing rows are asked again, first with the page
+   re-rendered at a higher resolution, then with a fallback (bigger) model.
+
+Each page yields the table as JSON and CSV plus a quality report listing
+failed validations and the retries performed.
+
+Run from the workflow folder:
+
+    python table_pipeline.py --provider vllm --pdf-folder ../../data/pdfs
+"""
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+
+import numpy as np
+from PIL import Image
+
+from converter import PageRenderer, plan_pages
+from pdf_workflow import build_provider, build_resolution_planner
+from providers import BaseProvider, CachedProvider, available_providers
+from providers.base import ImageInput, load_image
+from providers.structured import parse_row_headers
+from providers.resolution import ResolutionPlanner
+from providers.tracing import get_tracer
+from config import (
+    CACHE_ENABLED,
+    CACHE_MAX_BYTES,
+    CACHE_PATH,
+    DEFAULT_OUTPUT_FOLDER,
+    DEFAULT_PDF_FOLDER,
+    DEFAULT_PROVIDER,
+    MIN_PIXELS,
+    PATCH_FACTOR,
+    RENDER_WORKERS,
+    STRUCTURED_OUTPUT,
+    TABLE_COLUMNS,
+    TABLE_COLUMN_VALIDATORS,
+    TABLE_FALLBACK_MODEL,
+    TABLE_FALLBACK_PROVIDER,
+    TABLE_HEADER_DELIMITER,
+    TABLE_PREDEFINED_ROWS,
+    TABLE_RETRY_LONGEST_SIDE,
+    TABLE_RETRY_STRATEGIES,
+    TABLE_ROW_CONCURRENCY,
+    TABLE_ROW_HEADERS,
+    TARGET_LONGEST_SIDE,
+)
+
+# Answer of a row request when the row header isn't on the page
+ROW_NOT_FOUND = "__ROW_NOT_FOUND__"
+
+# Retry strategies, applied in the configured order to the rows still failing
+RETRY_STRATEGIES = ("higher_dpi", "fallback_model")
+
+HEADER_PROMPT = """There is one table in this image.
+
+TASK: Extract only the row headers as a flat list where each header is standalone.
+If headers are multi-level or merged, concatenate levels with "{delimiter}".
+
+Return STRICT JSON only:
+{{"rows":[{{"row_id":"R1","header":"..."}},{{"row_id":"R2","header":"..."}}]}}
+
+Rules:
+- Ignore all numeric data values and the rest of the document.
+- Preserve text verbatim; do not correct spelling.
+- Do not include data cells.
+- Never include digits unless they are part of the header text itself."""
+
+COLUMN_PROMPT = """From this table image, extract the column headers of the data columns left-to-right.
+
+Return STRICT JSON only:
+{"columns":["Col1","Col2","Col3"]}
+
+Rules:
+- Only names of data columns (no row header column, no sample values or counts).
+- Preserve literal text; no normalization beyond trimming."""
+
+ROW_PROMPT = """The image shows a table. Extract ONE row.
+
+Row header to find (exact text or closest visually aligned header on the left):
+{header}
+
+Column schema (left-to-right):
+{columns}
+
+Output ONLY the row's data cells as a single CSV line with EXACTLY {count} fields.
+Rules:
+- Copy text verbatim (digits/punctuation).
+- Represent empty or merged cells as empty fields.
+- No spaces around commas. No quotes. No explanations.
+- If the row cannot be found, output: {not_found}"""
+
+
+@dataclass
+class RowIssue:
+    """A failed validation of one row (or one of its cells)."""
+
+    kind: str  # "missing", "field_count", "validator" or "request"
+    message: str
+    column: Optional[str] = None
+
+
+@dataclass
+class TableRow:
+    """One row of the extracted table."""
+
+    row_id: str
+    header: str
+    cells: list[str] = field(default_factory=list)
+    issues: list[RowIssue] = field(default_factory=list)
+
+
+@dataclass
+class QualityReport:
+    """What failed validation and which retries were performed."""
+
+    missing_rows: list[str] = field(default_factory=list)
+    field_count_mismatches: list[str] = field(default_factory=list)
+    validator_errors: list[dict] = field(default_factory=list)
+    failed_requests: list[str] = field(default_factory=list)
+    retries: list[dict] = field(default_factory=list)
+    requests: int = 0
+
+
+@dataclass
+class TableResult:
+    """Extracted table of one page."""
+
+    columns: list[str]
+    rows: list[TableRow]
+    report: QualityReport
+
+    @property
+    def valid(self) -> bool:
+        """Whether every row passed validation."""
+        return not any(row.issues for row in self.rows)
+
+    def to_json(self) -> dict:
+        """The table as ``{columns, rows: [{row_id, header, cells}], issues}``."""
+        return {
+            "columns": self.columns,
+            "rows": [
+                {"row_id": row.row_id, "header": row.header, "cells": row.cells}
+                for row in self.rows
+            ],
+            "issues": [
+                {"row_id": row.row_id, "message": issue.message}
+                for row in self.rows
+                for issue in row.issues
+            ],
+        }
+
+    def to_csv(self) -> str:
+        """The table as CSV: a header line, then one line per row."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(["", *self.columns])
+        for row in self.rows:
+            # Keep the table rectangular even for rows that failed validation
+            cells = (row.cells + [""] * len(self.columns))[: len(self.columns)]
+            writer.writerow([row.header, *cells])
+        return buffer.getvalue()
+
+
+def parse_json_answer(text: str) -> dict:
+    """Parse a JSON object answer, tolerating code fences and surrounding prose.
+
+    Raises:
+        ValueError: If the answer holds no JSON object
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("Answer holds no JSON object")
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Answer is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Answer is not a JSON object")
+    return data
+
+
+def parse_headers(text: str) -> list[str]:
+    """Row headers from a header pass answer (``{"rows": [{"header": ...}]}``)."""
+    rows = parse_json_answer(text).get("rows")
+    if not isinstance(rows, list):
+        raise ValueError('Answer has no "rows" list')
+    headers = [
+        str(row.get("header", "") if isinstance(row, dict) else row).strip() for row in rows
+    ]
+    headers = [header for header in headers if header]
+    if not headers:
+        raise ValueError("Answer lists no row headers")
+    return headers
+
+
+def parse_columns(text: str) -> list[str]:
+    """Column names from a column pass answer (``{"columns": [...]}``)."""
+    columns = parse_json_answer(text).get("columns")
+    if not isinstance(columns, list) or not columns:
+        raise ValueError('Answer has no "columns" list')
+    return [str(column).strip() for column in columns]
+
+
+def parse_row(text: str) -> Optional[list[str]]:
+    """Cells of a row pass answer, or None if the model reported the row missing."""
+    lines = [
+        line.strip()
+        for line in text.strip().splitlines()
+        if line.strip() and not line.strip().startswith("```")
+    ]
+    if not lines or lines[0] == ROW_NOT_FOUND:
+        return None
+    return [cell.strip() for cell in next(csv.reader([lines[0]]))]
+
+
+def _encode_once(image: ImageInput) -> ImageInput:
+    """Encode an in-memory page as PNG bytes once for all of its requests.
+
+    API providers send encoded bytes as they are, so a page asked about row by
+    row isn't re-encoded for every request, and ``CachedProvider`` hashes the
+    same bytes object only once across the header, column and row passes.
+    """
+    if isinstance(image, (Image.Image, np.ndarray)):
+        buffer = io.BytesIO()
+        load_image(image).save(buffer, format="PNG")
+        return buffer.getvalue()
+    return image
+
+
+class TablePipeline:
+    """Extracts a table from page images with header, column and row passes.
+
+    Example:
+        pipeline = TablePipeline(provider, fallback_provider=bigger_provider)
+        result = pipeline.extract(image, retry_image=lambda: render_at_600_dpi())
+        Path("table.json").write_text(json.dumps(result.to_json()))
+    """
+
+    def __init__(
+        self,
+        provider: BaseProvider,
+        fallback_provider: Optional[BaseProvider] = None,
+        row_headers: Optional[list[str]] = None,
+        columns: Optional[list[str]] = None,
+        validators: Optional[dict[str, str]] = None,
+        concurrency: int = 8,
+        retry_strategies: tuple[str, ...] = RETRY_STRATEGIES,
+        header_delimiter: str = " | ",
+    ):
+        """
+        Args:
+            provider: Provider answering every pass
+            fallback_provider: Provider (e.g. a bigger model) for the
+                "fallback_model" retry strategy
+            row_headers: Predefined row headers; skips the header pass
+            columns: Predefined data column names; skips the column pass
+            validators: Column name -> regular expression every non-empty
+                value of that column must match
+            concurrency: Row requests handed to the provider at once
+            retry_strategies: Retries of failing rows, in order
+            header_delimiter: Joins the levels of multi-level row headers
+        """
+        unknown = set(retry_strategies) - set(RETRY_STRATEGIES)
+        if unknown:
+            raise ValueError(
+                f"Unknown retry strategies: {', '.join(sorted(unknown))}. "
+                f"Must be among {', '.join(RETRY_STRATEGIES)}"
+            )
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.provider = provider
+        self.fallback_provider = fallback_provider
+        self.row_headers = row_headers
+        self.columns = columns
+        self.validators = {
+            column: re.compile(pattern) for column, pattern in (validators or {}).items()
+        }
+        self.concurrency = concurrency
+        self.retry_strategies = retry_strategies
+        self.header_delimiter = header_delimiter
+
+    def extract(
+        self, image: ImageInput, retry_image: Optional[Callable[[], ImageInput]] = None
+    ) -> TableResult:
+        """Extract the table of one page.
+
+        Args:
+            image: The page image
+            retry_image: Renders the page at a higher resolution for the
+                "higher_dpi" retry strategy; called at most once, and only if
+                a retry needs it
+
+        Returns:
+            The table with its quality report
+
+        Raises:
+            ValueError: If the row headers or columns can't be read from the
+                page even after retries
+        """
+        report = QualityReport()
+        attempts = _Attempts(self, _encode_once(image), retry_image)
+
+        if self.row_headers is not None:
+            headers = list(self.row_headers)
+        else:
+            prompt = HEADER_PROMPT.format(delimiter=self.header_delimiter)
+            with get_tracer().span("table_headers"):
+                headers = self._ask_structure("headers", prompt, parse_headers, attempts, report)
+        if self.columns is not None:
+            columns = list(self.columns)
+        else:
+            with get_tracer().span("table_columns"):
+                columns = self._ask_structure(
+                    "columns", COLUMN_PROMPT, parse_columns, attempts, report
+                )
+
+        rows = [TableRow(f"R{i + 1}", header) for i, header in enumerate(headers)]
+        provider, page = attempts.initial()
+        with get_tracer().span("table_rows", items=len(rows)):
+            self._extract_rows(rows, columns, provider, page, report)
+
+        # Retry only the rows that failed, keeping the previous answer unless
+        # the retry passes validation
+        for strategy in self.retry_strategies:
+            failing = [row for row in rows if row.issues]
+            if not failing:
+                break
+            attempt = attempts.get(strategy)
+            if attempt is None:
+                continue
+            retried = [TableRow(row.row_id, row.header) for row in failing]
+            with get_tracer().span("table_retry", items=len(retried), strategy=strategy):
+                self._extract_rows(retried, columns, *attempt, report)
+            for row, retry in zip(failing, retried):
+                success = not retry.issues
+                if success:
+                    row.cells, row.issues = retry.cells, []
+                report.retries.append(
+                    {"row_id": row.row_id, "strategy": strategy, "success": success}
+                )
+
+        for row in rows:
+            for issue in row.issues:
+                if issue.kind == "missing":
+                    report.missing_rows.append(row.row_id)
+                elif issue.kind == "field_count":
+                    report.field_count_mismatches.append(row.row_id)
+                elif issue.kind == "request":
+                    report.failed_requests.append(row.row_id)
+                else:
+                    report.validator_errors.append(
+                        {"row_id": row.row_id, "column": issue.column, "reason": issue.message}
+                    )
+            get_tracer().count("table_rows", status="invalid" if row.issues else "valid")
+        return TableResult(columns=columns, rows=rows, report=report)
+
+    def _ask_structure(
+        self,
+        name: str,
+        prompt: str,
+        parse: Callable[[str], list[str]],
+        attempts: "_Attempts",
+        report: QualityReport,
+    ) -> list[str]:
+        """Run a header or column pass, falling back to the retry strategies."""
+        error: Exception = ValueError(f"No attempt to read the {name}")
+        for strategy in ("initial", *self.retry_strategies):
+            attempt = attempts.initial() if strategy == "initial" else attempts.get(strategy)
+            if attempt is None:
+                continue
+            provider, page = attempt
+            report.requests += 1
+            try:
+                values = parse(provider.process_image(page, prompt))
+            except Exception as e:
+                error = e
+                if strategy != "initial":
+                    report.retries.append({"row_id": name, "strategy": strategy, "success": False})
+                continue
+            if strategy != "initial":
+                report.retries.append({"row_id": name, "strategy": strategy, "success": True})
+            return values
+        raise ValueError(f"Could not read the table {name}: {error}")
+
+    def _extract_rows(
+        self,
+        rows: list[TableRow],
+        columns: list[str],
+        provider: BaseProvider,
+        page: ImageInput,
+        report: QualityReport,
+    ) -> None:
+        """Ask for every row's values and validate the answers in place."""
+        prompts = [
+            ROW_PROMPT.format(
+                header=row.header,
+                columns=json.dumps(columns),
+                count=len(columns),
+                not_found=ROW_NOT_FOUND,
+            )
+            for row in rows
+        ]
+        # Bounded concurrency: at most ``concurrency`` row requests at once
+        for start in range(0, len(rows), self.concurrency):
+            chunk = rows[start : start + self.concurrency]
+            results = provider.process_many(
+                [page] * len(chunk), prompts[start : start + self.concurrency]
+            )
+            report.requests += len(chunk)
+            for row, result in zip(chunk, results):
+                row.cells, row.issues = self._validate(result, columns)
+
+    def _validate(
+        self, answer: str | Exception, columns: list[str]
+    ) -> tuple[list[str], list[RowIssue]]:
+        """Check a row answer against the column schema and validators."""
+        if isinstance(answer, Exception):
+            return [], [RowIssue("request", f"Request failed: {answer}")]
+        cells = parse_row(answer)
+        if cells is None:
+            return [], [RowIssue("missing", "Row not found on the page")]
+        if len(cells) != len(columns):
+            return cells, [
+                RowIssue("field_count", f"Expected {len(columns)} fields, got {len(cells)}")
+            ]
+        issues = []
+        for column, cell in zip(columns, cells):
+            pattern = self.validators.get(column)
+            if cell and pattern is not None and not pattern.fullmatch(cell):
+                issues.append(
+                    RowIssue("validator", f"{cell!r} doesn't match {pattern.pattern!r}", column)
+                )
+        return cells, issues
+
+
+class _Attempts:
+    """Provider and page image for the first attempt and each retry strategy."""
+
+    def __init__(
+        self,
+        pipeline: TablePipeline,
+        page: ImageInput,
+        retry_image: Optional[Callable[[], ImageInput]],
+    ):
+        self._pipeline = pipeline
+        self._page = page
+        self._retry_image = retry_image
+        self._high_resolution: Optional[ImageInput] = None
+
+    def initial(self) -> tuple[BaseProvider, ImageInput]:
+        return self._pipeline.provider, self._page
+
+    def get(self, strategy: str) -> Optional[tuple[BaseProvider, ImageInput]]:
+        """Provider and image for a retry strategy, or None if it isn't available."""
+        if strategy == "higher_dpi":
+            if self._retry_image is None:
+                return None
+            if self._high_resolution is None:
+                with get_tracer().span("table_rerender"):
+                    self._high_resolution = _encode_once(self._retry_image())
+            return self._pipeline.provider, self._high_resolution
+        if self._pipeline.fallback_provider is None:
+            return None
+        return self._pipeline.fallback_provider, self._page
+
+
+def build_retry_planner() -> ResolutionPlanner | None:
+    """Resolution planner for "higher_dpi" retries, if patch-grid snapping is enabled."""
+    if build_resolution_planner() is None:
+        return None
+    return ResolutionPlanner(
+        target_longest_side=TABLE_RETRY_LONGEST_SIDE,
+        patch_factor=PATCH_FACTOR,
+        min_pixels=MIN_PIXELS,
+        max_pixels=TABLE_RETRY_LONGEST_SIDE * TABLE_RETRY_LONGEST_SIDE,
+    )
+
+
+def write_result(folder: Path, page_index: int, result: TableResult) -> None:
+    """Write ``tableN.json``, ``tableN.csv`` and ``tableN.quality.json`` for a page."""
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"table{page_index}.json").write_text(
+        json.dumps(result.to_json(), indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    (folder / f"table{page_index}.csv").write_text(result.to_csv(), encoding="utf-8")
+    (folder / f"table{page_index}.quality.json").write_text(
+        json.dumps(asdict(result.report), indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+
+
+def run(
+    pdf_folder: Path,
+    output_folder: Path,
+    pipeline: TablePipeline,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+) -> dict:
+    """Extract the table of every page of every PDF in a folder.
+
+    Returns:
+        Counts of pages with a valid table, with remaining issues, and failed
+    """
+    planner = build_resolution_planner()
+    retry_planner = build_retry_planner()
+    summary = {"valid": 0, "with_issues": 0, "failed": 0}
+    with PageRenderer(workers=RENDER_WORKERS) as renderer:
+        for pdf_path in sorted(pdf_folder.rglob("*.pdf")):
+            relative_path = pdf_path.relative_to(pdf_folder)
+            pdf_output_folder = output_folder / relative_path.parent / pdf_path.stem
+            if planner is not None:
+                plans = plan_pages(
+                    pdf_path, planner=planner, first_page=first_page, last_page=last_page
+                )
+            else:
+                plans = plan_pages(
+                    pdf_path,
+                    target_longest_side=TARGET_LONGEST_SIDE,
+                    first_page=first_page,
+                    last_page=last_page,
+                )
+
+            for page in renderer.render(pdf_path, plans):
+
+                def rerender(page_index: int = page.page_index) -> Image.Image:
+                    page_number = page_index + 1
+                    if retry_planner is not None:
+                        retry_plans = plan_pages(
+                            pdf_path,
+                            planner=retry_planner,
+                            first_page=page_number,
+                            last_page=page_number,
+                        )
+                    else:
+                        retry_plans = plan_pages(
+                            pdf_path,
+                            target_longest_side=TABLE_RETRY_LONGEST_SIDE,
+                            first_page=page_number,
+                            last_page=page_number,
+                        )
+                    return next(renderer.render(pdf_path, retry_plans)).image
+
+                label = f"{relative_path} page {page.page_index + 1}"
+                try:
+                    result = pipeline.extract(page.image, retry_image=rerender)
+                except Exception as e:
+                    # A failed page shouldn't take down the rest of the run
+                    print(f"Failed to extract the table of {label}: {e}")
+                    summary["failed"] += 1
+                    continue
+                write_result(pdf_output_folder, page.page_index, result)
+                if result.valid:
+                    summary["valid"] += 1
+                else:
+                    summary["with_issues"] += 1
+                    print(
+                        f"{label}: {sum(bool(row.issues) for row in result.rows)} of "
+                        f"{len(result.rows)} row(s) still failing after "
+                        f"{len(result.report.retries)} retry(ies)"
+                    )
+    return summary
+
+
+def load_schema(path: Path) -> tuple[list[str], dict[str, str]]:
+    """Read predefined columns and validators from ``{"columns": [...], "validators": {...}}``."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return parse_columns(json.dumps(data)), dict(data.get("validators") or {})
+
+
+def main() -> None:
+    """Main entry point for the table pipeline."""
+    parser = argparse.ArgumentParser(
+        description="Extract tables from PDFs with header, column and per-row passes"
+    )
+    parser.add_argument(
+        "--pdf-folder",
+        type=Path,
+        default=DEFAULT_PDF_FOLDER,
+        help=f"Path to folder containing PDF files (default: {DEFAULT_PDF_FOLDER})",
+    )
+    parser.add_argument(
+        "--output-folder",
+        type=Path,
+        default=DEFAULT_OUTPUT_FOLDER,
+        help=f"Path to output folder for results (default: {DEFAULT_OUTPUT_FOLDER})",
+    )
+    parser.add_argument(
+        "--provider",
+        type=str,
+        default=DEFAULT_PROVIDER,
+        choices=available_providers(),
+        help=f"OCR provider to use (default: {DEFAULT_PROVIDER})",
+    )
+    parser.add_argument(
+        "--fallback-provider",
+        type=str,
+        default=TABLE_FALLBACK_PROVIDER,
+        choices=available_providers(),
+        help="Provider retrying rows that still fail (default: TABLE_FALLBACK_PROVIDER)",
+    )
+    parser.add_argument(
+        "--fallback-model",
+        type=str,
+        default=TABLE_FALLBACK_MODEL,
+        help="Model of the fallback provider, e.g. a bigger one (default: TABLE_FALLBACK_MODEL)",
+    )
+    parser.add_argument("--first-page", type=int, default=1, help="First page (1-based)")
+    parser.add_argument("--last-page", type=int, default=None, help="Last page (1-based)")
+    parser.add_argument(
+        "--schema",
+        type=Path,
+        default=None,
+        help='JSON file with predefined {"columns": [...], "validators": {...}}; '
+        "skips the column pass",
+    )
+    parser.add_argument(
+        "--predefined-rows",
+        action=argparse.BooleanOptionalAction,
+        default=TABLE_PREDEFINED_ROWS,
+        help="Use TABLE_ROW_HEADERS from config.py instead of the header pass",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=TABLE_ROW_CONCURRENCY,
+        help=f"Row requests at once (default: {TABLE_ROW_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the OCR result cache",
+    )
+    args = parser.parse_args()
+
+    if STRUCTURED_OUTPUT is not None:
+        print("Error: the table pipeline sets its own answer formats; set STRUCTURED_OUTPUT = None")
+        sys.exit(1)
+    pdf_folder = args.pdf_folder.resolve()
+    if not any(pdf_folder.rglob("*.pdf")):
+        print(f"Error: No PDF files found in {pdf_folder}")
+        sys.exit(1)
+
+    columns, validators = TABLE_COLUMNS, dict(TABLE_COLUMN_VALIDATORS or {})
+    if args.schema is not None:
+        columns, schema_validators = load_schema(args.schema)
+        validators.update(schema_validators)
+
+    providers = [
+        CachedProvider(
+            build_provider(args.provider),
+            cache_path=CACHE_PATH,
+            max_bytes=CACHE_MAX_BYTES,
+            enabled=CACHE_ENABLED and not args.no_cache,
+        )
+    ]
+    if args.fallback_provider is not None:
+        providers.append(
+            CachedProvider(
+                build_provider(args.fallback_provider, model_name=args.fallback_model),
+                cache_path=CACHE_PATH,
+                max_bytes=CACHE_MAX_BYTES,
+                enabled=CACHE_ENABLED and not args.no_cache,
+            )
+        )
+    pipeline = TablePipeline(
+        providers[0],
+        fallback_provider=providers[1] if len(providers) > 1 else None,
+        row_headers=(
+            list(parse_row_headers(TABLE_ROW_HEADERS, delimiter=TABLE_HEADER_DELIMITER))
+            if args.predefined_rows
+            else None
+        ),
+        columns=columns,
+        validators=validators,
+        concurrency=args.concurrency,
+        retry_strategies=TABLE_RETRY_STRATEGIES,
+        header_delimiter=TABLE_HEADER_DELIMITER,
+    )
+    try:
+        summary = run(
+            pdf_folder,
+            args.output_folder.resolve(),
+            pipeline,
+            first_page=args.first_page,
+            last_page=args.last_page,
+        )
+    finally:
+        for provider in providers:
+            provider.close()
+    print(
+        f"Tables: {summary['valid']} valid, {summary['with_issues']} with issues, "
+        f"{summary['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Tests for the job manifest that lets interrupted runs resume."""
+
+import sqlite3
+
+import pytest
+
+from manifest import (
+    MANIFEST_FILENAME,
+    ROUTE_BLANK,
+    ROUTE_MODEL,
+    ROUTE_TEXT_LAYER,
+    JobManifest,
+    inference_key,
+    render_key,
+    route_key,
+)
+
+RENDER = render_key(dpi=200)
+MODEL = inference_key("prompt", {"provider": "test"})
+TEXT_LAYER = route_key(ROUTE_TEXT_LAYER, min_chars=200)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = JobManifest(tmp_path)
+    yield manifest
+    manifest.close()
+
+
+def finish(manifest, folder, page_index, key=MODEL, route=ROUTE_MODEL, write_text=True):
+    """Mark a page done, writing its text output like the workflow does."""
+    image_path = folder / f"image{page_index}.png"
+    if write_text:
+        image_path.with_suffix(".txt").write_text("text", encoding="utf-8")
+    manifest.mark_done("a.pdf", page_index, RENDER, image_path, key, route=route)
+
+
+def test_finished_pages_are_complete(manifest, tmp_path):
+    finish(manifest, tmp_path, 0)
+    finish(manifest, tmp_path, 1, key=TEXT_LAYER, route=ROUTE_TEXT_LAYER)
+    route_keys = {ROUTE_MODEL: MODEL, ROUTE_TEXT_LAYER: TEXT_LAYER}
+    assert manifest.completed_pages("a.pdf", {0: RENDER, 1: RENDER}, route_keys) == {0, 1}
+
+
+def test_other_inference_settings_redo_the_page(manifest, tmp_path):
+    finish(manifest, tmp_path, 0)
+    other = inference_key("another prompt", {"provider": "test"})
+    assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: other}) == set()
+
+
+def test_other_render_settings_redo_the_page(manifest, tmp_path):
+    finish(manifest, tmp_path, 0)
+    routes = {ROUTE_MODEL: MODEL}
+    assert manifest.completed_pages("a.pdf", {0: render_key(dpi=300)}, routes) == set()
+
+
+def test_disabled_route_redoes_the_page(manifest, tmp_path):
+    finish(manifest, tmp_path, 0, key=route_key(ROUTE_BLANK), route=ROUTE_BLANK)
+    # Blank skipping is off in this run, so the page goes to the model
+    assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: MODEL}) == set()
+
+
+def test_missing_text_output_redoes_the_page(manifest, tmp_path):
+    finish(manifest, tmp_path, 0, write_text=False)
+    assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: MODEL}) == set()
+
+
+def test_failed_and_rendered_pages_are_not_complete(manifest, tmp_path):
+    manifest.mark_rendered("a.pdf", 0, RENDER, tmp_path / "image0.png")
+    manifest.mark_failed("a.pdf", 1, RENDER, tmp_path / "image1.png", "boom")
+    (tmp_path / "image0.txt").write_text("stale", encoding="utf-8")
+    routes = {ROUTE_MODEL: MODEL}
+    assert manifest.completed_pages("a.pdf", {0: RENDER, 1: RENDER}, routes) == set()
+
+
+def test_late_render_record_keeps_the_done_status(manifest, tmp_path):
+    finish(manifest, tmp_path, 0)
+    # Images are saved in the background and may be recorded after the text
+    manifest.mark_rendered("a.pdf", 0, RENDER, tmp_path / "image0.png")
+    assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: MODEL}) == {0}
+
+
+def test_changed_pdf_forgets_its_pages(manifest, tmp_path):
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"first")
+    assert manifest.sync_pdf("a.pdf", pdf_path)
+    finish(manifest, tmp_path, 0)
+    assert not manifest.sync_pdf("a.pdf", pdf_path)
+    pdf_path.write_bytes(b"second version")
+    assert manifest.sync_pdf("a.pdf", pdf_path)
+    assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: MODEL}) == set()
+
+
+def test_manifest_without_routes_is_migrated(tmp_path):
+    conn = sqlite3.connect(tmp_path / MANIFEST_FILENAME)
+    conn.execute(
+        "CREATE TABLE pages (pdf TEXT NOT NULL, page_index INTEGER NOT NULL,"
+        " render_key TEXT NOT NULL, image_path TEXT NOT NULL, status TEXT NOT NULL,"
+        " infer_key TEXT, error TEXT, updated REAL NOT NULL, PRIMARY KEY (pdf, page_index))"
+    )
+    conn.execute(
+        "INSERT INTO pages VALUES ('a.pdf', 0, ?, ?, 'done', ?, NULL, 0)",
+        (RENDER, str(tmp_path / "image0.png"), MODEL),
+    )
+    conn.commit()
+    conn.close()
+    (tmp_path / "image0.txt").write_text("text", encoding="utf-8")
+
+    manifest = JobManifest(tmp_path)
+    try:
+        # Pages recorded without a route are redone once
+        assert manifest.completed_pages("a.pdf", {0: RENDER}, {ROUTE_MODEL: MODEL}) == set()
+        assert manifest.summary() == {"done": 1}
+    finally:
+        manifest.close()
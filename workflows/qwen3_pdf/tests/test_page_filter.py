@@ -0,0 +1,94 @@
+"""Tests for the blank and near-duplicate page filter."""
+
+import io
+
+from PIL import Image, ImageDraw
+
+from page_filter import PageFilter
+
+
+def form(values: list[int] | None = None, shift: int = 0) -> Image.Image:
+    """A ruled form page; each value is drawn as that many tally marks in its field."""
+    image = Image.new("RGB", (400, 520), "white")
+    draw = ImageDraw.Draw(image)
+    for field, count in enumerate(values or [0] * 10):
+        top = 20 + field * 50 + shift
+        draw.rectangle((20, top, 380, top + 40), outline="black", width=2)
+        draw.rectangle((30, top + 12, 150, top + 28), fill="black")  # the label
+        for mark in range(count):
+            x = 200 + mark * 12
+            draw.line((x, top + 8, x, top + 32), fill="black", width=3)
+    return image
+
+
+FILLED = [3, 1, 4, 1, 5, 2, 6, 2, 5, 3]
+
+
+def test_blank_page():
+    decision = PageFilter().check("blank", Image.new("RGB", (400, 520), "white"))
+    assert decision is not None and decision.reason == "blank"
+
+
+def test_blank_check_can_be_turned_off():
+    page_filter = PageFilter(skip_blank=False)
+    assert page_filter.check("blank", Image.new("RGB", (400, 520), "white")) is None
+
+
+def test_first_page_is_an_original():
+    assert PageFilter().check("a", form(FILLED)) is None
+
+
+def test_identical_page_reuses_the_original():
+    page_filter = PageFilter()
+    page_filter.check("a", form(FILLED))
+    decision = page_filter.check("b", form(FILLED))
+    assert decision is not None
+    assert decision.reason == "duplicate"
+    assert decision.duplicate_of == "a"
+    assert decision.unmatched_ink == 0
+
+
+def test_re_encoded_page_reuses_the_original():
+    buffer = io.BytesIO()
+    form(FILLED).save(buffer, format="JPEG", quality=95)
+    page_filter = PageFilter()
+    page_filter.check("a", form(FILLED))
+    decision = page_filter.check("b", buffer.getvalue())
+    assert decision is not None and decision.duplicate_of == "a"
+
+
+def test_filled_in_copy_of_the_same_template_is_inferred():
+    changed = list(FILLED)
+    changed[4] += 1
+    page_filter = PageFilter(max_distance=16)
+    page_filter.check("a", form(FILLED))
+    # The layout hashes alike, but the extra mark must not reuse page a's values
+    assert page_filter.check("b", form(changed)) is None
+
+
+def test_pages_that_needed_inference_become_originals():
+    changed = list(FILLED)
+    changed[0] = 0
+    page_filter = PageFilter(max_distance=16)
+    page_filter.check("a", form(FILLED))
+    page_filter.check("b", form(changed))
+    decision = page_filter.check("c", form(changed))
+    assert decision is not None and decision.duplicate_of == "b"
+
+
+def test_duplicate_check_can_be_turned_off():
+    page_filter = PageFilter(skip_duplicates=False)
+    page_filter.check("a", form(FILLED))
+    assert page_filter.check("b", form(FILLED)) is None
+
+
+def test_differently_sized_pages_are_not_duplicates():
+    page_filter = PageFilter(max_distance=16)
+    page_filter.check("a", form(FILLED))
+    assert page_filter.check("b", form(FILLED).resize((300, 390))) is None
+
+
+def test_describe_duplicate_settings():
+    settings = PageFilter(max_unmatched_ink=2).describe("duplicate")
+    assert settings["max_unmatched_ink"] == 2
+    assert "blank_max_ink_ratio" not in settings
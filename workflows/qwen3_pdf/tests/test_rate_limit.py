@@ -0,0 +1,152 @@
+"""Tests for the quota-aware request scheduler of the API providers."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from providers.rate_limit import AdaptiveConcurrencyLimiter, RateLimitScheduler, TokenBucket
+
+
+def rate_limit_error(retry_after: str | None = None) -> openai.RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("throttled", response=response, body=None)
+
+
+def response(total_tokens: int) -> SimpleNamespace:
+    return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+class Server:
+    """Answers requests after failing the first ``failures`` of them."""
+
+    def __init__(self, failures: list[Exception] | None = None, delay: float = 0.0):
+        self.failures = list(failures or [])
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def request(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                raise self.failures.pop(0)
+            return response(100)
+        finally:
+            self.in_flight -= 1
+
+
+def test_success_records_the_used_tokens():
+    scheduler = RateLimitScheduler(tokens_per_minute=60_000)
+    server = Server()
+    result = asyncio.run(scheduler.run(server.request, estimated_tokens=500))
+    assert result.usage.total_tokens == 100
+    assert (scheduler.stats.requests, scheduler.stats.tokens) == (1, 100)
+    assert scheduler.stats.retries == scheduler.stats.failures == 0
+
+
+def test_throttled_request_is_retried_and_halves_concurrency():
+    scheduler = RateLimitScheduler(max_concurrency=8, backoff_base=0.001)
+    server = Server([rate_limit_error(), rate_limit_error()])
+    asyncio.run(scheduler.run(server.request))
+    assert server.calls == 3
+    assert (scheduler.stats.throttled, scheduler.stats.retries) == (2, 2)
+    # The cooldown keeps the second throttle from halving the limit again
+    assert scheduler.summary()["concurrency_limit"] == 2
+
+
+def test_retry_after_is_honoured():
+    scheduler = RateLimitScheduler(backoff_base=60)
+    server = Server([rate_limit_error(retry_after="0.05")])
+    started = time.monotonic()
+    asyncio.run(scheduler.run(server.request))
+    assert 0.05 <= time.monotonic() - started < 5
+
+
+def test_gives_up_after_max_retries():
+    scheduler = RateLimitScheduler(max_retries=2, backoff_base=0.001)
+    server = Server([rate_limit_error() for _ in range(5)])
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(scheduler.run(server.request))
+    assert server.calls == 3
+    assert scheduler.stats.failures == 1
+
+
+def test_other_errors_are_not_retried():
+    scheduler = RateLimitScheduler(backoff_base=0.001)
+    server = Server([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(server.request))
+    assert server.calls == 1
+    assert scheduler.stats.retries == 0
+
+
+def test_concurrency_stays_within_the_limit():
+    scheduler = RateLimitScheduler(max_concurrency=3, initial_concurrency=3)
+    server = Server(delay=0.01)
+
+    async def run_all():
+        await asyncio.gather(*(scheduler.run(server.request) for _ in range(12)))
+
+    asyncio.run(run_all())
+    assert server.calls == 12
+    assert server.peak == 3
+
+
+def test_limiter_grows_after_limit_successes():
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial=2, maximum=3, cooldown=0)
+        for _ in range(2):
+            await limiter.on_success()
+        assert limiter.limit == 3
+        for _ in range(10):
+            await limiter.on_success()
+        assert limiter.limit == 3  # capped at the maximum
+        limiter.on_throttle()
+        assert limiter.limit == 1
+
+    asyncio.run(run())
+
+
+def test_token_bucket_paces_beyond_its_burst():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=600)  # 10 per second, burst of 10
+        started = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        await bucket.acquire()
+        return burst, time.monotonic() - started
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    assert total >= 0.09
+
+
+def test_requests_larger_than_the_bucket_stay_within_the_quota():
+    tokens_per_minute = 60_000  # 1000 per second, a bucket of 1000
+    scheduler = RateLimitScheduler(tokens_per_minute=tokens_per_minute)
+    admitted: list[float] = []
+
+    async def request():
+        admitted.append(time.monotonic())
+        return response(1200)
+
+    async def run_all():
+        for _ in range(3):
+            await scheduler.run(request, estimated_tokens=1500)
+
+    asyncio.run(run_all())
+    # After the first request's burst, tokens are admitted at the quota's rate
+    rate = 1200 * (len(admitted) - 1) / (admitted[-1] - admitted[0])
+    assert rate <= tokens_per_minute / 60 * 1.05
+    assert scheduler.stats.tokens == 3600
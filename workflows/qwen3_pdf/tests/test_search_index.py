@@ -0,0 +1,53 @@
+"""Tests for the full-text search index over the OCR outputs."""
+
+import pytest
+
+from search_index import SearchIndex, to_match_query
+
+
+class TestToMatchQuery:
+    def test_terms_are_quoted(self):
+        assert to_match_query("CM-1234 lab") == '"CM-1234" "lab"'
+
+    def test_operators_are_matched_literally(self):
+        assert to_match_query("NOT cube AND") == '"NOT" "cube" "AND"'
+
+    def test_quotes_are_escaped(self):
+        assert to_match_query('say "hello"') == '"say" """hello"""'
+
+    def test_whitespace_is_collapsed(self):
+        assert to_match_query("  lab\tref \n 22/001 ") == '"lab" "ref" "22/001"'
+
+    def test_empty_search(self):
+        with pytest.raises(ValueError, match="Empty"):
+            to_match_query("   ")
+
+    def test_short_terms_are_rejected(self):
+        with pytest.raises(ValueError, match="ab"):
+            to_match_query("cube ab")
+
+
+def write_page(folder, page, text):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"image{page}.txt"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_sync_and_search(tmp_path):
+    write_page(tmp_path / "a", 0, "Cube mark CM-1234, lab ref 22/001")
+    write_page(tmp_path / "a", 1, "Cube mark CM-9876")
+    write_page(tmp_path / "b", 0, "Nothing to see")
+    index = SearchIndex(tmp_path)
+    try:
+        assert index.sync() == {"added": 3, "updated": 0, "removed": 0}
+        assert index.sync() == {"added": 0, "updated": 0, "removed": 0}
+        hits = index.search("cm-1234 22/001")
+        assert [(hit.folder.name, hit.page) for hit in hits] == [("a", 0)]
+        # Substrings match, like grep
+        assert len(index.search("cube", order="page")) == 2
+        (tmp_path / "b" / "image0.txt").unlink()
+        assert index.sync()["removed"] == 1
+        assert index.pages() == [(tmp_path / "a", 0), (tmp_path / "a", 1)]
+    finally:
+        index.close()
@@ -0,0 +1,61 @@
+"""Tests for the completion detectors in providers/streaming.py."""
+
+import pytest
+
+from providers.streaming import (
+    AnyCompletionDetector,
+    ClosingFenceDetector,
+    CsvRowCountDetector,
+)
+
+
+class TestClosingFenceDetector:
+    def test_fires_at_the_closing_fence(self):
+        text = "```csv\na,b\n1,2\n```\nThat is the table."
+        end = ClosingFenceDetector().find_end(text)
+        assert text[:end] == "```csv\na,b\n1,2\n```"
+
+    def test_waits_for_the_opening_line_to_end(self):
+        assert ClosingFenceDetector().find_end("```csv") is None
+
+    def test_open_block_keeps_generating(self):
+        assert ClosingFenceDetector().find_end("```csv\na,b\n1,2\n") is None
+
+    def test_no_block_keeps_generating(self):
+        assert ClosingFenceDetector().find_end("a,b\n1,2\n") is None
+
+
+class TestCsvRowCountDetector:
+    def test_fires_after_the_last_row(self):
+        text = "```csv\na,b\n1,2\n3,4\n"
+        end = CsvRowCountDetector(3).find_end(text)
+        assert text[:end] == "```csv\na,b\n1,2\n3,4"
+
+    def test_row_counts_once_its_newline_arrives(self):
+        assert CsvRowCountDetector(3).find_end("```csv\na,b\n1,2\n3,4") is None
+
+    def test_preamble_is_not_counted(self):
+        text = "Here is the table:\n\nIt has two rows.\n```csv\na,b\n"
+        assert CsvRowCountDetector(2).find_end(text) is None
+
+    def test_blank_lines_are_not_counted(self):
+        text = "```csv\na,b\n\n\n1,2\n"
+        end = CsvRowCountDetector(2).find_end(text)
+        assert text[:end] == "```csv\na,b\n\n\n1,2"
+
+    def test_block_closed_short_of_the_rows(self):
+        assert CsvRowCountDetector(5).find_end("```csv\na,b\n```\n1,2\n3,4\n5,6\n") is None
+
+    def test_unfenced_answer_keeps_generating(self):
+        assert CsvRowCountDetector(1).find_end("a,b\n1,2\n") is None
+
+    def test_rejects_non_positive_rows(self):
+        with pytest.raises(ValueError):
+            CsvRowCountDetector(0)
+
+
+def test_any_detector_fires_at_the_earliest_end():
+    text = "```csv\na,b\n```\n"
+    detector = AnyCompletionDetector(CsvRowCountDetector(1), ClosingFenceDetector())
+    assert text[: detector.find_end(text)] == "```csv\na,b"
+    assert AnyCompletionDetector(CsvRowCountDetector(5)).find_end(text) is None
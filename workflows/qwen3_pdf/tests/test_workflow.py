@@ -0,0 +1,55 @@
+"""Tests for the setup and teardown of the batch workflow."""
+
+import socket
+
+import pytest
+
+import pdf_workflow
+from providers.base import BaseProvider
+from providers.tracing import get_tracer
+
+
+class StubProvider(BaseProvider):
+    def __init__(self):
+        self.closed = False
+
+    def process_image(self, image, prompt):
+        return ""
+
+    def close(self):
+        self.closed = True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_failed_setup_releases_what_it_opened(tmp_path, monkeypatch):
+    def fail():
+        raise RuntimeError("bad prompt")
+
+    monkeypatch.setattr(pdf_workflow, "build_prompt", fail)
+    provider = StubProvider()
+    tracer = get_tracer()
+    port = free_port()
+
+    with pytest.raises(RuntimeError, match="bad prompt"):
+        pdf_workflow.main(
+            tmp_path / "pdfs",
+            tmp_path / "out",
+            provider=provider,
+            use_cache=False,
+            update_search_index=True,
+            trace_path=None,
+            metrics_path=None,
+            metrics_port=port,
+            profile_path=None,
+        )
+
+    assert get_tracer() is tracer
+    assert provider.closed
+    # The metrics server no longer holds the port
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", port))
@@ -0,0 +1,148 @@
+"""Native text layer fast path for born-digital PDF pages.
+
+Born-digital pages carry their text, so rasterizing them and asking the
+model to read it back costs seconds of GPU time for something PyMuPDF returns
+in milliseconds. ``TextLayerReader`` decides per page whether the text layer
+is usable and, if so, extracts the page's tables as CSV code blocks (the
+format the model answers in) or, for pages without a table, the plain text.
+Scans, including scans with an OCR text layer on top of the page image, are
+left to the provider.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+import csv
+import io
+
+import fitz  # PyMuPDF
+
+
+@dataclass(frozen=True)
+class TextLayerInfo:
+    """What a page's text layer holds."""
+
+    chars: int  # Non-whitespace characters
+    image_coverage: float  # Share of the page area covered by images
+    invalid_ratio: float  # Share of characters PyMuPDF couldn't map to Unicode
+
+
+def inspect_page(page: fitz.Page) -> TextLayerInfo:
+    """Measure the text layer and image coverage of a page."""
+    text = page.get_text("text")
+    chars = sum(not char.isspace() for char in text)
+    invalid = text.count("�")
+    page_area = abs(page.rect) or 1.0
+    image_area = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        image_area += abs(bbox)
+    return TextLayerInfo(
+        chars=chars,
+        image_coverage=min(1.0, image_area / page_area),
+        invalid_ratio=invalid / chars if chars else 0.0,
+    )
+
+
+def table_to_csv(rows: list[list[Optional[str]]], skip_columns: int = 0) -> str:
+    """Format extracted table rows as CSV (empty cells stay empty).
+
+    Args:
+        rows: Table rows as extracted by PyMuPDF
+        skip_columns: Leading columns to drop (the row headers, which the
+            model's answers leave out)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([" ".join((cell or "").split()) for cell in row[skip_columns:]])
+    return buffer.getvalue()
+
+
+class TextLayerReader:
+    """Reads pages with a usable text layer without the model.
+
+    Example:
+        reader = TextLayerReader()
+        with fitz.open(pdf_path) as doc:
+            text = reader.read(doc[0])  # None: render and infer the page
+    """
+
+    def __init__(
+        self,
+        min_chars: int = 200,
+        max_image_coverage: float = 0.5,
+        max_invalid_ratio: float = 0.05,
+        extract_tables: bool = True,
+        row_header_columns: int = 1,
+    ):
+        """
+        Args:
+            min_chars: Fewest non-whitespace characters of a usable text layer
+            max_image_coverage: Pages whose images cover more of the page are
+                treated as scans
+            max_invalid_ratio: Largest share of unmappable characters (broken
+                font encodings) of a usable text layer
+            extract_tables: Whether to return the page's tables as CSV code
+                blocks instead of its plain text when it has any
+            row_header_columns: Leading table columns holding row headers;
+                they are dropped so the CSV has the data columns only, like
+                the model's answers
+        """
+        self.min_chars = min_chars
+        self.max_image_coverage = max_image_coverage
+        self.max_invalid_ratio = max_invalid_ratio
+        self.extract_tables = extract_tables
+        self.row_header_columns = row_header_columns
+
+    def describe(self) -> dict:
+        """Settings that decide which pages are read and how (used in manifest keys)."""
+        return {
+            "min_chars": self.min_chars,
+            "max_image_coverage": self.max_image_coverage,
+            "max_invalid_ratio": self.max_invalid_ratio,
+            "extract_tables": self.extract_tables,
+            "row_header_columns": self.row_header_columns,
+        }
+
+    def usable(self, info: TextLayerInfo) -> bool:
+        """Whether a page's text layer can replace inference."""
+        return (
+            info.chars >= self.min_chars
+            and info.image_coverage <= self.max_image_coverage
+            and info.invalid_ratio <= self.max_invalid_ratio
+        )
+
+    def read(self, page: fitz.Page) -> Optional[str]:
+        """Extract a page's tables or text.
+
+        Returns:
+            The page's output in the workflow's text format, or None if the
+            page has no usable text layer and needs inference
+        """
+        if not self.usable(inspect_page(page)):
+            return None
+        if self.extract_tables:
+            tables = [table.extract() for table in page.find_tables().tables]
+            tables = [rows for rows in tables if rows]
+            if tables:
+                return "\n\n".join(f"```csv\n{table_to_csv(rows, self.row_header_columns)}```" for rows in tables)
+        return page.get_text("text").strip()
+
+    def read_pages(self, pdf_path: str | Path, page_indices: Iterable[int]) -> dict[int, str]:
+        """Read the pages of a PDF that have a usable text layer.
+
+        Args:
+            pdf_path: Path to the PDF file
+            page_indices: Pages to check (0-based)
+
+        Returns:
+            Output text by page index, for the pages that need no inference
+        """
+        texts = {}
+        with fitz.open(str(pdf_path)) as doc:
+            for page_index in page_indices:
+                text = self.read(doc[page_index])
+                if text is not None:
+                    texts[page_index] = text
+        return texts
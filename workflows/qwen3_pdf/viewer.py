@@ -3,33 +3,252 @@ OCR Results Viewer GUI
 
 A simple tkinter-based GUI for browsing through OCR results folders.
 Displays images and their corresponding OCR text side-by-side with keyboard navigation.
+
+Every page of every result folder (``imageN.txt`` with its ``imageN.png``) is
+shown. Images are decoded and scaled by a background thread
+(``ImagePrefetcher``) for the pages around the current one, so navigation
+never waits on PNG decoding, even while an arrow key is held down.
+
+If the output folder has a search index (see search_index.py), the page list
+is read from it instead of scanning the folder tree, and the search box
+(Ctrl+F or /) jumps between the pages containing the search terms.
 """
 
 import tkinter as tk
 from tkinter import scrolledtext
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 from PIL import Image, ImageTk
 import argparse
 import sys
+import threading
+
+from search_index import SearchIndex, find_text_files, index_path, page_number
+
+# Pages decoded ahead of (and behind) the current one
+DEFAULT_PREFETCH = 4
+# Scaled images kept in memory
+DEFAULT_CACHE_SIZE = 32
+# Milliseconds a window resize must settle before images are rescaled
+RESIZE_DEBOUNCE_MS = 150
+# Milliseconds between checks for the current page's image while it is decoded
+IMAGE_POLL_MS = 10
+
+NAVIGATION_HELP = (
+    "Use ← → arrow keys (or A/D, Page Up/Down) to navigate | Home/End to jump | "
+    "Ctrl+F or / to search | Q to quit"
+)
+
+
+@dataclass(frozen=True)
+class PageEntry:
+    """One result page: ``imageN.txt`` and, if it was saved, ``imageN.png``."""
+
+    folder: Path
+    page: int
+
+    @property
+    def image_path(self) -> Path:
+        return self.folder / f"image{self.page}.png"
+
+    @property
+    def text_path(self) -> Path:
+        return self.folder / f"image{self.page}.txt"
+
+
+def find_pages(output_dir: Path) -> List[PageEntry]:
+    """
+    Recursively scan the output directory for result pages.
+
+    Args:
+        output_dir: Directory containing OCR result folders
+
+    Returns:
+        Pages sorted by folder, then page number
+    """
+    return [PageEntry(path.parent, page_number(path)) for path in find_text_files(output_dir)]
+
+
+def indexed_pages(index: SearchIndex) -> List[PageEntry]:
+    """
+    Read the result pages from a search index instead of scanning the folder.
+
+    Args:
+        index: Search index of the output directory
+
+    Returns:
+        Pages sorted by folder, then page number
+    """
+    return [PageEntry(folder, page) for folder, page in index.pages()]
+
+
+def fit_image(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """
+    Scale an image down to fit ``size``, keeping its aspect ratio (never upscaled).
+
+    The image is scaled in place (it may be a freshly opened file), except
+    for palette and other modes that are converted to RGB first.
+
+    Args:
+        image: Image to scale
+        size: (width, height) to fit
+
+    Returns:
+        The scaled image
+    """
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGB")
+    # Reduces by an integer factor first, then resamples with LANCZOS
+    image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+    return image
+
+
+class ImagePrefetcher:
+    """
+    Decodes and scales page images in a background thread.
+
+    Scaled images are kept in a bounded LRU cache keyed by path. ``prefetch``
+    replaces the queue of pending paths (most urgent first), so only the pages
+    around the latest position are decoded when navigation runs ahead.
+    Changing the target size drops the cache, as its images were scaled for
+    the old size.
+
+    Example:
+        prefetcher = ImagePrefetcher(cache_size=32)
+        prefetcher.set_target_size((700, 750))
+        prefetcher.prefetch([current, next_page, previous_page])
+        image = prefetcher.get(current)  # None until decoded
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            cache_size: Most scaled images kept in memory
+        """
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Path, Image.Image | Exception] = OrderedDict()
+        self._pending: List[Path] = []
+        self._target_size: Optional[tuple[int, int]] = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="image-prefetch", daemon=True)
+        self._worker.start()
+
+    @property
+    def target_size(self) -> Optional[tuple[int, int]]:
+        return self._target_size
+
+    def set_target_size(self, size: tuple[int, int]) -> bool:
+        """
+        Set the size images are scaled to fit.
+
+        Returns:
+            True if the size changed (and cached images were dropped)
+        """
+        with self._condition:
+            if size == self._target_size:
+                return False
+            self._target_size = size
+            self._cache.clear()
+            self._condition.notify()
+            return True
+
+    def prefetch(self, paths: List[Path]) -> None:
+        """Replace the pending work with ``paths``, most urgent first."""
+        with self._condition:
+            self._pending = [path for path in paths if path not in self._cache]
+            self._condition.notify()
+
+    def get(self, path: Path) -> Optional[Image.Image]:
+        """
+        Return the scaled image for ``path`` if it is ready.
+
+        Raises:
+            Exception: The error raised while decoding the image
+        """
+        with self._condition:
+            image = self._cache.get(path)
+            if image is None:
+                return None
+            self._cache.move_to_end(path)
+        if isinstance(image, Exception):
+            raise image
+        return image
+
+    def close(self) -> None:
+        """Stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and (not self._pending or self._target_size is None):
+                    self._condition.wait()
+                if self._closed:
+                    return
+                path = self._pending.pop(0)
+                size = self._target_size
+                if path in self._cache:
+                    continue
+
+            try:
+                with Image.open(path) as image:
+                    result: Image.Image | Exception = fit_image(image, size)
+            except Exception as e:
+                result = e
+
+            with self._condition:
+                # Discard the result if the window was resized meanwhile
+                if size != self._target_size:
+                    continue
+                self._cache[path] = result
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
 
 
 class OCRViewer:
     """GUI viewer for browsing OCR results folders."""
 
-    def __init__(self, output_dir: Path):
+    def __init__(
+        self,
+        output_dir: Path,
+        pages: Optional[List[PageEntry]] = None,
+        prefetch: int = DEFAULT_PREFETCH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        index: Optional[SearchIndex] = None,
+    ):
         """
         Initialize the OCR viewer.
 
         Args:
             output_dir: Path to the directory containing OCR result folders
+            pages: Pages to browse (default: scan ``output_dir``)
+            prefetch: Pages decoded ahead of and behind the current one
+            cache_size: Most scaled images kept in memory
+            index: Search index of ``output_dir``; without one, search is disabled
         """
         self.output_dir = output_dir
-        self.folders = self._get_valid_folders()
+        self.pages = pages if pages is not None else find_pages(output_dir)
         self.current_index = 0
+        self.prefetch = prefetch
+        self.index = index
 
-        if not self.folders:
-            raise ValueError(f"No valid folders found in {output_dir}")
+        # Page list positions of the current search's hits, in page order
+        self._search_query: Optional[str] = None
+        self._search_terms: List[str] = []
+        self._hits: List[int] = []
+        self._page_positions = {
+            (entry.folder, entry.page): position for position, entry in enumerate(self.pages)
+        }
+
+        if not self.pages:
+            raise ValueError(f"No result pages found in {output_dir}")
 
         # Initialize tkinter
         self.root = tk.Tk()
@@ -38,39 +257,39 @@ class OCRViewer:
 
         # Store current image reference to prevent garbage collection
         self.current_image = None
+        self.prefetcher = ImagePrefetcher(cache_size=max(cache_size, 2 * prefetch + 1))
+        self._resize_job: Optional[str] = None
+        self._poll_job: Optional[str] = None
 
         self._create_gui()
         self._bind_keys()
-        self._load_current_folder()
-
-    def _get_valid_folders(self) -> List[Path]:
-        """
-        Recursively scan output directory and return sorted list of valid folders.
-
-        Returns:
-            List of folder paths that contain both image0.png and image0.txt
-        """
-        folders = []
-        for folder in sorted(self.output_dir.rglob("*")):
-            if folder.is_dir():
-                image_file = folder / "image0.png"
-                text_file = folder / "image0.txt"
-                if image_file.exists() and text_file.exists():
-                    folders.append(folder)
-        return folders
+        self._load_current_page()
 
     def _create_gui(self) -> None:
         """Create the GUI layout."""
-        # Title bar
+        # Title bar, with the search box on the right
+        title_frame = tk.Frame(self.root, bg="#2c3e50")
+        title_frame.pack(fill=tk.X)
+
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(title_frame, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side=tk.RIGHT, padx=10)
+        search_label = tk.Label(
+            title_frame, text="Search:", font=("Arial", 10), bg="#2c3e50", fg="white"
+        )
+        search_label.pack(side=tk.RIGHT)
+        if self.index is None:
+            self.search_entry.config(state=tk.DISABLED)
+
         self.title_label = tk.Label(
-            self.root,
+            title_frame,
             text="",
             font=("Arial", 12, "bold"),
             bg="#2c3e50",
             fg="white",
             pady=10,
         )
-        self.title_label.pack(fill=tk.X)
+        self.title_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         # Main content frame
         content_frame = tk.Frame(self.root)
@@ -85,6 +304,7 @@ class OCRViewer:
 
         self.image_canvas = tk.Canvas(left_frame, bg="white")
         self.image_canvas.pack(fill=tk.BOTH, expand=True)
+        self.image_canvas.bind("<Configure>", self._on_canvas_resize)
 
         # Right panel - Text
         right_frame = tk.Frame(content_frame, relief=tk.SUNKEN, borderwidth=2)
@@ -97,11 +317,12 @@ class OCRViewer:
             right_frame, wrap=tk.WORD, font=("Courier", 10)
         )
         self.text_widget.pack(fill=tk.BOTH, expand=True)
+        self.text_widget.tag_configure("search_hit", background="#f1c40f")
 
         # Status bar
         self.status_label = tk.Label(
             self.root,
-            text="Use ← → arrow keys (or A/D) to navigate | Home/End to jump | Q to quit",
+            text=NAVIGATION_HELP,
             font=("Arial", 9),
             bg="#34495e",
             fg="white",
@@ -111,20 +332,40 @@ class OCRViewer:
 
     def _bind_keys(self) -> None:
         """Bind keyboard shortcuts."""
-        self.root.bind("<Left>", lambda e: self._navigate(-1))
-        self.root.bind("<Right>", lambda e: self._navigate(1))
-        self.root.bind("<a>", lambda e: self._navigate(-1))
-        self.root.bind("<d>", lambda e: self._navigate(1))
-        self.root.bind("<A>", lambda e: self._navigate(-1))
-        self.root.bind("<D>", lambda e: self._navigate(1))
-        self.root.bind("<Home>", lambda e: self._jump_to(0))
-        self.root.bind("<End>", lambda e: self._jump_to(len(self.folders) - 1))
-        self.root.bind("<q>", lambda e: self.root.quit())
-        self.root.bind("<Q>", lambda e: self.root.quit())
+        self._bind_shortcut("<Left>", lambda: self._navigate(-1))
+        self._bind_shortcut("<Right>", lambda: self._navigate(1))
+        self._bind_shortcut("<a>", lambda: self._navigate(-1))
+        self._bind_shortcut("<d>", lambda: self._navigate(1))
+        self._bind_shortcut("<A>", lambda: self._navigate(-1))
+        self._bind_shortcut("<D>", lambda: self._navigate(1))
+        self._bind_shortcut("<Home>", lambda: self._jump_to(0))
+        self._bind_shortcut("<End>", lambda: self._jump_to(len(self.pages) - 1))
+        self._bind_shortcut("<Prior>", lambda: self._navigate(-1))
+        self._bind_shortcut("<Next>", lambda: self._navigate(1))
+        self._bind_shortcut("<q>", self.root.quit)
+        self._bind_shortcut("<Q>", self.root.quit)
+
+        # Search
+        self._bind_shortcut("<slash>", self._focus_search)
+        self.root.bind("<Control-f>", lambda e: self._focus_search())
+        self.root.bind("<F3>", lambda e: self._next_hit(1))
+        self.root.bind("<Shift-F3>", lambda e: self._next_hit(-1))
+        self.search_entry.bind("<Return>", lambda e: self._next_hit(1))
+        self.search_entry.bind("<Shift-Return>", lambda e: self._next_hit(-1))
+        self.search_entry.bind("<Escape>", lambda e: self.image_canvas.focus_set())
+
+    def _bind_shortcut(self, sequence: str, action: Callable[[], object]) -> None:
+        """Bind a window-wide key that is left to the search box while it has focus."""
+
+        def handler(event: tk.Event) -> None:
+            if event.widget is not self.search_entry:
+                action()
+
+        self.root.bind(sequence, handler)
 
     def _navigate(self, direction: int) -> None:
         """
-        Navigate to next or previous folder.
+        Navigate to next or previous page.
 
         Args:
             direction: -1 for previous, 1 for next
@@ -133,89 +374,173 @@ class OCRViewer:
 
         # Wrap around at boundaries
         if new_index < 0:
-            new_index = len(self.folders) - 1
-        elif new_index >= len(self.folders):
+            new_index = len(self.pages) - 1
+        elif new_index >= len(self.pages):
             new_index = 0
 
         self.current_index = new_index
-        self._load_current_folder()
+        self._load_current_page()
 
     def _jump_to(self, index: int) -> None:
         """
-        Jump to specific folder index.
+        Jump to specific page index.
 
         Args:
-            index: Folder index to jump to
+            index: Page index to jump to
         """
         self.current_index = index
-        self._load_current_folder()
-
-    def _load_current_folder(self) -> None:
-        """Load and display the current folder's image and text."""
-        folder = self.folders[self.current_index]
-        folder_name = folder.relative_to(self.output_dir)
-
-        # Update title
-        title = f"Folder {self.current_index + 1}/{len(self.folders)}: {folder_name}"
-        self.title_label.config(text=title)
-
-        # Load and display image
-        self._load_image(folder / "image0.png")
-
-        # Load and display text
-        self._load_text(folder / "image0.txt")
+        self._load_current_page()
 
-    def _load_image(self, image_path: Path) -> None:
+    def _focus_search(self) -> None:
+        """Move the keyboard focus to the search box."""
+        if self.index is None:
+            self.status_label.config(
+                text="No search index: run search_index.py --sync or viewer.py --reindex"
+            )
+            return
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+
+    def _run_search(self, query: str) -> None:
+        """Look up the pages matching ``query`` in the index."""
+        hits = self.index.search(query, limit=None, order="page")
+        positions = (self._page_positions.get((hit.folder, hit.page)) for hit in hits)
+        self._hits = sorted(position for position in positions if position is not None)
+        self._search_query = query
+        self._search_terms = query.split()
+
+    def _next_hit(self, direction: int) -> None:
         """
-        Load and display image, scaled to fit canvas.
+        Jump to the next (or previous) page matching the search box's query.
+
+        The query is only looked up when it changed; the hits are then
+        stepped through relative to the current page, wrapping around.
 
         Args:
-            image_path: Path to the image file
+            direction: -1 for the previous hit, 1 for the next
         """
-        canvas_width = self.image_canvas.winfo_width()
-        canvas_height = self.image_canvas.winfo_height()
-
-        try:
-            # Open image
-            image = Image.open(image_path)
-
-            # Get canvas dimensions
-            self.root.update()  # Ensure canvas size is updated
-
-            # Calculate scaling to fit canvas while maintaining aspect ratio
-            if canvas_width > 1 and canvas_height > 1:  # Valid dimensions
-                image_width, image_height = image.size
-                scale_width = canvas_width / image_width
-                scale_height = canvas_height / image_height
-                scale = min(scale_width, scale_height, 1.0)  # Don't upscale
+        if self.index is None:
+            return
+        query = self.search_var.get().strip()
+        if query != self._search_query:
+            try:
+                self._run_search(query)
+            except ValueError as e:
+                self._search_query, self._search_terms, self._hits = None, [], []
+                self.status_label.config(text=str(e))
+                self._highlight_search_terms()
+                return
+            # Start at the current page itself if it matches
+            start = bisect_left(self._hits, self.current_index)
+        elif direction > 0:
+            start = bisect_right(self._hits, self.current_index)
+        else:
+            start = bisect_left(self._hits, self.current_index) - 1
+
+        if not self._hits:
+            self.status_label.config(text=f"No pages match {query!r}")
+            self._highlight_search_terms()
+            return
+        hit = start % len(self._hits)
+        self._jump_to(self._hits[hit])
+        self.status_label.config(
+            text=f"Hit {hit + 1}/{len(self._hits)} for {query!r} | "
+            "Enter/F3 next, Shift+Enter/Shift+F3 previous | Esc back to browsing"
+        )
 
-                new_width = int(image_width * scale)
-                new_height = int(image_height * scale)
+    def _load_current_page(self) -> None:
+        """Load and display the current page's image and text."""
+        entry = self.pages[self.current_index]
+        folder_name = entry.folder.relative_to(self.output_dir)
 
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Update title
+        title = (
+            f"Page {self.current_index + 1}/{len(self.pages)}: "
+            f"{folder_name} / {entry.image_path.name}"
+        )
+        self.title_label.config(text=title)
 
-            # Convert to PhotoImage
-            self.current_image = ImageTk.PhotoImage(image)
+        # Decode the current page first, then its neighbours
+        self.prefetcher.prefetch([page.image_path for page in self._prefetch_window()])
+        self._show_image()
 
-            # Clear canvas and display image
-            self.image_canvas.delete("all")
-            self.image_canvas.create_image(
-                canvas_width // 2,
-                canvas_height // 2,
-                image=self.current_image,
-                anchor=tk.CENTER,
-            )
+        # Load and display text
+        self._load_text(entry.text_path)
+
+    def _prefetch_window(self) -> List[PageEntry]:
+        """The current page followed by its neighbours, nearest first."""
+        count = len(self.pages)
+        indices = [self.current_index]
+        for distance in range(1, self.prefetch + 1):
+            for index in (self.current_index + distance, self.current_index - distance):
+                # Navigation wraps around at the ends
+                if index % count not in indices:
+                    indices.append(index % count)
+        return [self.pages[index] for index in indices]
+
+    def _on_canvas_resize(self, event: tk.Event) -> None:
+        """Rescale images once the canvas size has settled."""
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(
+            RESIZE_DEBOUNCE_MS, self._apply_canvas_size, event.width, event.height
+        )
 
+    def _apply_canvas_size(self, width: int, height: int) -> None:
+        """Scale images to the new canvas size, if it actually changed."""
+        self._resize_job = None
+        if width <= 1 or height <= 1:
+            return
+        if self.prefetcher.set_target_size((width, height)):
+            self._load_current_page()
+
+    def _show_image(self) -> None:
+        """Display the current page's image, polling until it is decoded."""
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.prefetcher.target_size is None:
+            return  # Shown once the canvas has its size
+        canvas_width, canvas_height = self.prefetcher.target_size
+
+        entry = self.pages[self.current_index]
+        try:
+            image = self.prefetcher.get(entry.image_path)
+        except FileNotFoundError:
+            self._show_message("No image saved for this page", "gray")
+            return
         except Exception as e:
             # Display error message on canvas
+            self._show_message(f"Error loading image:\n{str(e)}", "red")
+            return
+        if image is None:
+            # Don't leave the previous page's image next to this page's text
             self.image_canvas.delete("all")
-            self.image_canvas.create_text(
-                canvas_width // 2,
-                canvas_height // 2,
-                text=f"Error loading image:\n{str(e)}",
-                fill="red",
-                font=("Arial", 12),
-            )
+            self._poll_job = self.root.after(IMAGE_POLL_MS, self._show_image)
+            return
+
+        # Convert to PhotoImage
+        self.current_image = ImageTk.PhotoImage(image)
+
+        # Clear canvas and display image
+        self.image_canvas.delete("all")
+        self.image_canvas.create_image(
+            canvas_width // 2,
+            canvas_height // 2,
+            image=self.current_image,
+            anchor=tk.CENTER,
+        )
+
+    def _show_message(self, message: str, color: str) -> None:
+        """Display a message in place of the image."""
+        self.image_canvas.delete("all")
+        self.image_canvas.create_text(
+            self.image_canvas.winfo_width() // 2,
+            self.image_canvas.winfo_height() // 2,
+            text=message,
+            fill=color,
+            font=("Arial", 12),
+        )
 
     def _load_text(self, text_path: Path) -> None:
         """
@@ -231,15 +556,42 @@ class OCRViewer:
             # Clear and update text widget
             self.text_widget.delete(1.0, tk.END)
             self.text_widget.insert(1.0, text_content)
+            self._highlight_search_terms()
 
         except Exception as e:
             # Display error message
             self.text_widget.delete(1.0, tk.END)
             self.text_widget.insert(1.0, f"Error loading text:\n{str(e)}")
 
+    def _highlight_search_terms(self) -> None:
+        """Highlight the current search's terms in the text, scrolled to the first."""
+        self.text_widget.tag_remove("search_hit", 1.0, tk.END)
+        first = None
+        length = tk.IntVar()
+        for term in self._search_terms:
+            start = "1.0"
+            while True:
+                start = self.text_widget.search(
+                    term, start, stopindex=tk.END, nocase=True, count=length
+                )
+                if not start:
+                    break
+                end = f"{start}+{length.get()}c"
+                self.text_widget.tag_add("search_hit", start, end)
+                if first is None or self.text_widget.compare(start, "<", first):
+                    first = start
+                start = end
+        if first is not None:
+            self.text_widget.see(first)
+
     def run(self) -> None:
         """Start the GUI event loop."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.prefetcher.close()
+            if self.index is not None:
+                self.index.close()
 
 
 def main() -> None:
@@ -259,6 +611,23 @@ def main() -> None:
         action="store_true",
         help="Use default path (../../data/output/)",
     )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        help=f"Pages decoded ahead of and behind the current one (default: {DEFAULT_PREFETCH})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Scaled images kept in memory (default: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Create or update the search index from the result files before starting",
+    )
 
     args = parser.parse_args()
 
@@ -280,29 +649,49 @@ def main() -> None:
         print("  python viewer.py --help             # Show help")
         sys.exit(1)
 
-    # Check if directory has any valid folders (search recursively)
-    valid_folders = []
-    for folder in output_dir.rglob("*"):
-        if folder.is_dir():
-            if (folder / "image0.png").exists() and (folder / "image0.txt").exists():
-                valid_folders.append(folder)
+    # Read the pages from the search index if there is one, else scan the tree
+    index = None
+    if args.reindex or index_path(output_dir).exists():
+        index = SearchIndex(output_dir)
+        if args.reindex:
+            counts = index.sync()
+            print(
+                f"Search index: {counts['added']} added, {counts['updated']} updated, "
+                f"{counts['removed']} removed"
+            )
+        pages = indexed_pages(index)
+    else:
+        pages = find_pages(output_dir)
 
-    if not valid_folders:
+    if not pages:
         print(f"Error: No valid OCR result folders found in: {output_dir}")
-        print("\nValid folders should contain both 'image0.png' and 'image0.txt'")
+        print("\nValid folders should contain 'imageN.txt' files (and their 'imageN.png')")
         print("Please run pdf_workflow.py first to generate results.")
+        if index is not None and not args.reindex:
+            print(f"If the results predate {index.path.name}, start with --reindex.")
         sys.exit(1)
 
+    folders = sorted({page.folder for page in pages})
     print(f"Loading OCR results from: {output_dir}")
-    print(f"Found {len(valid_folders)} result folder(s)\n")
+    print(f"Found {len(pages)} page(s) in {len(folders)} result folder(s)")
+    if index is None:
+        print("No search index (search disabled); create one with --reindex\n")
+    else:
+        print(f"Page list read from {index.path.name} (use --reindex if it is out of date)\n")
 
     print("Valid result folders:")
     # print out list of all result folders
-    for folder in valid_folders:
+    for folder in folders:
         print(f"{folder.relative_to(output_dir)}")
 
     try:
-        viewer = OCRViewer(output_dir)
+        viewer = OCRViewer(
+            output_dir,
+            pages=pages,
+            prefetch=args.prefetch,
+            cache_size=args.cache_size,
+            index=index,
+        )
         viewer.run()
     except ValueError as e:
         print(f"Error: {e}")